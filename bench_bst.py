@@ -0,0 +1,717 @@
+'''
+    Binary Search Tree Benchmarks
+
+    Time the trees in bst.py on inputs that are hard for an unbalanced BST.
+    Run as a script; the first argument is the number of keys (1000000 by
+    default).
+
+    Run with a first argument of suite for the benchmark suite, which times
+    every workload (insert, search, range, delete and mixed) on every input
+    order (sorted, reversed, random, Zipfian and sawtooth) for each tree
+    class and size, and reports operations per second and peak memory. The
+    inputs come from a seeded generator, so a run can be repeated exactly,
+    and the results can be saved as JSON and compared with an earlier run:
+
+        python bench_bst.py suite --sizes 100000 1000000 --json new.json
+        python bench_bst.py suite --compare new.json
+
+    See python bench_bst.py suite --help.
+
+    bench_bst.py
+'''
+
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from bst import *
+from bst_array import ArrayBSTree
+from bst_btree import BPlusTree
+from bst_cache import CachedBSTree
+from bst_timing import LatencyRecorder
+from bst_concurrent import ConcurrentBSTree
+
+
+def bench_insert(cls, keys):
+    '''(type, list) -> float
+    Return the number of seconds taken to insert keys, in order,
+    into a new tree of type cls.'''
+
+    tree = cls()
+    start = time.perf_counter()
+    for key in keys:
+        tree.insert(key)
+    return time.perf_counter() - start
+
+
+def bench_from_sorted(cls, keys):
+    '''(type, list) -> float
+    Return the number of seconds taken to build a tree of type cls from
+    the sorted keys in one call.'''
+
+    start = time.perf_counter()
+    cls.from_sorted(keys)
+    return time.perf_counter() - start
+
+
+def bench_scan(tree):
+    '''(BSTree) -> tuple of float
+    Return the number of seconds taken to visit every value of tree in
+    order, first by iterating over it and then by calling
+    in_order_successor from the smallest node.'''
+
+    start = time.perf_counter()
+    for value in tree:
+        pass
+    middle = time.perf_counter()
+    node = tree.select(0)
+    while node:
+        node = in_order_successor(node)
+    return middle - start, time.perf_counter() - middle
+
+
+def bench_count(tree, queries):
+    '''(BSTree, list) -> tuple of float
+    Return the number of seconds taken to count the values in each (lo, hi)
+    of queries, first with count_range and then by walking iter_range.'''
+
+    start = time.perf_counter()
+    for lo, hi in queries:
+        tree.count_range(lo, hi)
+    middle = time.perf_counter()
+    for lo, hi in queries:
+        sum(1 for node in tree.iter_range(lo, hi))
+    return middle - start, time.perf_counter() - middle
+
+
+def bench_scan_range(tree, queries):
+    '''(object, list) -> float
+    Return the number of seconds taken to walk iter_range(lo, hi) of tree
+    for each (lo, hi) of queries.'''
+
+    start = time.perf_counter()
+    for lo, hi in queries:
+        for item in tree.iter_range(lo, hi):
+            pass
+    return time.perf_counter() - start
+
+
+def bench_union(n, m):
+    '''(int, int) -> tuple of float
+    Return the number of seconds taken to merge a tree of m keys into a
+    tree of n keys, first with union and then by inserting each key.'''
+
+    big = list(range(0, 2 * n, 2))
+    small = random.sample(range(2 * n), m)
+    a, b = AVLTree.from_sorted(big), AVLTree.from_iterable(small)
+    start = time.perf_counter()
+    union(a, b)
+    joined = time.perf_counter() - start
+    a = AVLTree.from_sorted(big)
+    start = time.perf_counter()
+    for key in small:
+        a.insert(key)
+    return joined, time.perf_counter() - start
+
+
+def bench_truncate(n):
+    '''(int) -> tuple of float
+    Return the number of seconds taken to delete the lower half of a tree
+    of n keys, first with truncate_below and then key by key.'''
+
+    tree = AVLTree.from_sorted(range(n))
+    start = time.perf_counter()
+    tree.truncate_below(n // 2)
+    truncated = time.perf_counter() - start
+    tree = AVLTree.from_sorted(range(n))
+    start = time.perf_counter()
+    for key in range(n // 2):
+        tree.delete(key)
+    return truncated, time.perf_counter() - start
+
+
+def bench_snapshot(n):
+    '''(int) -> tuple of float
+    Return the number of seconds taken to take a consistent copy of a tree
+    of n keys, first with PersistentBSTree.snapshot and then by rebuilding
+    an AVLTree from the values of one.'''
+
+    tree = PersistentBSTree.from_sorted(range(n))
+    start = time.perf_counter()
+    tree.snapshot()
+    snapped = time.perf_counter() - start
+    tree = AVLTree.from_sorted(range(n))
+    start = time.perf_counter()
+    AVLTree.from_sorted(tree)
+    return snapped, time.perf_counter() - start
+
+
+def zipf_keys(keys, m, s=1.0):
+    '''(list, int, float) -> list
+    Return m keys drawn from keys so that keys[i] is drawn with probability
+    proportional to 1 / (i + 1) ** s.'''
+
+    weights = itertools.accumulate(1 / (i + 1) ** s for i in range(len(keys)))
+    return random.choices(keys, cum_weights=list(weights), k=m)
+
+
+def bench_skewed(n, m):
+    '''(int, int) -> list of tuple
+    Return (name, seconds) for m Zipf-distributed searches in a tree of n
+    keys, where the hot keys are scattered over the key range, for an
+    unbalanced tree built from shuffled keys, an AVL tree and a splay
+    tree.'''
+
+    # rank keys by heat independently of the order they are inserted in,
+    # or the hottest keys would sit at the top of the unbalanced tree
+    hot = list(range(n))
+    random.shuffle(hot)
+    queries = zipf_keys(hot, m)
+    keys = list(range(n))
+    random.shuffle(keys)
+    plain = BSTree()
+    for key in keys:
+        plain.insert(key)
+    results = []
+    for tree in (plain, AVLTree.from_sorted(range(n)),
+                 SplayTree.from_sorted(range(n))):
+        start = time.perf_counter()
+        for key in queries:
+            tree.search(key)
+        results.append((type(tree).__name__,
+                        time.perf_counter() - start))
+    return results
+
+
+def bench_cached(n, m, hot):
+    '''(int, int, int) -> tuple of float
+    Return the number of seconds taken to search a tree of n keys m times
+    for keys drawn from hot random keys, first on an AVLTree and then
+    through a CachedBSTree with room for all of them.'''
+
+    tree = AVLTree.from_sorted(range(n))
+    keys = random.sample(range(n), hot)
+    queries = [random.choice(keys) for i in range(m)]
+    cached = CachedBSTree(tree, hot)
+    start = time.perf_counter()
+    for key in queries:
+        tree.search(key)
+    middle = time.perf_counter()
+    for key in queries:
+        cached.search(key)
+    return middle - start, time.perf_counter() - middle
+
+
+def bench_instrumented(n):
+    '''(int) -> tuple of float
+    Return the number of seconds taken to insert n shuffled keys into an
+    AVLTree and search for each, first with a plain tree and then with an
+    instrumented one.'''
+
+    keys = list(range(n))
+    random.shuffle(keys)
+    results = []
+    for enabled in (False, True):
+        tree = AVLTree()
+        if enabled:
+            tree.instrument()
+        start = time.perf_counter()
+        for key in keys:
+            tree.insert(key)
+        for key in keys:
+            tree.search(key)
+        results.append(time.perf_counter() - start)
+    return tuple(results)
+
+
+def bench_timed(n, m):
+    '''(int, int) -> tuple
+    Return the number of seconds taken to search a tree of n keys for m
+    random keys without and then with a LatencyRecorder attached, and the
+    recorder.'''
+
+    tree = AVLTree.from_sorted(range(n))
+    queries = [random.randrange(n) for i in range(m)]
+    results = []
+    for timed in (False, True):
+        if timed:
+            recorder = LatencyRecorder()
+            tree.add_timing_hook(recorder)
+        start = time.perf_counter()
+        for key in queries:
+            tree.search(key)
+        results.append(time.perf_counter() - start)
+    return results[0], results[1], recorder
+
+
+def bench_frozen(n, m):
+    '''(int, int) -> tuple of float
+    Return the number of seconds taken to look up m random keys in a tree
+    of n keys, first one by one with search and then in one call to
+    search_many on a frozen copy.'''
+
+    tree = AVLTree.from_sorted(range(0, 2 * n, 2))
+    frozen = tree.freeze()
+    queries = [random.randrange(2 * n) for i in range(m)]
+    start = time.perf_counter()
+    for key in queries:
+        tree.search(key)
+    middle = time.perf_counter()
+    frozen.search_many(queries)
+    return middle - start, time.perf_counter() - middle
+
+
+def bench_load(n):
+    '''(int) -> tuple of float
+    Return the number of seconds taken to get back a tree of n keys at
+    startup, first by loading a file written by dump and then by
+    inserting every key into a new AVLTree.'''
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tree.bst')
+        AVLTree.from_sorted(range(n)).dump(path)
+        start = time.perf_counter()
+        tree = AVLTree.load(path)
+        tree.search(n // 2)
+        loaded = time.perf_counter() - start
+        del tree
+    keys = list(range(n))
+    random.shuffle(keys)
+    return loaded, bench_insert(AVLTree, keys)
+
+
+def bench_concurrent(n, threads, reads):
+    '''(int, int, int) -> float
+    Return the number of seconds taken by threads reader threads to search
+    a shared tree of n keys reads times each, while one writer thread keeps
+    inserting and deleting keys.'''
+
+    tree = ConcurrentBSTree(AVLTree.from_sorted(range(0, 2 * n, 2)))
+    done = threading.Event()
+
+    def write():
+        key = 1
+        while not done.is_set():
+            tree.insert(key)
+            tree.delete(key)
+            key = (key + 2) % (2 * n)
+
+    def read(seed):
+        rand = random.Random(seed)
+        for i in range(reads):
+            tree.search(rand.randrange(2 * n))
+
+    writer = threading.Thread(target=write)
+    readers = [threading.Thread(target=read, args=(i,))
+               for i in range(threads)]
+    writer.start()
+    start = time.perf_counter()
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    seconds = time.perf_counter() - start
+    done.set()
+    writer.join()
+    return seconds
+
+
+def bench_delete(cls, keys):
+    '''(type, list) -> float
+    Return the number of seconds taken to delete keys, in a shuffled order,
+    from a tree of type cls built by inserting keys.'''
+
+    tree = cls()
+    for key in keys:
+        tree.insert(key)
+    keys = list(keys)
+    random.shuffle(keys)
+    start = time.perf_counter()
+    for key in keys:
+        tree.delete(key)
+    return time.perf_counter() - start
+
+
+def bench_orders(classes, n, small):
+    '''(list of type, int, int) -> list of tuple
+    Return (name, keys, seconds) for inserting and then deleting keys in
+    the same order, for each of classes, on sorted, reversed and random
+    input. Sorted and reversed input are cut to small keys, which is all
+    an unbalanced tree can take.'''
+
+    shuffled = list(range(n))
+    random.shuffle(shuffled)
+    orders = [('sorted', list(range(small))),
+              ('reversed', list(range(small - 1, -1, -1))),
+              ('random', shuffled)]
+    results = []
+    for order, keys in orders:
+        for cls in classes:
+            tree = cls()
+            start = time.perf_counter()
+            for key in keys:
+                tree.insert(key)
+            middle = time.perf_counter()
+            for key in keys:
+                tree.delete(key)
+            results.append(('{} {} insert'.format(cls.__name__, order),
+                            len(keys), middle - start))
+            results.append(('{} {} delete'.format(cls.__name__, order),
+                            len(keys), time.perf_counter() - middle))
+    return results
+
+
+def bench_memory(cls, keys):
+    '''(type, list) -> float
+    Return the number of bytes allocated per node while inserting keys
+    into a new tree of type cls, as measured by tracemalloc.'''
+
+    tracemalloc.start()
+    tree = cls()
+    for key in keys:
+        tree.insert(key)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / len(keys)
+
+
+# the input orders and workloads of the suite
+ORDERS = ('sorted', 'reversed', 'random', 'zipf', 'sawtooth')
+WORKLOADS = ('insert', 'search', 'range', 'delete', 'mixed')
+# the tree classes the suite can run, by name
+SUITE_CLASSES = {cls.__name__: cls for cls in (
+    BSTree, AVLTree, SplayTree, TreapTree, ScapegoatTree, PersistentBSTree,
+    ArrayBSTree, BPlusTree)}
+# the trees that do not balance themselves, and the most keys they are
+# given in sorted or reversed order, where every insert walks the whole
+# tree
+UNBALANCED = (BSTree, ArrayBSTree)
+UNBALANCED_LIMIT = 2000
+# the number of consecutive values a range query of the suite covers
+RANGE_WIDTH = 100
+
+
+def suite_keys(order, n, rand):
+    '''(str, int, Random) -> list
+    Return n int keys below n in the input order order, drawn from rand.
+    Zipfian keys repeat, so they insert fewer than n values. Sawtooth keys
+    rise through the whole range about sqrt(n) times, each time starting
+    one higher.'''
+
+    if order == 'sorted':
+        return list(range(n))
+    if order == 'reversed':
+        return list(range(n - 1, -1, -1))
+    keys = list(range(n))
+    if order == 'random':
+        rand.shuffle(keys)
+        return keys
+    if order == 'zipf':
+        # rank keys by heat independently of their order, as bench_skewed
+        # does
+        rand.shuffle(keys)
+        weights = itertools.accumulate(1 / (i + 1) for i in range(n))
+        return rand.choices(keys, cum_weights=list(weights), k=n)
+    if order == 'sawtooth':
+        teeth = max(int(n ** 0.5), 1)
+        return [key for start in range(teeth)
+                for key in range(start, n, teeth)]
+    raise ValueError('unknown order {}'.format(order))
+
+
+def suite_workload(cls, workload, keys, rand):
+    '''(type, str, list, Random) -> tuple
+    Build a tree of type cls from keys and return (ops, seconds) for
+    running workload on it, where only the workload itself is timed:
+
+    - insert: insert keys, in order, into an empty tree;
+    - search: search for each of keys, in order;
+    - range: walk len(keys) // 100 ranges of RANGE_WIDTH values each,
+      starting at random keys;
+    - delete: delete keys, in order;
+    - mixed: starting from a tree of the first half of keys, make
+      len(keys) random operations on random keys: 60% searches, 20%
+      inserts and 20% deletes.'''
+
+    n = len(keys)
+    tree = cls()
+    if workload == 'insert':
+        start = time.perf_counter()
+        for key in keys:
+            tree.insert(key)
+        return n, time.perf_counter() - start
+    if workload == 'mixed':
+        for key in keys[:n // 2]:
+            tree.insert(key)
+        ops = [(rand.random(), keys[rand.randrange(n)]) for i in range(n)]
+        search, insert, delete = tree.search, tree.insert, tree.delete
+        start = time.perf_counter()
+        for r, key in ops:
+            if r < 0.6:
+                search(key)
+            elif r < 0.8:
+                insert(key)
+            else:
+                delete(key)
+        return n, time.perf_counter() - start
+    for key in keys:
+        tree.insert(key)
+    if workload == 'search':
+        start = time.perf_counter()
+        for key in keys:
+            tree.search(key)
+        return n, time.perf_counter() - start
+    if workload == 'range':
+        lows = [keys[rand.randrange(n)] for i in range(max(n // 100, 1))]
+        start = time.perf_counter()
+        for lo in lows:
+            for node in tree.iter_range(lo, lo + RANGE_WIDTH - 1):
+                pass
+        return len(lows), time.perf_counter() - start
+    if workload == 'delete':
+        start = time.perf_counter()
+        for key in keys:
+            tree.delete(key)
+        return n, time.perf_counter() - start
+    raise ValueError('unknown workload {}'.format(workload))
+
+
+def suite_peak(cls, workload, keys, seed):
+    '''(type, str, list, int) -> int
+    Return the peak number of bytes allocated while building the tree for
+    workload and running it, measured with tracemalloc in a separate run.
+    This includes the tree and anything the workload allocates, but not
+    keys.'''
+
+    tracemalloc.start()
+    try:
+        suite_workload(cls, workload, keys, random.Random(seed))
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_suite(classes, sizes, orders=ORDERS, workloads=WORKLOADS, seed=0,
+              repeat=1, memory=True, out=print):
+    '''(list of type, list of int, tuple, tuple, int, int, bool,
+        function) -> list of dict
+    Run every workload on every order of keys for each of classes and
+    sizes, and return a result for each run. Each result holds the class,
+    order, n, workload, ops, the least seconds of repeat runs, ops_per_sec,
+    peak_bytes (None if memory is False) and skipped, which is True for
+    runs that are too slow to make or that the class does not support. Keys
+    and workloads are drawn from generators seeded with seed, so two runs
+    with the same arguments do the same operations. Pass each result to
+    out as a line of text as it is made.'''
+
+    results = []
+    for n in sizes:
+        for order in orders:
+            keys = suite_keys(order, n, random.Random(seed))
+            for cls in classes:
+                for workload in workloads:
+                    result = {'class': cls.__name__, 'order': order, 'n': n,
+                              'workload': workload, 'ops': 0,
+                              'seconds': None, 'ops_per_sec': None,
+                              'peak_bytes': None, 'skipped': True}
+                    results.append(result)
+                    if (cls in UNBALANCED and n > UNBALANCED_LIMIT and
+                            order in ('sorted', 'reversed')) or \
+                       (workload == 'range' and
+                            not hasattr(cls, 'iter_range')):
+                        out(format_result(result))
+                        continue
+                    runs = [suite_workload(cls, workload, keys,
+                                           random.Random(seed))
+                            for i in range(repeat)]
+                    ops = runs[0][0]
+                    seconds = min(seconds for ops, seconds in runs)
+                    result.update(ops=ops, seconds=seconds,
+                                  ops_per_sec=ops / seconds if seconds
+                                  else None, skipped=False)
+                    if memory:
+                        result['peak_bytes'] = suite_peak(cls, workload,
+                                                          keys, seed)
+                    out(format_result(result))
+    return results
+
+
+def format_result(result, baseline=None):
+    '''(dict, dict) -> str
+    Return a line of text for a result of run_suite, with the ratio of its
+    ops_per_sec to that of baseline if baseline is given.'''
+
+    name = '{} {} {}'.format(result['class'], result['order'],
+                             result['workload'])
+    line = '{:<40} n={:<9}'.format(name, result['n'])
+    if result['skipped']:
+        return line + ' skipped'
+    line += ' {:>12.0f} ops/s'.format(result['ops_per_sec'] or 0)
+    if result['peak_bytes'] is not None:
+        line += ' {:>9.1f} MB peak'.format(result['peak_bytes'] / 2 ** 20)
+    if baseline and baseline.get('ops_per_sec') and result['ops_per_sec']:
+        line += ' {:>6.2f}x'.format(result['ops_per_sec'] /
+                                    baseline['ops_per_sec'])
+    return line
+
+
+def compare(results, baseline):
+    '''(list of dict, list of dict) -> list of str
+    Return a line for each result in results that was also run in
+    baseline, with the ratio of its ops_per_sec to the baseline's.'''
+
+    key = lambda result: (result['class'], result['order'], result['n'],
+                          result['workload'])
+    before = {key(result): result for result in baseline}
+    return [format_result(result, before[key(result)])
+            for result in results if key(result) in before]
+
+
+def suite_main(argv):
+    '''(list of str) -> NoneType
+    Run the benchmark suite with the command line arguments argv.'''
+
+    parser = argparse.ArgumentParser(
+        prog='bench_bst.py suite',
+        description='Time every workload on every input order.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000],
+                        help='numbers of keys (default 100000)')
+    parser.add_argument('--classes', nargs='+', default=[
+        'BSTree', 'AVLTree', 'SplayTree', 'TreapTree', 'ScapegoatTree',
+        'BPlusTree'], choices=sorted(SUITE_CLASSES), metavar='CLASS',
+                        help='tree classes, from ' +
+                        ', '.join(sorted(SUITE_CLASSES)))
+    parser.add_argument('--orders', nargs='+', default=list(ORDERS),
+                        choices=ORDERS)
+    parser.add_argument('--workloads', nargs='+', default=list(WORKLOADS),
+                        choices=WORKLOADS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='runs of each workload; the fastest counts')
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help='skip the tracemalloc run for peak memory')
+    parser.add_argument('--json', help='save the results to this file')
+    parser.add_argument('--compare', metavar='JSON',
+                        help='print speedups against a saved run')
+    args = parser.parse_args(argv)
+    results = run_suite([SUITE_CLASSES[name] for name in args.classes],
+                        args.sizes, tuple(args.orders),
+                        tuple(args.workloads), args.seed, args.repeat,
+                        args.memory)
+    if args.json:
+        meta = {'python': platform.python_version(),
+                'implementation': platform.python_implementation(),
+                'machine': platform.machine(), 'system': platform.system(),
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'argv': argv}
+        with open(args.json, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        print('compared with ' + args.compare)
+        for line in compare(results, baseline):
+            print(line)
+
+
+def report(name, n, seconds):
+    '''(str, int, float) -> NoneType
+    Print one line of benchmark results.'''
+
+    print("{:<32} n={:<9} {:>9.3f} s {:>12.0f} ops/s".format(
+        name, n, seconds, n / seconds))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['suite']:
+        suite_main(sys.argv[2:])
+        sys.exit()
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+
+    # the unbalanced tree is O(n) per insert on sorted input,
+    # so it can only be timed on a small prefix
+    small = min(n, 5000)
+    report("BSTree sorted insert", small,
+           bench_insert(BSTree, list(range(small))))
+    report("AVLTree sorted insert", small,
+           bench_insert(AVLTree, list(range(small))))
+    report("AVLTree sorted insert", n, bench_insert(AVLTree, list(range(n))))
+    report("AVLTree from_sorted", n,
+           bench_from_sorted(AVLTree, list(range(n))))
+    iterate, successor = bench_scan(AVLTree.from_sorted(range(n)))
+    report("AVLTree scan with iter()", n, iterate)
+    report("AVLTree scan with successor", n, successor)
+    tree = AVLTree.from_sorted(range(n))
+    queries = [(i, i + n // 10) for i in range(0, n, max(n // 100, 1))]
+    counted, walked = bench_count(tree, queries)
+    report("AVLTree count_range", len(queries), counted)
+    report("AVLTree count iter_range", len(queries), walked)
+    scan = sum(hi - lo for lo, hi in queries)
+    report("AVLTree iter_range values", scan, bench_scan_range(tree, queries))
+    report("BPlusTree iter_range values", scan,
+           bench_scan_range(BPlusTree.from_sorted(range(n)), queries))
+    report("PersistentBSTree sorted insert", n,
+           bench_insert(PersistentBSTree, list(range(n))))
+    snapped, copied = bench_snapshot(n)
+    report("PersistentBSTree snapshot", 1, snapped)
+    report("AVLTree copy", 1, copied)
+    truncated, deleted = bench_truncate(n)
+    report("AVLTree truncate_below half", n, truncated)
+    report("AVLTree delete lower half", n, deleted)
+    for m in (n // 1000, n // 10):
+        joined, inserted = bench_union(n, max(m, 1))
+        report("AVLTree union, m={}".format(m), n, joined)
+        report("AVLTree insert each, m={}".format(m), n, inserted)
+    for name, seconds in bench_skewed(min(n, 100000), n):
+        report(name + " Zipf search", n, seconds)
+    searched, cached = bench_cached(n, n, min(n, 4096))
+    report("AVLTree search, 4096 hot keys", n, searched)
+    report("CachedBSTree search", n, cached)
+    plain, counted = bench_instrumented(min(n, 100000))
+    report("AVLTree insert and search", 2 * min(n, 100000), plain)
+    report("Instrumented insert and search", 2 * min(n, 100000), counted)
+    m = min(n, 200000)
+    plain, timed, recorder = bench_timed(n, m)
+    report("AVLTree search", m, plain)
+    report("AVLTree search with timing", m, timed)
+    print("{:<32} {:>9.2f} us/op".format("timing overhead",
+                                         (timed - plain) / m * 1e6))
+    latency = recorder.export()['search']
+    print("{:<32} p50={} p99={} p999={} ns".format(
+        "AVLTree search latency", latency['p50'], latency['p99'],
+        latency['p999']))
+    searched, batched = bench_frozen(n, n)
+    report("AVLTree search", n, searched)
+    report("FrozenBSTree search_many", n, batched)
+    loaded, inserted = bench_load(n)
+    report("AVLTree load", n, loaded)
+    report("AVLTree insert all", n, inserted)
+    # all threads share the interpreter lock, so extra readers gain read
+    # throughput mainly by taking turns away from the writer
+    reads = min(n, 100000)
+    for threads in (1, 2, 4, 8):
+        report("Concurrent search, {} threads".format(threads),
+               threads * reads, bench_concurrent(n, threads, reads))
+
+    for name, count, seconds in bench_orders([BSTree, TreapTree, ScapegoatTree,
+                                              AVLTree, BPlusTree],
+                                             min(n, 100000), small):
+        report(name, count, seconds)
+
+    keys = list(range(min(n, 100000)))
+    random.seed(0)
+    random.shuffle(keys)
+    for cls in (BSTree, AVLTree):
+        report(cls.__name__ + " random delete", len(keys),
+               bench_delete(cls, keys))
+    for cls in (BSTree, ArrayBSTree, BPlusTree):
+        print("{:<32} {:>9.1f} bytes/node".format(
+            cls.__name__ + " memory", bench_memory(cls, keys)))
@@ -12,9 +12,22 @@
     Copyright 2015 Seungky Kim. All rights reserved. '''
 
 
+import math
+import random
+from collections import deque
+
+
 class BTNode:
-    '''A generic binary tree node that keeps a value and pointers to
-    a left child, right child and parent.'''
+    '''A generic binary tree node that keeps a value, pointers to
+    a left child, right child and parent, and the height ht and number of
+    nodes size of the subtree rooted at it. BSTree keeps ht and size up to
+    date as it changes shape.'''
+
+    # no per-instance __dict__: a tree holds one BTNode per value
+    __slots__ = ('value', 'left', 'right', 'parent', 'ht', 'size')
+
+    # the Monoid aggregated over subtrees; see AggNode
+    monoid = None
 
     def __init__(self, v, p=None):
         '''(BTNode, object, BTNode) -> NoneType
@@ -25,6 +38,8 @@ class BTNode:
         self.left = None
         self.right = None
         self.parent = p
+        self.ht = 1
+        self.size = 1
 
     def __str__(self):
         '''(BTNode) -> str
@@ -83,21 +98,9 @@ class BTNode:
         '''(BTNode) -> int
         Return the height of self. Height is defined as the length of the
         longest path by number of nodes from self to a leaf.
-        The height of a leaf node is 1.'''
+        The height of a leaf node is 1. It is cached, so this is O(1).'''
 
-        if not self:
-            return 0
-        elif self.is_leaf():
-            return 1
-        else:
-            if not self.left:
-                return self.right.height() + 1
-            elif not self.right:
-                return self.left.height() + 1
-            else:
-                left = self.left.height()
-                right = self.right.height()
-                return 1 + max(left, right)
+        return self.ht
 
     def depth(self):
         '''(BTNode) -> int
@@ -105,11 +108,84 @@ class BTNode:
         path by number of nodes from the root of the tree to self.
         The depth of a root node is 1.'''
 
-        if not self.parent:
-            return 1
-        else:
-            temp_parent = self.parent.depth()
-            return 1 + temp_parent
+        depth = 1
+        node = self.parent
+        while node:
+            depth += 1
+            node = node.parent
+        return depth
+
+    def copy_value(self, n):
+        '''(BTNode, BTNode) -> NoneType
+        Replace the value of self with the value of n.'''
+
+        self.value = n.value
+
+
+class MapNode(BTNode):
+    '''A BTNode for a tree in mapping mode. value is the key the node is
+    ordered by, and payload is the object associated with it.'''
+
+    __slots__ = ('payload',)
+
+    def __init__(self, v, p=None):
+        '''(MapNode, object, MapNode) -> NoneType
+        A new MapNode with key v, no payload, no left or right
+        children and parent p.'''
+
+        BTNode.__init__(self, v, p)
+        self.payload = None
+
+    def copy_value(self, n):
+        '''(MapNode, MapNode) -> NoneType
+        Replace the key and payload of self with those of n.'''
+
+        self.value = n.value
+        self.payload = n.payload
+
+
+def _node_value(node):
+    '''(BTNode) -> object
+    Return the value of node.'''
+
+    return node.value
+
+
+class Monoid:
+    '''An associative operation op with identity element identity, for
+    keeping an aggregate of every subtree of a BSTree. measure maps a node
+    to the element that is aggregated; by default it is the node's value,
+    which is the key in mapping mode.'''
+
+    def __init__(self, op, identity, measure=_node_value):
+        '''(Monoid, function, object, function) -> NoneType
+        A new Monoid combining elements with op(a, b).'''
+
+        self.op = op
+        self.identity = identity
+        self.measure = measure
+        self._node_classes = {}
+
+    def node_class(self, base=BTNode):
+        '''(Monoid, type) -> type
+        Return the subclass of the node class base whose nodes also keep
+        agg, the aggregate under self of the subtree rooted at them. self
+        is a class attribute of the subclass, so it costs nothing per
+        node.'''
+
+        if base not in self._node_classes:
+            def __init__(node, v, p=None):
+                base.__init__(node, v, p)
+                node.agg = self.measure(node)
+            self._node_classes[base] = type(
+                'Agg' + base.__name__, (base,),
+                {'__slots__': ('agg',), 'monoid': self, '__init__': __init__})
+        return self._node_classes[base]
+
+
+SUM = Monoid(lambda a, b: a + b, 0)
+MIN = Monoid(min, float('inf'))
+MAX = Monoid(max, float('-inf'))
 
 
 class BSTree:
@@ -118,12 +194,131 @@ class BSTree:
     is a (possibly empty) BST with values strictly less than k and its right
     child is a (possibly empty) BST with values strictly greater than k.'''
 
-    def __init__(self, root=None):
-        '''(BSTree, BTNode) -> NoneType
-        Create a new BST with an optional root.
+    node_class = BTNode
+    # the node class of a tree in mapping mode
+    map_node_class = MapNode
+    # while an instrumented tree runs an operation, the OpStats it counts
+    # into; see instrument
+    counters = None
+    # OpStats by operation name, kept from the first call to instrument
+    op_stats = None
+    # True if searching changes the shape of the tree, so that readers
+    # must not share it; see ConcurrentBSTree
+    mutating_reads = False
+
+    def __init__(self, root=None, monoid=None, mapping=False):
+        '''(BSTree, BTNode, Monoid, bool) -> NoneType
+        Create a new BST with an optional root. If monoid is given, every
+        node keeps the aggregate of its subtree under it, which
+        aggregate_range uses. If mapping is True, the tree is an ordered
+        dictionary whose nodes are MapNodes holding a key and a payload.
         NOTE: This method is complete.'''
 
         self.root = root
+        self.monoid = monoid
+        self.mapping = mapping
+        if mapping:
+            self.node_class = self.map_node_class
+        if monoid:
+            self.node_class = monoid.node_class(self.node_class)
+
+    @classmethod
+    def from_sorted(cls, values, **kwargs):
+        '''(type, iterable) -> BSTree
+        Return a new perfectly balanced tree of this class holding values,
+        which must be in ascending order. Repeated values are kept once.
+        Raise ValueError if values are out of order. This is O(n).
+        Keyword arguments are passed on to the constructor.'''
+
+        unique = _unique_sorted(values)
+        tree = cls(**kwargs)
+        tree.root = _build(unique, 0, len(unique), None, tree.node_class)
+        return tree
+
+    @classmethod
+    def from_iterable(cls, values, **kwargs):
+        '''(type, iterable) -> BSTree
+        Return a new perfectly balanced tree of this class holding values,
+        in any order. This is O(n log n).
+        Keyword arguments are passed on to the constructor.'''
+
+        return cls.from_sorted(sorted(values), **kwargs)
+
+    def freeze(self):
+        '''(BSTree) -> FrozenBSTree
+        Return a read-only copy of this tree kept as a sorted array, with
+        payloads in mapping mode, for fast batched lookups. See
+        bst_frozen.py.'''
+
+        # bst_frozen imports this module, so import it only when needed
+        from bst_frozen import FrozenBSTree
+        if self.mapping:
+            return FrozenBSTree(list(self),
+                                [payload for key, payload in self.items()])
+        return FrozenBSTree(list(self))
+
+    def dump(self, path):
+        '''(BSTree, str) -> NoneType
+        Write the values of this tree, and payloads in mapping mode, to the
+        file path in the binary format of bst_frozen.dump_tree.'''
+
+        from bst_frozen import dump_tree
+        dump_tree(self, path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        '''(type, str, bool) -> MappedBSTree
+        Return a read-only tree holding what dump wrote to path, without
+        inserting its values one by one. If mmap is True, numeric keys are
+        read in place from a memory map of the file. The tree turns into a
+        mutable tree of this class the first time it is changed.'''
+
+        from bst_frozen import load_tree
+        return load_tree(path, mmap, cls)
+
+    def instrument(self, enabled=True):
+        '''(BSTree, bool) -> NoneType
+        Start counting, per kind of operation, the key comparisons, nodes
+        visited, nodes allocated and restructurings (rotations, rebuilds,
+        splits and merges) of this tree, or stop if enabled is False. The
+        counts are kept when counting stops; read them with stats. A tree
+        that is not instrumented pays nothing for this. See bst_stats.py.'''
+
+        from bst_stats import instrument
+        instrument(self, enabled)
+
+    def stats(self, reset=False):
+        '''(BSTree, bool) -> dict
+        Return a snapshot of the counts kept since this tree was first
+        instrumented, as a dict from operation name to a dict of calls,
+        comparisons, visits, allocations and restructures. If reset is
+        True, start the counts again from zero.'''
+
+        if not self.op_stats:
+            return {}
+        snapshot = {op: stats.as_dict() for op, stats in self.op_stats.items()}
+        if reset:
+            self.op_stats.clear()
+        return snapshot
+
+    def add_timing_hook(self, hook):
+        '''(BSTree, function) -> NoneType
+        Call hook(op, ns) after every insert, search, floor, ceiling, rank,
+        range, count_range and delete on this tree, with the name of the
+        operation and the nanoseconds it took. A bst_timing.LatencyRecorder
+        is such a hook. A tree without hooks pays nothing for this. See
+        bst_timing.py.'''
+
+        from bst_timing import add_timing_hook
+        add_timing_hook(self, hook)
+
+    def remove_timing_hook(self, hook):
+        '''(BSTree, function) -> NoneType
+        Stop calling hook after operations on this tree. Raise ValueError
+        if it was not added with add_timing_hook.'''
+
+        from bst_timing import remove_timing_hook
+        remove_timing_hook(self, hook)
 
     def print_tree(self):
         '''(BSTree) -> NoneType
@@ -133,22 +328,126 @@ class BSTree:
         _print_tree(self.root, 1)
 
     def insert(self, v):
-        '''(BSTree, object) -> NoneType
+        '''(BSTree, object) -> BTNode
         Insert a new node with value v into self. Do not duplicate values.
+        Return the node holding v.
         NOTE: This method is complete.'''
 
         if not self.root:
-            self.root = BTNode(v)
-            return
-        _insert(self.root, v)
+            self.root = self.node_class(v)
+            return self.root
+        return _insert(self.root, v, self.node_class)
 
     def height(self):
         '''(BSTree) -> int
         Return the height of this tree.'''
         
-        if not self.root:
-            return 0
-        return self.root.height()
+        return _ht(self.root)
+
+    def __len__(self):
+        '''(BSTree) -> int
+        Return the number of values in this tree.'''
+
+        return _size(self.root)
+
+    def __contains__(self, v):
+        '''(BSTree, object) -> bool
+        Return True iff v is in this tree.'''
+
+        return _search(self.root, v) is not None
+
+    def __iter__(self):
+        '''(BSTree) -> generator
+        Yield the values in this tree in ascending order.'''
+
+        node = _leftmost(self.root)
+        while node:
+            yield node.value
+            node = _successor(node)
+
+    def __reversed__(self):
+        '''(BSTree) -> generator
+        Yield the values in this tree in descending order.'''
+
+        node = _rightmost(self.root)
+        while node:
+            yield node.value
+            node = _predecessor(node)
+
+    def pre_order(self):
+        '''(BSTree) -> generator
+        Yield the BTNodes of this tree in pre-order.'''
+
+        return _pre_order(self.root)
+
+    def post_order(self):
+        '''(BSTree) -> generator
+        Yield the BTNodes of this tree in post-order.'''
+
+        return _post_order(self.root)
+
+    def level_order(self):
+        '''(BSTree) -> generator
+        Yield the BTNodes of this tree level by level, from left to right.
+        Unlike the other traversals this keeps a queue as wide as the
+        widest level.'''
+
+        return _level_order(self.root)
+
+    def __getitem__(self, key):
+        '''(BSTree, object) -> object
+        Return the payload stored under key in mapping mode. Raise KeyError
+        if key is not in the tree.'''
+
+        if not self.mapping:
+            raise TypeError('tree is not in mapping mode')
+        node = _search(self.root, key)
+        if node is None:
+            raise KeyError(key)
+        return node.payload
+
+    def __setitem__(self, key, payload):
+        '''(BSTree, object, object) -> NoneType
+        Store payload under key in mapping mode, replacing any payload
+        already there. Refresh the aggregates above the node, which the
+        monoid may measure from its payload.'''
+
+        if not self.mapping:
+            raise TypeError('tree is not in mapping mode')
+        node = self.insert(key)
+        node.payload = payload
+        if self.monoid:
+            _retrace(node)
+
+    def __delitem__(self, key):
+        '''(BSTree, object) -> NoneType
+        Delete key and its payload in mapping mode. Raise KeyError if key
+        is not in the tree.'''
+
+        if not self.mapping:
+            raise TypeError('tree is not in mapping mode')
+        if key not in self:
+            raise KeyError(key)
+        self.delete(key)
+
+    def get(self, key, default=None):
+        '''(BSTree, object, object) -> object
+        Return the payload stored under key in mapping mode, or default if
+        key is not in the tree.'''
+
+        if not self.mapping:
+            raise TypeError('tree is not in mapping mode')
+        node = _search(self.root, key)
+        return default if node is None else node.payload
+
+    def items(self):
+        '''(BSTree) -> generator
+        Yield the (key, payload) pairs of a tree in mapping mode in key
+        order.'''
+
+        if not self.mapping:
+            raise TypeError('tree is not in mapping mode')
+        return _items(self.root)
 
     def search(self, v):
         '''(BSTree, object) -> BTNode
@@ -158,6 +457,48 @@ class BSTree:
 
         return _search(self.root, v)
 
+    def floor(self, v):
+        '''(BSTree, object) -> BTNode
+        Return the node with the greatest value not greater than v, or None
+        if every value in the tree is greater than v.'''
+
+        return _floor(self.root, v)
+
+    def ceiling(self, v):
+        '''(BSTree, object) -> BTNode
+        Return the node with the least value not less than v, or None if
+        every value in the tree is less than v.'''
+
+        return _ceiling(self.root, v)
+
+    def rank(self, v):
+        '''(BSTree, object) -> int
+        Return the number of values in this tree that are less than v, which
+        is the position of v in sorted order if v is in the tree.'''
+
+        return _count_below(self.root, v, False)
+
+    def select(self, i):
+        '''(BSTree, int) -> BTNode
+        Return the BTNode with the i-th smallest value in this tree, counting
+        from 0. Negative i counts from the end, as for lists. Raise IndexError
+        if there is no such node.'''
+
+        if i < 0:
+            i += _size(self.root)
+        if not 0 <= i < _size(self.root):
+            raise IndexError('tree index out of range')
+        node = self.root
+        while True:
+            left = _size(node.left)
+            if i < left:
+                node = node.left
+            elif i == left:
+                return node
+            else:
+                i -= left + 1
+                node = node.right
+
     def range(self, v_start, v_end):
         '''(BSTree, object, object) -> list
         Return a list of Node objects with values between v_start and
@@ -168,6 +509,80 @@ class BSTree:
 
         return _range(self.root, v_start, v_end)
 
+    def iter_range(self, lo=None, hi=None, inclusive=(True, True)):
+        '''(BSTree, object, object, tuple) -> generator
+        Yield in order the BTNodes with values between lo and hi. A bound
+        of None is unbounded. inclusive says whether each bound itself is
+        in the range. Values only need to support <. Nodes are produced
+        lazily, so stopping early costs nothing more.'''
+
+        return _iter_range(self.root, lo, hi, inclusive)
+
+    def count_range(self, lo=None, hi=None, inclusive=(True, True)):
+        '''(BSTree, object, object, tuple) -> int
+        Return the number of values between lo and hi, with bounds as for
+        iter_range, in O(height) and without visiting them.'''
+
+        lo_inclusive, hi_inclusive = inclusive
+        count = len(self)
+        if hi is not None:
+            count = _count_below(self.root, hi, hi_inclusive)
+        if lo is not None:
+            count -= _count_below(self.root, lo, not lo_inclusive)
+        return max(count, 0)
+
+    def aggregate_range(self, lo=None, hi=None, inclusive=(True, True)):
+        '''(BSTree, object, object, tuple) -> object
+        Return the aggregate under this tree's monoid of the values between
+        lo and hi, in order, with bounds as for iter_range. This is
+        O(height) and does not visit the values in the range. Raise
+        ValueError if the tree was created without a monoid.'''
+
+        if not self.monoid:
+            raise ValueError('tree has no monoid')
+        return _aggregate_range(self.root, lo, hi, inclusive, self.monoid)
+
+    def delete_range(self, lo=None, hi=None, inclusive=(True, True),
+                     detach=False):
+        '''(BSTree, object, object, tuple, bool) -> BSTree
+        Delete every value between lo and hi, with bounds as for iter_range,
+        by cutting whole subtrees out of self in O(height). If detach is
+        True, return the deleted values as a tree of the same kind as self;
+        otherwise return None.'''
+
+        lo_inclusive, hi_inclusive = inclusive
+        rest = _take(self)
+        less = more = None
+        if lo is not None:
+            less, low, rest = _split(rest, lo)
+            if low and lo_inclusive:
+                rest = _join(None, low, rest)
+            elif low:
+                less = _join(less, low, None)
+        if hi is not None:
+            rest, high, more = _split(rest, hi)
+            if high and hi_inclusive:
+                rest = _join(rest, high, None)
+            elif high:
+                more = _join(None, high, more)
+        self.root = _join2(less, more)
+        if self.root:
+            self.root.parent = None
+        if detach:
+            return _like(self, rest)
+
+    def truncate_below(self, v, detach=False):
+        '''(BSTree, object, bool) -> BSTree
+        Delete every value less than v, as delete_range does.'''
+
+        return self.delete_range(None, v, (True, False), detach)
+
+    def truncate_above(self, v, detach=False):
+        '''(BSTree, object, bool) -> BSTree
+        Delete every value greater than v, as delete_range does.'''
+
+        return self.delete_range(v, None, (False, True), detach)
+
     def delete(self, v):
         '''(BSTree, object) -> NoneType
         Delete node with value v from self. Change root if required.
@@ -176,145 +591,2054 @@ class BSTree:
         self.root = _delete(self.root, v)
 
 
-## HELPER RECURSIVE FUNCTIONS
+class AVLTree(BSTree):
+    '''A BSTree that rebalances itself after every insert and delete so
+    that the heights of the two subtrees of any node differ by at most one.
+    insert, search and delete are O(log n) whatever the order of the input.'''
 
-def _print_tree(root, depth):
-    '''(BTNode, int) -> NoneType
-    Print the left subtree of root, print root preceded by four spaces for
-    every unit of depth, then print the right subtree of root.
-    depth is the depth of root.
-    NOTE: This function is complete.'''
+    def insert(self, v):
+        '''(AVLTree, object) -> BTNode
+        Insert a new node with value v into self and rebalance.
+        Do not duplicate values. Return the node holding v.'''
 
-    if root is None:
-        return
-    _print_tree(root.right, depth + 1)
-    print("    " * (depth - 1) + str(root))
-    _print_tree(root.left, depth + 1)
+        if not self.root:
+            self.root = self.node_class(v)
+            return self.root
+        node = self.root
+        while True:
+            if v == node.value:
+                return node
+            if v < node.value:
+                if not node.left:
+                    new = self.node_class(v)
+                    node.set_left(new)
+                    break
+                node = node.left
+            else:
+                if not node.right:
+                    new = self.node_class(v)
+                    node.set_right(new)
+                    break
+                node = node.right
+        _rebalance(self, node)
+        return new
 
+    def delete(self, v):
+        '''(AVLTree, object) -> NoneType
+        Delete node with value v from self and rebalance.
+        Do nothing if value doesn't exist in self.'''
 
-def _insert(root, v):
-    '''(BTNode, obj) -> NoneType
-    Insert a new node with value v into BST rooted at root.
-    Do not allow duplicates.
-    NOTE: This function is complete.'''
+        node = _search(self.root, v)
+        if node:
+            _rebalance(self, _remove(self, node))
 
-    if root.value == v:
-        return
-    if v < root.value:
-        if root.left:
-            _insert(root.left, v)
-        else:
-            root.set_left(BTNode(v))
-    elif v > root.value:
-        if root.right:
-            _insert(root.right, v)
-        else:
-            root.set_right(BTNode(v))
 
-def _search(root, v):
-    '''(BTNode, object) -> BTNode
-    Return BTNode with value v if it exists in subtree rooted at
-    root. Return None if no such BTNode exists.'''
+class SplayTree(BSTree):
+    '''A BSTree that moves every node it searches for or inserts to the
+    root with rotations. Recently used values stay near the top, so skewed
+    lookups cost far less than the height of the tree, and any sequence of
+    operations is O(log n) amortized. Because search changes the shape of
+    the tree, a SplayTree must not be searched by several threads at once;
+    ConcurrentBSTree takes its write lock to read one.'''
 
-    if not root:
-        return
-    elif root.value == v:
-        return root
-    else:
-        if v < root.value:
-            return _search(root.left, v)
-        elif v > root.value:
-            return _search(root.right, v)
+    mutating_reads = True
 
-def _range(root, v_start, v_end):
-    '''(BTNode, int, int) -> list
-    Return an in-order list of BTNodes that have values between
-    v_start and v_end, inclusive in subtree rooted at root.'''
+    def insert(self, v):
+        '''(SplayTree, object) -> BTNode
+        Insert a new node with value v into self and splay it to the root.
+        Do not duplicate values. Return the node holding v.'''
 
-    bt_list = []
-    if not root:
-        return []
-    elif root.value not in range(v_start, v_end + 1 ):
-        if root.is_leaf() and (root.value in range(v_start, v_end+1)):
-            bt_list.extend([root.value])
-    else:
-        if root.value > v_start:
-            if root.left:
-                bt_list.extend(_range(root.left, v_start, v_end))
-        bt_list.extend([root.value])
-        if root.value < v_end:
-            if root.right:
-                bt_list.extend(_range(root.right, v_start, v_end))
-    return bt_list
-
-    
-def _delete(root, v):
-    '''(BTNode, object) -> BTNode
-    Delete BTNode with >>> value v from subtree rooted at root.
-    Return root of subtree. Do nothing if value doesn't exist in subtree.'''
-    
-    if root == None:
-        return None
-    elif root.value == v:
-        if root.is_leaf():
-            return None
-        elif root.left and not root.right: # only left subtree exists
-            return root.left
-        elif root.right and not root.left: # only right subtree exists
-            return root.right
-        elif root.right and root.left: # right and left subtrees exist
-            if root.left.height() > root.right.height():
-                return in_order_predecessor(root)
+        if not self.root:
+            self.root = self.node_class(v)
+            return self.root
+        node = self.root
+        while v != node.value:
+            if v < node.value:
+                if not node.left:
+                    node.set_left(self.node_class(v))
+                node = node.left
             else:
-                return in_order_successor(root)
-    else:
-        if v < root.value:
-            return root.set_left(_delete(root.left, v))
-        elif v > root.value:
-            return root.set_right(_delete(root.right, v))
-        
-
-## NEIGHBOURS FUNCTIONS
+                if not node.right:
+                    node.set_right(self.node_class(v))
+                node = node.right
+        if node.parent:
+            _splay(self, node)
+        return node
 
-def in_order_predecessor(node):
-    '''(BTNode) -> BTNode
-    Return the in-order predecessor of node.
-    Return None if node is leftmost.'''
+    def search(self, v):
+        '''(SplayTree, object) -> BTNode
+        Return the node with value v, or None if there is no such node.
+        Splay the node, or the last node visited if v is not in self, to
+        the root.'''
 
-    if node.left:
-        node = node.left
-        while node.right:
-            node = node.right
+        node, last = self.root, None
+        while node and v != node.value:
+            last = node
+            node = node.left if v < node.value else node.right
+        last = node or last
+        if last and last.parent:
+            _splay(self, last)
         return node
-    else:
-        while not node.is_right_child():
-            if node.parent == None:
-                return None
-            node = node.parent
-        if node.is_right_child():
-            return node.parent
-        else:
-            return node.parent.parent
 
-def in_order_successor(node):
-    '''(BTNode) -> BTNode
-    Return the in-order successor of node.
-    Return None if node is rightmost.'''
+    def delete(self, v):
+        '''(SplayTree, object) -> NoneType
+        Delete the node with value v from self after splaying it to the
+        root, as search does, so that deletes are O(log n) amortized too.
+        Do nothing if v doesn't exist in self.'''
 
-    if node.right:
-        node = node.right
-        while node.left:
-            node = node.left
+        # SplayTree.search rather than self.search, so that a tree timed
+        # by bst_timing does not also time a search
+        if SplayTree.search(self, v):
+            BSTree.delete(self, v)
+
+
+class ScapegoatNode:
+    '''A lean binary tree node for ScapegoatTree. It keeps a value and
+    pointers to a left child, right child and parent, and nothing to
+    balance by.'''
+
+    __slots__ = ('value', 'left', 'right', 'parent')
+
+    monoid = None
+
+    def __init__(self, v, p=None):
+        '''(ScapegoatNode, object, ScapegoatNode) -> NoneType
+        A new ScapegoatNode with value v, no left or right children and
+        parent p.'''
+
+        self.value = v
+        self.left = None
+        self.right = None
+        self.parent = p
+
+    def __repr__(self):
+        '''(ScapegoatNode) -> str
+        Return the internal string representation of self.'''
+
+        return "ScapegoatNode: {}".format(self.value)
+
+    def height(self):
+        '''(ScapegoatNode) -> int
+        Return the height of self, as BTNode.height does. It is not
+        cached, so this walks the whole subtree.'''
+
+        return _height(self)
+
+    __str__ = BTNode.__str__
+    set_right = BTNode.set_right
+    set_left = BTNode.set_left
+    is_left_child = BTNode.is_left_child
+    is_right_child = BTNode.is_right_child
+    is_leaf = BTNode.is_leaf
+    depth = BTNode.depth
+    copy_value = BTNode.copy_value
+
+
+class ScapegoatMapNode(ScapegoatNode):
+    '''A ScapegoatNode for a ScapegoatTree in mapping mode, holding a
+    payload.'''
+
+    __slots__ = ('payload',)
+
+    def __init__(self, v, p=None):
+        '''(ScapegoatMapNode, object, ScapegoatMapNode) -> NoneType
+        A new ScapegoatMapNode with key v, no payload, no left or right
+        children and parent p.'''
+
+        ScapegoatNode.__init__(self, v, p)
+        self.payload = None
+
+    copy_value = MapNode.copy_value
+
+
+class ScapegoatTree(BSTree):
+    '''A BSTree that keeps no balance information in its nodes, only its
+    size and the largest size it has had since it was last rebuilt whole.
+    When an insert leaves a node deeper than log(n) / log(1 / alpha), the
+    subtree of the lowest ancestor that is unbalanced by more than alpha
+    (the scapegoat) is rebuilt perfectly balanced; the sizes that finds it
+    by are counted on the way up. When deletes shrink the tree below alpha
+    times its largest size, the whole tree is rebuilt. insert and delete
+    are O(log n) amortized, and rebuilding reuses the nodes, so they keep
+    their payloads. With no sizes in the nodes, rank, select and
+    count_range walk the values they count, and height walks the tree.'''
+
+    node_class = ScapegoatNode
+    map_node_class = ScapegoatMapNode
+    # how unbalanced a subtree may be: 0.5 is perfect balance and 1 none
+    alpha = 2 / 3
+
+    def __init__(self, root=None, monoid=None, mapping=False):
+        '''(ScapegoatTree, ScapegoatNode, Monoid, bool) -> NoneType
+        Create a new scapegoat tree with an optional root, as BSTree
+        does.'''
+
+        BSTree.__init__(self, root, monoid, mapping)
+        self.size = _count(root)
+        # the largest size of the tree since it was last rebuilt whole
+        self.max_size = self.size
+
+    @classmethod
+    def from_sorted(cls, values, **kwargs):
+        '''(type, iterable) -> ScapegoatTree
+        Return a new perfectly balanced tree holding values, which must be
+        in ascending order, as BSTree.from_sorted does.'''
+
+        tree = cls(**kwargs)
+        nodes = [tree.node_class(v) for v in _unique_sorted(values)]
+        tree.root = _relink(nodes, 0, len(nodes), None, _refresh)
+        tree.size = tree.max_size = len(nodes)
+        return tree
+
+    def height(self):
+        '''(ScapegoatTree) -> int
+        Return the height of this tree, walking it.'''
+
+        return _height(self.root)
+
+    def __len__(self):
+        '''(ScapegoatTree) -> int
+        Return the number of values in this tree.'''
+
+        return self.size
+
+    def __setitem__(self, key, payload):
+        '''(ScapegoatTree, object, object) -> NoneType
+        Store payload under key in mapping mode, as BSTree.__setitem__
+        does.'''
+
+        if not self.mapping:
+            raise TypeError('tree is not in mapping mode')
+        node = self.insert(key)
+        node.payload = payload
+        _reaggregate(node)
+
+    def insert(self, v):
+        '''(ScapegoatTree, object) -> ScapegoatNode
+        Insert a new node with value v into self, rebuilding the subtree of
+        a scapegoat if the new node is too deep. Do not duplicate values.
+        Return the node holding v.'''
+
+        parent, node = None, self.root
+        depth = 0
+        while node:
+            if v == node.value:
+                return node
+            parent = node
+            node = node.left if v < node.value else node.right
+            depth += 1
+        node = self.node_class(v, parent)
+        if parent is None:
+            self.root = node
+        elif v < parent.value:
+            parent.left = node
+        else:
+            parent.right = node
+        _reaggregate(parent)
+        self.size += 1
+        if self.size > self.max_size:
+            self.max_size = self.size
+        if depth > math.log(self.size) / -math.log(self.alpha):
+            # climb to the first ancestor whose child on the path holds
+            # more than alpha of its subtree; there must be one
+            child, size = node, 1
+            scapegoat = parent
+            while True:
+                sibling = scapegoat.right if scapegoat.left is child \
+                    else scapegoat.left
+                total = size + 1 + _count(sibling)
+                if size > self.alpha * total or scapegoat.parent is None:
+                    break
+                child, size = scapegoat, total
+                scapegoat = scapegoat.parent
+            _rebuild(self, scapegoat)
         return node
-    else:
-        while not node.is_left_child():
-            if node.parent == None:
-                return None
-            node = node.parent
-        if node.is_left_child():
-            return node.parent
+
+    def delete(self, v):
+        '''(ScapegoatTree, object) -> NoneType
+        Delete node with value v from self, rebuilding the whole tree if it
+        has shrunk too far. Do nothing if value doesn't exist in self.'''
+
+        node = _search(self.root, v)
+        if node is None:
+            return
+        _reaggregate(_remove(self, node))
+        self.size -= 1
+        if self.size < self.alpha * self.max_size:
+            _rebuild(self, self.root)
+            self.max_size = self.size
+
+    def rank(self, v):
+        '''(ScapegoatTree, object) -> int
+        Return the number of values in this tree that are less than v, by
+        walking them in order.'''
+
+        return self.count_range(None, v, (True, False))
+
+    def select(self, i):
+        '''(ScapegoatTree, int) -> ScapegoatNode
+        Return the node with the i-th smallest value, as BSTree.select
+        does, by walking from whichever end of the tree is nearer.'''
+
+        if i < 0:
+            i += self.size
+        if not 0 <= i < self.size:
+            raise IndexError('tree index out of range')
+        if i < self.size - i:
+            node = _leftmost(self.root)
+            for step in range(i):
+                node = _successor(node)
         else:
-            return node.parent.parent
+            node = _rightmost(self.root)
+            for step in range(self.size - 1 - i):
+                node = _predecessor(node)
+        return node
+
+    def count_range(self, lo=None, hi=None, inclusive=(True, True)):
+        '''(ScapegoatTree, object, object, tuple) -> int
+        Return the number of values between lo and hi, as
+        BSTree.count_range does, by walking them.'''
+
+        if lo is None and hi is None:
+            return self.size
+        return sum(1 for node in _iter_range(self.root, lo, hi, inclusive))
+
+    def delete_range(self, lo=None, hi=None, inclusive=(True, True),
+                     detach=False):
+        '''(ScapegoatTree, object, object, tuple, bool) -> ScapegoatTree
+        Delete every value between lo and hi, as BSTree.delete_range does,
+        by rebuilding the nodes kept, and those deleted if detach is True,
+        into perfectly balanced trees in O(n).'''
+
+        nodes = _nodes(self.root)
+        removed = list(_iter_range(self.root, lo, hi, inclusive))
+        start = nodes.index(removed[0]) if removed else 0
+        del nodes[start:start + len(removed)]
+        self.root = _relink(nodes, 0, len(nodes), None, _refresh)
+        self.size = self.max_size = len(nodes)
+        if detach:
+            return _like(self, _relink(removed, 0, len(removed), None,
+                                       _refresh))
+
+
+class TreapNode(BTNode):
+    '''A BTNode with a random priority. In a TreapTree the priority of a
+    node is never less than those of its children.'''
+
+    __slots__ = ('priority',)
+
+    def __init__(self, v, p=None):
+        '''(TreapNode, object, TreapNode) -> NoneType
+        A new TreapNode with value v, parent p and a random priority.'''
+
+        BTNode.__init__(self, v, p)
+        self.priority = random.random()
+
+
+class TreapMapNode(TreapNode):
+    '''A TreapNode for a TreapTree in mapping mode, holding a payload.'''
+
+    __slots__ = ('payload',)
+
+    def __init__(self, v, p=None):
+        '''(TreapMapNode, object, TreapMapNode) -> NoneType
+        A new TreapMapNode with key v, no payload, parent p and a random
+        priority.'''
+
+        TreapNode.__init__(self, v, p)
+        self.payload = None
+
+    copy_value = MapNode.copy_value
+
+
+class TreapTree(BSTree):
+    '''A BSTree that is also a heap on random node priorities, which keeps
+    its expected height O(log n) whatever the order of the input. insert
+    splits the subtree where the new node belongs around it, and delete
+    merges the two subtrees of the node it removes, so neither needs
+    rotations or balance bookkeeping beyond the cached heights and
+    sizes. delete_range, split and join split and merge treaps in the same
+    way; the set operations merge the sorted nodes of both treaps in
+    O(m + n) and deal out new priorities.'''
+
+    node_class = TreapNode
+    map_node_class = TreapMapNode
+
+    @classmethod
+    def from_sorted(cls, values, **kwargs):
+        '''(type, iterable) -> TreapTree
+        Return a new perfectly balanced treap holding values, which must be
+        in ascending order, as BSTree.from_sorted does. Priorities are
+        handed out largest first in level order, so the heap holds.'''
+
+        tree = super().from_sorted(values, **kwargs)
+        _deal(tree.root)
+        return tree
+
+    def insert(self, v):
+        '''(TreapTree, object) -> TreapNode
+        Insert a new node with value v into self. Do not duplicate values.
+        Return the node holding v.'''
+
+        priority = random.random()
+        parent, node = None, self.root
+        while node and node.priority > priority:
+            if v == node.value:
+                return node
+            parent = node
+            node = node.left if v < node.value else node.right
+        # the new node goes where node is, unless v is further down
+        found = _search(node, v)
+        if found:
+            return found
+        new = self.node_class(v)
+        new.priority = priority
+        if node and self.counters is not None:
+            self.counters.restructures += 1
+        new.left, new.right = _tsplit(node, v)
+        for child in (new.left, new.right):
+            if child:
+                child.parent = new
+        _update(new)
+        if parent is None:
+            self.root = new
+        elif v < parent.value:
+            parent.set_left(new)
+        else:
+            parent.set_right(new)
+        _retrace(parent)
+        return new
+
+    def delete(self, v):
+        '''(TreapTree, object) -> NoneType
+        Delete the node with value v from self by merging its subtrees.
+        Do nothing if value doesn't exist in self.'''
+
+        node = _search(self.root, v)
+        if node:
+            if node.left and node.right and self.counters is not None:
+                self.counters.restructures += 1
+            _replace_child(self, node.parent, node,
+                           _tmerge(node.left, node.right))
+            _retrace(node.parent)
+
+    def delete_range(self, lo=None, hi=None, inclusive=(True, True),
+                     detach=False):
+        '''(TreapTree, object, object, tuple, bool) -> TreapTree
+        Delete every value between lo and hi, as BSTree.delete_range does,
+        by splitting and merging treaps so that the heap order holds.'''
+
+        lo_inclusive, hi_inclusive = inclusive
+        rest = _take(self)
+        less = more = None
+        if lo is not None:
+            less, low, rest = _tcut(rest, lo)
+            if low and lo_inclusive:
+                rest = _tmerge(low, rest)
+            elif low:
+                less = _tmerge(less, low)
+        if hi is not None:
+            rest, high, more = _tcut(rest, hi)
+            if high and hi_inclusive:
+                rest = _tmerge(rest, high)
+            elif high:
+                more = _tmerge(high, more)
+        self.root = _tmerge(less, more)
+        if detach:
+            return _like(self, rest)
+
+
+class PNode:
+    '''An immutable binary tree node for PersistentBSTree. It has no parent
+    pointer, so one node can be shared by many versions of a tree. ht and
+    size are the height and number of nodes of the subtree rooted at it.'''
+
+    __slots__ = ('value', 'left', 'right', 'ht', 'size')
+
+    monoid = None
+
+    def __init__(self, v, left=None, right=None):
+        '''(PNode, object, PNode, PNode) -> NoneType
+        A new PNode with value v and children left and right.'''
+
+        self.value = v
+        self.left = left
+        self.right = right
+        _update(self)
+
+    def __str__(self):
+        '''(PNode) -> str
+        Return the string representation of self.'''
+
+        return str(self.value)
+
+    def __repr__(self):
+        '''(PNode) -> str
+        Return the internal string representation of self.'''
+
+        return "PNode: {}".format(self.value)
+
+    def is_leaf(self):
+        '''(PNode) -> bool
+        Return True iff self is a leaf node.'''
+
+        return not self.right and not self.left
+
+    def height(self):
+        '''(PNode) -> int
+        Return the height of self.'''
+
+        return self.ht
+
+
+class PersistentBSTree(BSTree):
+    '''An AVL-balanced BSTree whose nodes are never changed once built.
+    insert and delete copy only the O(log n) nodes on the path they change
+    and share the rest, so snapshot() is O(1) and a snapshot keeps seeing
+    the values it was taken with while the tree goes on changing. Reading
+    threads need no locks: a writer only ever replaces the root.
+    delete_range, split, join and the set operations copy paths too, and
+    leave the trees they are given unchanged.'''
+
+    node_class = PNode
+
+    def __init__(self, root=None):
+        '''(PersistentBSTree, PNode) -> NoneType
+        Create a new persistent tree with an optional root.'''
+
+        BSTree.__init__(self, root)
+
+    @classmethod
+    def from_sorted(cls, values):
+        '''(type, iterable) -> PersistentBSTree
+        Return a new perfectly balanced tree holding values, which must be
+        in ascending order, as BSTree.from_sorted does.'''
+
+        unique = _unique_sorted(values)
+        return cls(_pbuild(unique, 0, len(unique)))
+
+    @classmethod
+    def from_iterable(cls, values):
+        '''(type, iterable) -> PersistentBSTree
+        Return a new perfectly balanced tree holding values, in any
+        order.'''
+
+        return cls.from_sorted(sorted(values))
+
+    def snapshot(self):
+        '''(PersistentBSTree) -> PersistentBSTree
+        Return a tree holding the values self holds now, in O(1). Changes
+        to either tree do not show in the other.'''
+
+        return PersistentBSTree(self.root)
+
+    def insert(self, v):
+        '''(PersistentBSTree, object) -> PNode
+        Insert v into self by copying the path to it. Do not duplicate
+        values. Return the node holding v.'''
+
+        self.root = _pinsert(self.root, v)
+        return _search(self.root, v)
+
+    def delete(self, v):
+        '''(PersistentBSTree, object) -> NoneType
+        Delete v from self by copying the path to it. Do nothing if v
+        doesn't exist in self.'''
+
+        self.root = _pdelete(self.root, v)
+
+    def delete_range(self, lo=None, hi=None, inclusive=(True, True),
+                     detach=False):
+        '''(PersistentBSTree, object, object, tuple, bool) -> PersistentBSTree
+        Delete every value between lo and hi, as BSTree.delete_range does,
+        by copying the O(log n) nodes on the paths to lo and hi.'''
+
+        lo_inclusive, hi_inclusive = inclusive
+        rest = self.root
+        less = more = None
+        if lo is not None:
+            less, low, rest = _psplit(rest, lo)
+            if low and lo_inclusive:
+                rest = _pjoin(None, low.value, rest)
+            elif low:
+                less = _pjoin(less, low.value, None)
+        if hi is not None:
+            rest, high, more = _psplit(rest, hi)
+            if high and hi_inclusive:
+                rest = _pjoin(rest, high.value, None)
+            elif high:
+                more = _pjoin(None, high.value, more)
+        self.root = _pjoin2(less, more)
+        if detach:
+            return _like(self, rest)
+
+    def __iter__(self):
+        '''(PersistentBSTree) -> generator
+        Yield the values in this tree in ascending order.'''
+
+        for node in _iter_range(self.root, None, None, (True, True)):
+            yield node.value
+
+    def __reversed__(self):
+        '''(PersistentBSTree) -> generator
+        Yield the values in this tree in descending order.'''
+
+        stack = []
+        node = self.root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.right
+            node = stack.pop()
+            yield node.value
+            node = node.left
+
+    def pre_order(self):
+        '''(PersistentBSTree) -> generator
+        Yield the PNodes of this tree in pre-order.'''
+
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            yield node
+            if node.right:
+                stack.append(node.right)
+            if node.left:
+                stack.append(node.left)
+
+    def post_order(self):
+        '''(PersistentBSTree) -> generator
+        Yield the PNodes of this tree in post-order.'''
+
+        # PNodes have no parent links, so the path is kept on a stack
+        stack = []
+        node, last = self.root, None
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack[-1]
+            if node.right and node.right is not last:
+                node = node.right
+            else:
+                last = stack.pop()
+                yield last
+                node = None
+
+
+## HELPER FUNCTIONS
+
+def _print_tree(root, depth):
+    '''(BTNode, int) -> NoneType
+    Print the left subtree of root, print root preceded by four spaces for
+    every unit of depth, then print the right subtree of root.
+    depth is the depth of root.
+    NOTE: This function is complete.'''
+
+    if root is None:
+        return
+    _print_tree(root.right, depth + 1)
+    print("    " * (depth - 1) + str(root))
+    _print_tree(root.left, depth + 1)
+
+
+def _insert(root, v, node_class):
+    '''(BTNode, obj, type) -> BTNode
+    Insert a new node with value v into BST rooted at root.
+    The new node is made by node_class. Do not allow duplicates.
+    Return the node holding v.
+    NOTE: This function is complete.'''
+
+    while root.value != v:
+        if v < root.value:
+            if not root.left:
+                root.set_left(node_class(v))
+                _retrace(root)
+                return root.left
+            root = root.left
+        else:
+            if not root.right:
+                root.set_right(node_class(v))
+                _retrace(root)
+                return root.right
+            root = root.right
+    return root
+
+
+def _search(root, v):
+    '''(BTNode, object) -> BTNode
+    Return BTNode with value v if it exists in subtree rooted at
+    root. Return None if no such BTNode exists.'''
+
+    while root and root.value != v:
+        if v < root.value:
+            root = root.left
+        else:
+            root = root.right
+    return root
+
+
+def _floor(root, v):
+    '''(BTNode, object) -> BTNode
+    Return the node under root with the greatest value not greater than v,
+    or None.'''
+
+    best = None
+    node = root
+    while node:
+        if v < node.value:
+            node = node.left
+        elif node.value < v:
+            best = node
+            node = node.right
+        else:
+            return node
+    return best
+
+
+def _ceiling(root, v):
+    '''(BTNode, object) -> BTNode
+    Return the node under root with the least value not less than v, or
+    None.'''
+
+    best = None
+    node = root
+    while node:
+        if node.value < v:
+            node = node.right
+        elif v < node.value:
+            best = node
+            node = node.left
+        else:
+            return node
+    return best
+
+
+def _range(root, v_start, v_end):
+    '''(BTNode, object, object) -> list
+    Return an in-order list of the values between v_start and v_end,
+    inclusive, that can be reached from root without passing through a
+    value outside that range.'''
+
+    bt_list = []
+    stack = []
+    while True:
+        while root and v_start <= root.value <= v_end:
+            stack.append(root)
+            root = root.left
+        if not stack:
+            return bt_list
+        root = stack.pop()
+        bt_list.append(root.value)
+        root = root.right
+
+
+def _iter_range(root, lo, hi, inclusive):
+    '''(BTNode, object, object, tuple) -> generator
+    Yield in order the BTNodes in subtree rooted at root whose values lie
+    between lo and hi, as described in BSTree.iter_range.'''
+
+    lo_inclusive, hi_inclusive = inclusive
+    stack = []
+    # stack the nodes at or above lo on the way down to the lower bound
+    while root:
+        if lo is None or lo < root.value or \
+           (lo_inclusive and not root.value < lo):
+            stack.append(root)
+            root = root.left
+        else:
+            root = root.right
+    while stack:
+        root = stack.pop()
+        if hi is not None and \
+           (hi < root.value or (not hi_inclusive and not root.value < hi)):
+            return
+        yield root
+        root = root.right
+        while root:
+            stack.append(root)
+            root = root.left
+
+
+def _count_below(root, v, inclusive):
+    '''(BTNode, object, bool) -> int
+    Return the number of values in subtree rooted at root that are less
+    than v, or less than or equal to v if inclusive.'''
+
+    count = 0
+    while root:
+        if v < root.value or (not inclusive and not root.value < v):
+            root = root.left
+        else:
+            count += _size(root.left) + 1
+            root = root.right
+    return count
+
+
+def _aggregate_range(root, lo, hi, inclusive, monoid):
+    '''(AggNode, object, object, tuple, Monoid) -> object
+    Return the aggregate under monoid of the values in subtree rooted at
+    root that lie between lo and hi, as described in
+    BSTree.aggregate_range.'''
+
+    lo_inclusive, hi_inclusive = inclusive
+    op, measure = monoid.op, monoid.measure
+
+    def below(v):
+        return lo is not None and (v < lo or (not lo_inclusive and
+                                              not lo < v))
+
+    def above(v):
+        return hi is not None and (hi < v or (not hi_inclusive and
+                                              not v < hi))
+
+    # find the highest node in the range; everything in range is below it
+    while root and (below(root.value) or above(root.value)):
+        root = root.right if below(root.value) else root.left
+    if not root:
+        return monoid.identity
+    left = monoid.identity
+    node = root.left
+    while node:
+        if below(node.value):
+            node = node.right
+        else:
+            left = op(op(measure(node), _agg(node.right, monoid)), left)
+            node = node.left
+    right = monoid.identity
+    node = root.right
+    while node:
+        if above(node.value):
+            node = node.left
+        else:
+            right = op(right, op(_agg(node.left, monoid), measure(node)))
+            node = node.right
+    return op(op(left, measure(root)), right)
+
+
+def _delete(root, v):
+    '''(BTNode, object) -> BTNode
+    Delete BTNode with value v from subtree rooted at root.
+    Return root of subtree. Do nothing if value doesn't exist in subtree.'''
+
+    node = _search(root, v)
+    if not node:
+        return root
+    if node.left and node.right:
+        # take the neighbour from the taller side so the tree stays shallow
+        if node.left.ht > node.right.ht:
+            neighbour = in_order_predecessor(node)
+        else:
+            neighbour = in_order_successor(node)
+        node.copy_value(neighbour)
+        node = neighbour
+    child = node.left or node.right
+    parent = node.parent
+    if child:
+        child.parent = parent
+    if node is root:
+        return child
+    if parent.left is node:
+        parent.left = child
+    else:
+        parent.right = child
+    _retrace(parent)
+    return root
+
+
+def _unique_sorted(values):
+    '''(iterable) -> list
+    Return the ascending values as a list with repeated values dropped.
+    Raise ValueError if values are out of order.'''
+
+    values = list(values)
+    unique = values[:1]
+    for v in values[1:]:
+        if v < unique[-1]:
+            raise ValueError('values are not sorted')
+        if unique[-1] < v:
+            unique.append(v)
+    return unique
+
+
+def _build(values, lo, hi, parent, node_class=BTNode):
+    '''(list, int, int, BTNode, type) -> BTNode
+    Return the root of a perfectly balanced subtree of node_class nodes
+    holding the sorted values[lo:hi], with parent as the parent of its
+    root. Return None if the slice is empty.'''
+
+    if lo >= hi:
+        return None
+    mid = (lo + hi) // 2
+    node = node_class(values[mid], parent)
+    node.left = _build(values, lo, mid, node, node_class)
+    node.right = _build(values, mid + 1, hi, node, node_class)
+    _update(node)
+    return node
+
+
+## NEIGHBOURS FUNCTIONS
+
+def in_order_predecessor(node):
+    '''(BTNode) -> BTNode
+    Return the in-order predecessor of node.
+    Return None if node is leftmost.'''
+
+    if node.left:
+        node = node.left
+        while node.right:
+            node = node.right
+        return node
+    else:
+        while not node.is_right_child():
+            if node.parent == None:
+                return None
+            node = node.parent
+        if node.is_right_child():
+            return node.parent
+        else:
+            return node.parent.parent
+
+def in_order_successor(node):
+    '''(BTNode) -> BTNode
+    Return the in-order successor of node.
+    Return None if node is rightmost.'''
+
+    if node.right:
+        node = node.right
+        while node.left:
+            node = node.left
+        return node
+    else:
+        while not node.is_left_child():
+            if node.parent == None:
+                return None
+            node = node.parent
+        if node.is_left_child():
+            return node.parent
+        else:
+            return node.parent.parent
+
+
+## TRAVERSAL FUNCTIONS
+# These follow parent links instead of keeping a stack, so each step is
+# O(1) amortized and a whole traversal needs O(1) extra memory.
+
+def _leftmost(node):
+    '''(BTNode) -> BTNode
+    Return the leftmost node of subtree rooted at node, or None if node
+    is None.'''
+
+    if node:
+        while node.left:
+            node = node.left
+    return node
+
+
+def _rightmost(node):
+    '''(BTNode) -> BTNode
+    Return the rightmost node of subtree rooted at node, or None if node
+    is None.'''
+
+    if node:
+        while node.right:
+            node = node.right
+    return node
+
+
+def _successor(node):
+    '''(BTNode) -> BTNode
+    Return the in-order successor of node, or None if node is rightmost.'''
+
+    if node.right:
+        return _leftmost(node.right)
+    parent = node.parent
+    while parent and parent.right is node:
+        node = parent
+        parent = node.parent
+    return parent
+
+
+def _predecessor(node):
+    '''(BTNode) -> BTNode
+    Return the in-order predecessor of node, or None if node is leftmost.'''
+
+    if node.left:
+        return _rightmost(node.left)
+    parent = node.parent
+    while parent and parent.left is node:
+        node = parent
+        parent = node.parent
+    return parent
+
+
+def _items(root):
+    '''(MapNode) -> generator
+    Yield the (key, payload) pairs of subtree rooted at root in order.'''
+
+    node = _leftmost(root)
+    while node:
+        yield node.value, node.payload
+        node = _successor(node)
+
+
+def _pre_order(root):
+    '''(BTNode) -> generator
+    Yield the nodes of subtree rooted at root in pre-order.'''
+
+    node = root
+    while node:
+        yield node
+        if node.left:
+            node = node.left
+        elif node.right:
+            node = node.right
+        else:
+            # climb until coming up from a left child with a right sibling
+            while node is not root:
+                parent = node.parent
+                if parent.left is node and parent.right:
+                    node = parent.right
+                    break
+                node = parent
+            else:
+                return
+
+
+def _first_leaf(node):
+    '''(BTNode) -> BTNode
+    Return the first node of subtree rooted at node in post-order.'''
+
+    while True:
+        if node.left:
+            node = node.left
+        elif node.right:
+            node = node.right
+        else:
+            return node
+
+
+def _post_order(root):
+    '''(BTNode) -> generator
+    Yield the nodes of subtree rooted at root in post-order.'''
+
+    if not root:
+        return
+    node = _first_leaf(root)
+    while True:
+        yield node
+        if node is root:
+            return
+        parent = node.parent
+        if parent.left is node and parent.right:
+            node = _first_leaf(parent.right)
+        else:
+            node = parent
+
+
+def _level_order(root):
+    '''(BTNode) -> generator
+    Yield the nodes of subtree rooted at root level by level.'''
+
+    queue = deque([root] if root else [])
+    while queue:
+        node = queue.popleft()
+        yield node
+        if node.left:
+            queue.append(node.left)
+        if node.right:
+            queue.append(node.right)
+
+
+## HEIGHT AND BALANCING FUNCTIONS
+
+def _ht(node):
+    '''(BTNode) -> int
+    Return the cached height of node, or 0 if node is None.'''
+
+    return node.ht if node else 0
+
+
+def _size(node):
+    '''(BTNode) -> int
+    Return the cached size of node, or 0 if node is None.'''
+
+    return node.size if node else 0
+
+
+def _agg(node, monoid):
+    '''(AggNode, Monoid) -> object
+    Return the cached aggregate of node, or the identity of monoid if node
+    is None.'''
+
+    return node.agg if node else monoid.identity
+
+
+def _aggregate(node, monoid):
+    '''(AggNode, Monoid) -> NoneType
+    Recompute the cached aggregate of node from its children.'''
+
+    op = monoid.op
+    node.agg = op(op(_agg(node.left, monoid), monoid.measure(node)),
+                  _agg(node.right, monoid))
+
+
+def _update(node):
+    '''(BTNode) -> NoneType
+    Recompute the cached height, size and aggregate of node from its
+    children.'''
+
+    left, right = node.left, node.right
+    left_ht = left.ht if left else 0
+    right_ht = right.ht if right else 0
+    node.ht = 1 + (left_ht if left_ht > right_ht else right_ht)
+    node.size = 1 + (left.size if left else 0) + (right.size if right else 0)
+    if node.monoid:
+        _aggregate(node, node.monoid)
+
+
+def _retrace(node):
+    '''(BTNode) -> NoneType
+    Refresh cached heights, sizes and aggregates from node up to the
+    root.'''
+
+    while node:
+        left, right = node.left, node.right
+        if left:
+            if right:
+                node.ht = 1 + (left.ht if left.ht > right.ht else right.ht)
+                node.size = 1 + left.size + right.size
+            else:
+                node.ht = 1 + left.ht
+                node.size = 1 + left.size
+        elif right:
+            node.ht = 1 + right.ht
+            node.size = 1 + right.size
+        else:
+            node.ht = node.size = 1
+        if node.monoid:
+            _aggregate(node, node.monoid)
+        node = node.parent
+
+
+def _replace_child(tree, parent, old, new):
+    '''(BSTree, BTNode, BTNode, BTNode) -> NoneType
+    Put new where old was under parent, or at the root of tree if parent
+    is None. new may be None.'''
+
+    if new:
+        new.parent = parent
+    if parent is None:
+        tree.root = new
+    elif parent.left is old:
+        parent.left = new
+    else:
+        parent.right = new
+
+
+def _rotate_left(tree, x):
+    '''(BSTree, BTNode) -> BTNode
+    Rotate the subtree rooted at x to the left, so that the right child of x
+    takes its place. Keep parent links and heights correct and return the
+    new root of the subtree.'''
+
+    if tree.counters is not None:
+        tree.counters.restructures += 1
+    y = x.right
+    x.right = y.left
+    if y.left:
+        y.left.parent = x
+    _replace_child(tree, x.parent, x, y)
+    y.left = x
+    x.parent = y
+    _update(x)
+    _update(y)
+    return y
+
+
+def _rotate_right(tree, x):
+    '''(BSTree, BTNode) -> BTNode
+    Rotate the subtree rooted at x to the right, so that the left child of x
+    takes its place. Keep parent links and heights correct and return the
+    new root of the subtree.'''
+
+    if tree.counters is not None:
+        tree.counters.restructures += 1
+    y = x.left
+    x.left = y.right
+    if y.right:
+        y.right.parent = x
+    _replace_child(tree, x.parent, x, y)
+    y.right = x
+    x.parent = y
+    _update(x)
+    _update(y)
+    return y
+
+
+def _rebalance(tree, node):
+    '''(AVLTree, BTNode) -> NoneType
+    Walk from node up to the root of tree, refreshing cached heights and
+    sizes and rotating wherever the AVL balance condition is broken. Stop
+    checking balance once a node is balanced and its height has not
+    changed.'''
+
+    while node:
+        ht = node.ht
+        _update(node)
+        balance = _ht(node.left) - _ht(node.right)
+        if balance > 1:
+            if _ht(node.left.left) < _ht(node.left.right):
+                _rotate_left(tree, node.left)
+            node = _rotate_right(tree, node)
+        elif balance < -1:
+            if _ht(node.right.right) < _ht(node.right.left):
+                _rotate_right(tree, node.right)
+            node = _rotate_left(tree, node)
+        elif node.ht == ht:
+            # no height above node can have changed, only sizes
+            _retrace(node.parent)
+            return
+        node = node.parent
+
+
+def _splay(tree, x):
+    '''(BSTree, BTNode) -> NoneType
+    Rotate x up to the root of tree, two levels at a time where it can,
+    keeping parent links and cached fields correct. The rotations are
+    inlined and x is refreshed only once, at the end.'''
+
+    if tree.counters is not None:
+        # one rotation per level x climbs
+        tree.counters.restructures += x.depth() - 1
+    p = x.parent
+    while p:
+        g = p.parent
+        if g is None:
+            # zig: x is a child of the root
+            if p.left is x:
+                b = p.left = x.right
+                x.right = p
+            else:
+                b = p.right = x.left
+                x.left = p
+            if b:
+                b.parent = p
+            p.parent = x
+            _update(p)
+            x.parent = None
+            tree.root = x
+            break
+        top = g.parent
+        if g.left is p:
+            if p.left is x:
+                # zig-zig: x, p, g become a right-leaning chain
+                b = p.left = x.right
+                c = g.left = p.right
+                x.right = p
+                p.right = g
+                g.parent = p
+            else:
+                # zig-zag: x takes p and g as its children
+                b = p.right = x.left
+                c = g.left = x.right
+                x.left = p
+                x.right = g
+                g.parent = x
+        else:
+            if p.right is x:
+                b = p.right = x.left
+                c = g.right = p.left
+                x.left = p
+                p.left = g
+                g.parent = p
+            else:
+                b = p.left = x.right
+                c = g.right = x.left
+                x.right = p
+                x.left = g
+                g.parent = x
+        if b:
+            b.parent = p
+        if c:
+            c.parent = g
+        p.parent = x
+        # g is below p in a zig-zig, so refresh it first
+        _update(g)
+        _update(p)
+        x.parent = top
+        if top is None:
+            tree.root = x
+        elif top.left is g:
+            top.left = x
+        else:
+            top.right = x
+        p = top
+    _update(x)
+
+
+def _relink(nodes, lo, hi, parent, update=_update):
+    '''(list, int, int, BTNode, function) -> BTNode
+    Return the root of a perfectly balanced subtree made of the sorted
+    nodes[lo:hi], with parent as the parent of its root, calling update
+    on each node once its children are linked. Return None if the slice
+    is empty.'''
+
+    if lo >= hi:
+        return None
+    mid = (lo + hi) // 2
+    node = nodes[mid]
+    node.parent = parent
+    node.left = _relink(nodes, lo, mid, node, update)
+    node.right = _relink(nodes, mid + 1, hi, node, update)
+    update(node)
+    return node
+
+
+def _remove(tree, node):
+    '''(BSTree, BTNode) -> BTNode
+    Unlink node from tree. If node has two children, its in-order successor
+    is unlinked instead and its value (and payload) moved into node.
+    Return the parent of the unlinked node, which is None if the root was
+    unlinked.'''
+
+    if node.left and node.right:
+        succ = node.right
+        while succ.left:
+            succ = succ.left
+        node.copy_value(succ)
+        node = succ
+    parent = node.parent
+    _replace_child(tree, parent, node, node.left or node.right)
+    return parent
+
+
+## SPLIT, JOIN AND SET OPERATIONS
+# These relink the nodes of the trees they are given instead of copying
+# them, so their arguments are left empty. Balance is restored with the
+# cached heights, so on AVL trees join is O(|height difference|), split
+# is O(log n) and union, intersection and difference are
+# O(m log(n/m + 1)) for trees of sizes m <= n. The set operations recurse
+# once per level, so on trees much higher than log n they merge the
+# sorted nodes of both trees in O(m + n) instead, comparing every value
+# before either tree is changed. PersistentBSTrees are handed to the
+# path-copying versions below and left unchanged.
+
+def _like(tree, root):
+    '''(BSTree, BTNode) -> BSTree
+    Return a new tree of the same class and mode as tree, with root. The
+    new tree is neither instrumented nor timed, even if tree is.'''
+
+    # the class tree had before instrument or add_timing_hook changed it
+    cls = type(tree).__dict__.get('plain_class', type(tree))
+    if isinstance(tree, PersistentBSTree):
+        return cls(root)
+    if root:
+        root.parent = None
+    return cls(root, tree.monoid, tree.mapping)
+
+
+def _take(tree):
+    '''(BSTree) -> BTNode
+    Empty tree and return its former root, detached from any parent.'''
+
+    root, tree.root = tree.root, None
+    if root:
+        root.parent = None
+    if isinstance(tree, ScapegoatTree):
+        tree.size = tree.max_size = 0
+    return root
+
+
+def _detach(node):
+    '''(BTNode) -> tuple of BTNode
+    Cut node off from its children and return them, detached.'''
+
+    left, right = node.left, node.right
+    node.left = node.right = node.parent = None
+    _update(node)
+    if left:
+        left.parent = None
+    if right:
+        right.parent = None
+    return left, right
+
+
+def _join(left, mid, right):
+    '''(BTNode, BTNode, BTNode) -> BTNode
+    Return the root of a balanced subtree holding the subtree left, the
+    detached node mid and the subtree right, where every value in left is
+    less than mid's and every value in right greater. left or right may
+    be None.'''
+
+    holder = BSTree()
+    if _ht(left) > _ht(right) + 1:
+        # hang mid off the right spine of left where the heights match
+        holder.root = node = left
+        while _ht(node.right) > _ht(right) + 1:
+            node = node.right
+        mid.left = node.right
+        mid.right = right
+        node.set_right(mid)
+    elif _ht(right) > _ht(left) + 1:
+        holder.root = node = right
+        while _ht(node.left) > _ht(left) + 1:
+            node = node.left
+        mid.left = left
+        mid.right = node.left
+        node.set_left(mid)
+    else:
+        holder.root = mid
+        mid.left, mid.right, mid.parent = left, right, None
+    if mid.left:
+        mid.left.parent = mid
+    if mid.right:
+        mid.right.parent = mid
+    _update(mid)
+    _rebalance(holder, mid.parent)
+    return holder.root
+
+
+def _join2(left, right):
+    '''(BTNode, BTNode) -> BTNode
+    Return the root of a balanced subtree holding the subtrees left and
+    right, where every value in left is less than every value in right.'''
+
+    if not left:
+        return right
+    if not right:
+        return left
+    holder = BSTree(left)
+    mid = _rightmost(left)
+    _rebalance(holder, _remove(holder, mid))
+    mid.left = mid.right = mid.parent = None
+    return _join(holder.root, mid, right)
+
+
+def _split(root, v):
+    '''(BTNode, object) -> tuple
+    Split the subtree rooted at root into the subtree of values less than
+    v, the detached node holding v (or None) and the subtree of values
+    greater than v.'''
+
+    lefts = []
+    rights = []
+    found = None
+    while root:
+        left, right = _detach(root)
+        if v < root.value:
+            rights.append((root, right))
+            root = left
+        elif root.value < v:
+            lefts.append((left, root))
+            root = right
+        else:
+            found = root
+            break
+    if found:
+        less, more = left, right
+    else:
+        less = more = None
+    for left, mid in reversed(lefts):
+        less = _join(left, mid, less)
+    for mid, right in reversed(rights):
+        more = _join(more, mid, right)
+    return less, found, more
+
+
+def _union(a, b):
+    '''(BTNode, BTNode) -> BTNode
+    Return the root of the union of subtrees a and b, keeping the nodes of
+    a where both hold a value.'''
+
+    if not a:
+        return b
+    if not b:
+        return a
+    less, found, more = _split(b, a.value)
+    left, right = _detach(a)
+    return _join(_union(left, less), a, _union(right, more))
+
+
+def _intersection(a, b):
+    '''(BTNode, BTNode) -> BTNode
+    Return the root of the intersection of subtrees a and b, keeping the
+    nodes of a.'''
+
+    if not a or not b:
+        return None
+    less, found, more = _split(b, a.value)
+    left, right = _detach(a)
+    left = _intersection(left, less)
+    right = _intersection(right, more)
+    if found:
+        return _join(left, a, right)
+    return _join2(left, right)
+
+
+def _difference(a, b):
+    '''(BTNode, BTNode) -> BTNode
+    Return the root of the subtree of values of a that are not in b.'''
+
+    if not a or not b:
+        return a
+    less, found, more = _split(a, b.value)
+    left, right = _detach(b)
+    return _join2(_difference(less, left), _difference(more, right))
+
+
+def _kind(*trees):
+    '''(BSTree, ...) -> type
+    Return PersistentBSTree if trees are all persistent, TreapTree if they
+    are all treaps, ScapegoatTree if they are all scapegoat trees, and
+    BSTree if they are all trees balanced, if at all, by their heights.
+    Raise TypeError if they are not all of one kind, before any of them is
+    changed.'''
+
+    kinds = set()
+    for tree in trees:
+        for kind in (PersistentBSTree, TreapTree, ScapegoatTree, BSTree):
+            if isinstance(tree, kind):
+                kinds.add(kind)
+                break
+        else:
+            raise TypeError('cannot combine a {}, which is not a BSTree'
+                            .format(type(tree).__name__))
+    if len(kinds) > 1:
+        raise TypeError('cannot combine a {} with a {}'.format(
+            *sorted(kind.__name__ for kind in kinds)))
+    return kinds.pop()
+
+
+def _shallow(root):
+    '''(BTNode) -> bool
+    Return True iff the subtree rooted at root is no higher than about
+    2 log2 of its size, as any balanced tree is, so that recursing once
+    per level of it is safe.'''
+
+    return _ht(root) <= 2 * (_size(root) + 1).bit_length()
+
+
+def _nodes(root):
+    '''(BTNode) -> list of BTNode
+    Return the nodes of the subtree rooted at root in order.'''
+
+    nodes = []
+    node = _leftmost(root)
+    while node:
+        nodes.append(node)
+        node = _successor(node)
+    return nodes
+
+
+def _merge(a, b, only_a, both, only_b):
+    '''(list, list, bool, bool, bool) -> list
+    Merge the sorted lists of nodes a and b. Keep the nodes of a whose
+    values are not in b if only_a is True, the nodes of a whose values are
+    in b if both is True, and the nodes of b whose values are not in a if
+    only_b is True.'''
+
+    nodes = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i].value < b[j].value:
+            if only_a:
+                nodes.append(a[i])
+            i += 1
+        elif b[j].value < a[i].value:
+            if only_b:
+                nodes.append(b[j])
+            j += 1
+        else:
+            if both:
+                nodes.append(a[i])
+            i += 1
+            j += 1
+    if only_a:
+        nodes.extend(a[i:])
+    if only_b:
+        nodes.extend(b[j:])
+    return nodes
+
+
+def _set_operation(a, b, recurse, only_a, both, only_b):
+    '''(BSTree, BSTree, function, bool, bool, bool) -> BSTree
+    Return a tree of the result of recurse on the roots of a and b, or, if
+    either tree is too high to recurse on, of the nodes _merge keeps with
+    only_a, both and only_b. a and b are left empty. Treaps and scapegoat
+    trees are always merged, as recurse would break the heap order of a
+    treap and needs the heights a scapegoat tree does not keep; merged
+    treap nodes are given new priorities.'''
+
+    treap = isinstance(a, TreapTree)
+    lean = isinstance(a, ScapegoatTree)
+    if not (treap or lean) and _shallow(a.root) and _shallow(b.root):
+        return _like(a, recurse(_take(a), _take(b)))
+    nodes = _merge(_nodes(a.root), _nodes(b.root), only_a, both, only_b)
+    _take(a)
+    _take(b)
+    root = _relink(nodes, 0, len(nodes), None, _refresh if lean else _update)
+    if treap:
+        _deal(root)
+    return _like(a, root)
+
+
+def split(tree, v):
+    '''(BSTree, object) -> tuple
+    Split tree into a tree of the values less than v, the node holding v
+    (None if v is not in tree) and a tree of the values greater than v.
+    tree is left empty, unless it is a PersistentBSTree.'''
+
+    kind = _kind(tree)
+    if kind is PersistentBSTree:
+        less, found, more = _psplit(tree.root, v)
+    elif kind is TreapTree:
+        less, found, more = _tcut(_take(tree), v)
+    elif kind is ScapegoatTree:
+        less, found, more = _sgsplit(_take(tree), v)
+    else:
+        less, found, more = _split(_take(tree), v)
+    return _like(tree, less), found, _like(tree, more)
+
+
+def join(left, v, right):
+    '''(BSTree, object, BSTree) -> BSTree
+    Return a tree holding the values of left, v and the values of right.
+    Every value in left must be less than v and every value in right
+    greater. left and right are left empty, unless they are
+    PersistentBSTrees.'''
+
+    kind = _kind(left, right)
+    if kind is PersistentBSTree:
+        return _like(left, _pjoin(left.root, v, right.root))
+    if kind is TreapTree:
+        root = _tmerge(_tmerge(_take(left), left.node_class(v)),
+                       _take(right))
+    elif kind is ScapegoatTree:
+        nodes = _nodes(_take(left)) + [left.node_class(v)] + \
+            _nodes(_take(right))
+        root = _relink(nodes, 0, len(nodes), None, _refresh)
+    else:
+        root = _join(_take(left), left.node_class(v), _take(right))
+    return _like(left, root)
+
+
+def union(a, b):
+    '''(BSTree, BSTree) -> BSTree
+    Return a tree of the values in a or b. Where both hold a value, the
+    node from a is kept. a and b are left empty, unless they are
+    PersistentBSTrees.'''
+
+    if _kind(a, b) is PersistentBSTree:
+        return _like(a, _punion(a.root, b.root))
+    return _set_operation(a, b, _union, True, True, True)
+
+
+def intersection(a, b):
+    '''(BSTree, BSTree) -> BSTree
+    Return a tree of the values in both a and b, made of nodes from a.
+    a and b are left empty, unless they are PersistentBSTrees.'''
+
+    if _kind(a, b) is PersistentBSTree:
+        return _like(a, _pintersection(a.root, b.root))
+    return _set_operation(a, b, _intersection, False, True, False)
+
+
+def difference(a, b):
+    '''(BSTree, BSTree) -> BSTree
+    Return a tree of the values in a but not in b. a and b are left
+    empty, unless they are PersistentBSTrees.'''
+
+    if _kind(a, b) is PersistentBSTree:
+        return _like(a, _pdifference(a.root, b.root))
+    return _set_operation(a, b, _difference, True, False, False)
+
+
+## SCAPEGOAT FUNCTIONS
+# ScapegoatNodes cache no heights or sizes, only aggregates when their tree
+# has a monoid, so these count by walking and refresh only aggregates.
+
+def _count(node):
+    '''(ScapegoatNode) -> int
+    Return the number of nodes in the subtree rooted at node, walking
+    it.'''
+
+    count = 0
+    stack = [node] if node else []
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node.left:
+            stack.append(node.left)
+        if node.right:
+            stack.append(node.right)
+    return count
+
+
+def _height(node):
+    '''(ScapegoatNode) -> int
+    Return the height of the subtree rooted at node, or 0 if node is None,
+    walking it level by level.'''
+
+    height = 0
+    level = [node] if node else []
+    while level:
+        height += 1
+        level = [child for node in level for child in (node.left, node.right)
+                 if child]
+    return height
+
+
+def _refresh(node):
+    '''(ScapegoatNode) -> NoneType
+    Recompute the cached aggregate of node from its children, if its tree
+    has a monoid.'''
+
+    if node.monoid:
+        _aggregate(node, node.monoid)
+
+
+def _reaggregate(node):
+    '''(ScapegoatNode) -> NoneType
+    Refresh cached aggregates from node up to the root, if its tree has a
+    monoid.'''
+
+    if node and node.monoid:
+        while node:
+            _aggregate(node, node.monoid)
+            node = node.parent
+
+
+def _rebuild(tree, node):
+    '''(ScapegoatTree, ScapegoatNode) -> NoneType
+    Relink the nodes of the subtree rooted at node into a perfectly
+    balanced subtree in its place, in O(size), and refresh the cached
+    aggregates above it.'''
+
+    if node is None:
+        return
+    if tree.counters is not None:
+        tree.counters.restructures += 1
+    parent, old = node.parent, node
+    nodes = []
+    stack = []
+    while stack or node:
+        if node:
+            stack.append(node)
+            node = node.left
+        else:
+            node = stack.pop()
+            nodes.append(node)
+            node = node.right
+    root = _relink(nodes, 0, len(nodes), parent, _refresh)
+    _replace_child(tree, parent, old, root)
+    _reaggregate(parent)
+
+
+def _sgsplit(root, v):
+    '''(ScapegoatNode, object) -> tuple
+    Split the scapegoat tree rooted at root as _split does, relinking the
+    nodes less than v and those greater than v into perfectly balanced
+    subtrees in O(n).'''
+
+    nodes = _nodes(root)
+    lo, hi = 0, len(nodes)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if nodes[mid].value < v:
+            lo = mid + 1
+        else:
+            hi = mid
+    found = None
+    end = lo
+    if lo < len(nodes) and not v < nodes[lo].value:
+        found = nodes[lo]
+        end = lo + 1
+    less = _relink(nodes, 0, lo, None, _refresh)
+    more = _relink(nodes, end, len(nodes), None, _refresh)
+    if found:
+        found.left = found.right = found.parent = None
+        _refresh(found)
+    return less, found, more
+
+
+## TREAP FUNCTIONS
+
+def _tsplit(node, v):
+    '''(TreapNode, object) -> tuple of TreapNode
+    Split the subtree rooted at node, which does not hold v, into the roots
+    of two treaps holding its values less than v and greater than v. The
+    roots have no parents.'''
+
+    less = more = None
+    # the nodes whose right (left) child is the next node less (greater)
+    # than v to be found
+    less_hook = more_hook = None
+    path = []
+    while node:
+        path.append(node)
+        if node.value < v:
+            if less_hook:
+                less_hook.set_right(node)
+            else:
+                less, node.parent = node, None
+            less_hook = node
+            node = node.right
+        else:
+            if more_hook:
+                more_hook.set_left(node)
+            else:
+                more, node.parent = node, None
+            more_hook = node
+            node = node.left
+    if less_hook:
+        less_hook.right = None
+    if more_hook:
+        more_hook.left = None
+    for node in reversed(path):
+        _update(node)
+    return less, more
+
+
+def _tmerge(a, b):
+    '''(TreapNode, TreapNode) -> TreapNode
+    Return the root of a treap holding the values of the treaps rooted at
+    a and b, where every value under a is less than every value under b.
+    The root has no parent.'''
+
+    if not (a and b):
+        root = a or b
+        if root:
+            root.parent = None
+        return root
+    root = hook = None
+    path = []
+    while a and b:
+        # the node of higher priority goes on top; if it is a, its right
+        # subtree is merged with b below it, and if it is b, a is merged
+        # with its left subtree
+        if a.priority > b.priority:
+            top, a = a, a.right
+        else:
+            top, b = b, b.left
+        if hook is None:
+            root, top.parent = top, None
+        elif top.value < hook.value:
+            hook.set_left(top)
+        else:
+            hook.set_right(top)
+        hook = top
+        path.append(top)
+    rest = a or b
+    if rest.value < hook.value:
+        hook.set_left(rest)
+    else:
+        hook.set_right(rest)
+    for node in reversed(path):
+        _update(node)
+    return root
+
+
+def _tcut(root, v):
+    '''(TreapNode, object) -> tuple
+    Split the treap rooted at root as _split does, into the treap of
+    values less than v, the detached node holding v (or None) and the
+    treap of values greater than v.'''
+
+    found = _search(root, v)
+    if found:
+        # merge the subtrees of found in its place, as delete does
+        holder = BSTree(root)
+        parent = found.parent
+        _replace_child(holder, parent, found, _tmerge(found.left, found.right))
+        _retrace(parent)
+        root = holder.root
+        found.left = found.right = found.parent = None
+        _update(found)
+    less, more = _tsplit(root, v)
+    return less, found, more
+
+
+def _deal(root):
+    '''(TreapNode) -> NoneType
+    Give the nodes of the subtree rooted at root new random priorities,
+    largest first in level order, so that it is a heap on them whatever
+    its shape.'''
+
+    nodes = list(_level_order(root))
+    priorities = sorted((random.random() for node in nodes), reverse=True)
+    for node, priority in zip(nodes, priorities):
+        node.priority = priority
+
+
+## PATH-COPYING FUNCTIONS
+# These never change a PNode; they return the root of a new version that
+# shares every subtree the change did not touch.
+
+def _pbuild(values, lo, hi):
+    '''(list, int, int) -> PNode
+    Return the root of a perfectly balanced subtree of PNodes holding the
+    sorted values[lo:hi], or None if the slice is empty.'''
+
+    if lo >= hi:
+        return None
+    mid = (lo + hi) // 2
+    return PNode(values[mid], _pbuild(values, lo, mid),
+                 _pbuild(values, mid + 1, hi))
+
+
+def _pbalance(v, left, right):
+    '''(object, PNode, PNode) -> PNode
+    Return a new AVL-balanced subtree holding left, v and right, where the
+    heights of left and right differ by at most two.'''
+
+    if _ht(left) > _ht(right) + 1:
+        if _ht(left.left) >= _ht(left.right):
+            return PNode(left.value, left.left, PNode(v, left.right, right))
+        inner = left.right
+        return PNode(inner.value, PNode(left.value, left.left, inner.left),
+                     PNode(v, inner.right, right))
+    if _ht(right) > _ht(left) + 1:
+        if _ht(right.right) >= _ht(right.left):
+            return PNode(right.value, PNode(v, left, right.left), right.right)
+        inner = right.left
+        return PNode(inner.value, PNode(v, left, inner.left),
+                     PNode(right.value, inner.right, right.right))
+    return PNode(v, left, right)
+
+
+def _pinsert(node, v):
+    '''(PNode, object) -> PNode
+    Return the root of a version of subtree node that also holds v.
+    Return node itself if it already holds v.'''
+
+    if not node:
+        return PNode(v)
+    if v < node.value:
+        left = _pinsert(node.left, v)
+        if left is node.left:
+            return node
+        return _pbalance(node.value, left, node.right)
+    if node.value < v:
+        right = _pinsert(node.right, v)
+        if right is node.right:
+            return node
+        return _pbalance(node.value, node.left, right)
+    return node
+
+
+def _pdelete_min(node):
+    '''(PNode) -> tuple
+    Return the root of a version of subtree node without its smallest
+    value, and that value.'''
+
+    if not node.left:
+        return node.right, node.value
+    left, v = _pdelete_min(node.left)
+    return _pbalance(node.value, left, node.right), v
+
+
+def _pdelete(node, v):
+    '''(PNode, object) -> PNode
+    Return the root of a version of subtree node without v. Return node
+    itself if it does not hold v.'''
+
+    if not node:
+        return None
+    if v < node.value:
+        left = _pdelete(node.left, v)
+        if left is node.left:
+            return node
+        return _pbalance(node.value, left, node.right)
+    if node.value < v:
+        right = _pdelete(node.right, v)
+        if right is node.right:
+            return node
+        return _pbalance(node.value, node.left, right)
+    if not node.left:
+        return node.right
+    if not node.right:
+        return node.left
+    right, successor = _pdelete_min(node.right)
+    return _pbalance(successor, node.left, right)
+
+
+def _pjoin(left, v, right):
+    '''(PNode, object, PNode) -> PNode
+    Return the root of a new AVL-balanced subtree holding left, v and
+    right, where every value in left is less than v and every value in
+    right greater, copying only the spine of the higher of left and
+    right.'''
+
+    if _ht(left) > _ht(right) + 1:
+        return _pbalance(left.value, left.left, _pjoin(left.right, v, right))
+    if _ht(right) > _ht(left) + 1:
+        return _pbalance(right.value, _pjoin(left, v, right.left),
+                         right.right)
+    return PNode(v, left, right)
+
+
+def _pjoin2(left, right):
+    '''(PNode, PNode) -> PNode
+    Return the root of a new subtree holding left and right, where every
+    value in left is less than every value in right.'''
+
+    if not right:
+        return left
+    right, v = _pdelete_min(right)
+    return _pjoin(left, v, right)
+
+
+def _psplit(node, v):
+    '''(PNode, object) -> tuple
+    Return the roots of new subtrees of the values under node less than v
+    and greater than v, with the node holding v (or None) between them.'''
+
+    if not node:
+        return None, None, None
+    if v < node.value:
+        less, found, more = _psplit(node.left, v)
+        return less, found, _pjoin(more, node.value, node.right)
+    if node.value < v:
+        less, found, more = _psplit(node.right, v)
+        return _pjoin(node.left, node.value, less), found, more
+    return node.left, node, node.right
+
+
+def _punion(a, b):
+    '''(PNode, PNode) -> PNode
+    Return the root of a new subtree of the values under a or b.'''
+
+    if not a:
+        return b
+    if not b:
+        return a
+    less, found, more = _psplit(b, a.value)
+    return _pjoin(_punion(a.left, less), a.value, _punion(a.right, more))
+
+
+def _pintersection(a, b):
+    '''(PNode, PNode) -> PNode
+    Return the root of a new subtree of the values under both a and b.'''
+
+    if not a or not b:
+        return None
+    less, found, more = _psplit(b, a.value)
+    left = _pintersection(a.left, less)
+    right = _pintersection(a.right, more)
+    if found:
+        return _pjoin(left, a.value, right)
+    return _pjoin2(left, right)
+
+
+def _pdifference(a, b):
+    '''(PNode, PNode) -> PNode
+    Return the root of a new subtree of the values under a but not b.'''
+
+    if not a or not b:
+        return a
+    less, found, more = _psplit(a, b.value)
+    return _pjoin2(_pdifference(less, b.left), _pdifference(more, b.right))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,264 @@
+'''
+    Array-backed Binary Search Tree
+
+    The ArrayBSTree class stores its nodes as integer indices into parallel
+    arrays of keys, left children, right children and parents instead of as
+    BTNode objects. Slots freed by delete are chained into a free list and
+    reused by insert. This avoids one Python object per value and leaves the
+    garbage collector nothing to traverse but a handful of arrays.
+
+    ArrayNode handles returned by search behave like BTNodes, so they can be
+    passed to in_order_predecessor and in_order_successor.
+
+    bst_array.py
+'''
+
+
+from array import array
+from bst import BTNode
+
+# index that stands for a missing child, parent or free slot
+NIL = -1
+
+
+class ArrayNode:
+    '''A handle on one slot of an ArrayBSTree. It has the same value, left,
+    right and parent attributes as a BTNode, looked up in the arrays of the
+    tree on every access.'''
+
+    __slots__ = ('tree', 'index')
+
+    def __init__(self, tree, index):
+        '''(ArrayNode, ArrayBSTree, int) -> NoneType
+        A new handle on slot index of tree.'''
+
+        self.tree = tree
+        self.index = index
+
+    @property
+    def value(self):
+        '''(ArrayNode) -> object
+        Return the value stored in this slot.'''
+
+        return self.tree.keys[self.index]
+
+    @property
+    def left(self):
+        '''(ArrayNode) -> ArrayNode
+        Return a handle on the left child, or None.'''
+
+        return self.tree._node(self.tree.lefts[self.index])
+
+    @property
+    def right(self):
+        '''(ArrayNode) -> ArrayNode
+        Return a handle on the right child, or None.'''
+
+        return self.tree._node(self.tree.rights[self.index])
+
+    @property
+    def parent(self):
+        '''(ArrayNode) -> ArrayNode
+        Return a handle on the parent, or None.'''
+
+        return self.tree._node(self.tree.parents[self.index])
+
+    def __eq__(self, other):
+        '''(ArrayNode, object) -> bool
+        Return True iff other is a handle on the same slot of the same tree.'''
+
+        return (isinstance(other, ArrayNode) and self.tree is other.tree
+                and self.index == other.index)
+
+    def __hash__(self):
+        '''(ArrayNode) -> int
+        Return a hash consistent with __eq__.'''
+
+        return hash((id(self.tree), self.index))
+
+    def __repr__(self):
+        '''(ArrayNode) -> str
+        Return the internal string representation of self.'''
+
+        return "ArrayNode: {}".format(self.value)
+
+    def height(self):
+        '''(ArrayNode) -> int
+        Return the height of self, counted in nodes.'''
+
+        height = 0
+        level = [self.index]
+        lefts, rights = self.tree.lefts, self.tree.rights
+        while level:
+            height += 1
+            level = [c for i in level for c in (lefts[i], rights[i])
+                     if c != NIL]
+        return height
+
+    __str__ = BTNode.__str__
+    is_left_child = BTNode.is_left_child
+    is_right_child = BTNode.is_right_child
+    is_leaf = BTNode.is_leaf
+    depth = BTNode.depth
+
+
+class ArrayBSTree:
+    '''A Binary Search Tree with the same insert, search, range and delete
+    as BSTree, whose nodes live in parallel arrays indexed by slot.'''
+
+    def __init__(self):
+        '''(ArrayBSTree) -> NoneType
+        Create a new empty tree.'''
+
+        self.keys = []
+        self.lefts = array('q')
+        self.rights = array('q')
+        self.parents = array('q')
+        self._root = NIL
+        # head of the chain of free slots, linked through lefts
+        self._free = NIL
+
+    @property
+    def root(self):
+        '''(ArrayBSTree) -> ArrayNode
+        Return a handle on the root of the tree, or None if it is empty.'''
+
+        return self._node(self._root)
+
+    def _node(self, i):
+        '''(ArrayBSTree, int) -> ArrayNode
+        Return a handle on slot i, or None if i is NIL.'''
+
+        return None if i == NIL else ArrayNode(self, i)
+
+    def _new(self, v, p):
+        '''(ArrayBSTree, object, int) -> int
+        Store v in a free slot with parent p and return the slot.'''
+
+        i = self._free
+        if i == NIL:
+            self.keys.append(v)
+            self.lefts.append(NIL)
+            self.rights.append(NIL)
+            self.parents.append(p)
+            return len(self.keys) - 1
+        self._free = self.lefts[i]
+        self.keys[i] = v
+        self.lefts[i] = NIL
+        self.rights[i] = NIL
+        self.parents[i] = p
+        return i
+
+    def _find(self, v):
+        '''(ArrayBSTree, object) -> int
+        Return the slot holding v, or NIL.'''
+
+        keys, lefts, rights = self.keys, self.lefts, self.rights
+        i = self._root
+        while i != NIL and keys[i] != v:
+            i = lefts[i] if v < keys[i] else rights[i]
+        return i
+
+    def print_tree(self):
+        '''(ArrayBSTree) -> NoneType
+        Print the tree sideways, right subtree first (used for testing
+        purposes).'''
+
+        stack = [(self._root, 1, False)]
+        while stack:
+            i, depth, ready = stack.pop()
+            if i == NIL:
+                continue
+            if ready:
+                print("    " * (depth - 1) + str(self.keys[i]))
+            else:
+                stack.append((self.lefts[i], depth + 1, False))
+                stack.append((i, depth, True))
+                stack.append((self.rights[i], depth + 1, False))
+
+    def insert(self, v):
+        '''(ArrayBSTree, object) -> ArrayNode
+        Insert v into self. Do not duplicate values. Return a handle on
+        the node holding v, as BSTree.insert returns its node.'''
+
+        if self._root == NIL:
+            self._root = self._new(v, NIL)
+            return ArrayNode(self, self._root)
+        keys, lefts, rights = self.keys, self.lefts, self.rights
+        i = self._root
+        while keys[i] != v:
+            if v < keys[i]:
+                if lefts[i] == NIL:
+                    lefts[i] = self._new(v, i)
+                    return ArrayNode(self, lefts[i])
+                i = lefts[i]
+            else:
+                if rights[i] == NIL:
+                    rights[i] = self._new(v, i)
+                    return ArrayNode(self, rights[i])
+                i = rights[i]
+        return ArrayNode(self, i)
+
+    def height(self):
+        '''(ArrayBSTree) -> int
+        Return the height of this tree.'''
+
+        if self._root == NIL:
+            return 0
+        return ArrayNode(self, self._root).height()
+
+    def search(self, v):
+        '''(ArrayBSTree, object) -> ArrayNode
+        Return a handle on the node with value v, or None if no such node
+        exists.'''
+
+        return self._node(self._find(v))
+
+    def range(self, v_start, v_end):
+        '''(ArrayBSTree, object, object) -> list
+        Return the same in-order list of values between v_start and v_end,
+        inclusive, as BSTree.range.'''
+
+        keys, lefts, rights = self.keys, self.lefts, self.rights
+        values = []
+        stack = []
+        i = self._root
+        while True:
+            while i != NIL and v_start <= keys[i] <= v_end:
+                stack.append(i)
+                i = lefts[i]
+            if not stack:
+                return values
+            i = stack.pop()
+            values.append(keys[i])
+            i = rights[i]
+
+    def delete(self, v):
+        '''(ArrayBSTree, object) -> NoneType
+        Delete v from self and free its slot. Do nothing if v doesn't
+        exist in self.'''
+
+        keys, lefts, rights, parents = (self.keys, self.lefts, self.rights,
+                                        self.parents)
+        i = self._find(v)
+        if i == NIL:
+            return
+        if lefts[i] != NIL and rights[i] != NIL:
+            succ = rights[i]
+            while lefts[succ] != NIL:
+                succ = lefts[succ]
+            keys[i] = keys[succ]
+            i = succ
+        child = lefts[i] if lefts[i] != NIL else rights[i]
+        parent = parents[i]
+        if child != NIL:
+            parents[child] = parent
+        if parent == NIL:
+            self._root = child
+        elif lefts[parent] == i:
+            lefts[parent] = child
+        else:
+            rights[parent] = child
+        keys[i] = None
+        lefts[i] = self._free
+        self._free = i
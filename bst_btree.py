@@ -0,0 +1,450 @@
+'''
+    B+ Tree
+
+    The BPlusTree class keeps its values in leaves that each hold a sorted
+    list of up to order keys, found with bisect. Inner nodes hold only
+    separator keys and children, and the leaves are linked in both
+    directions, so a scan walks whole lists from leaf to leaf. A tree of n
+    values has about n / order leaves instead of n nodes, which cuts the
+    number of Python objects by the fan-out and the height to
+    log(n) / log(order / 2) levels at most.
+
+    BPlusTree has the insert, search, delete, range and mapping methods of
+    BSTree. As the values do not live in nodes of their own, iter_range
+    yields values rather than nodes, and search returns the leaf holding a
+    value.
+
+    bst_btree.py
+'''
+
+
+from bisect import bisect_left, bisect_right
+
+
+class BLeaf:
+    '''A leaf of a BPlusTree: a sorted list of keys, a parallel list of
+    payloads in mapping mode, and links to the leaves before and after
+    it.'''
+
+    __slots__ = ('keys', 'payloads', 'prev', 'next')
+
+    leaf = True
+
+    def __init__(self, keys=None, payloads=None):
+        '''(BLeaf, list, list) -> NoneType
+        A new unlinked leaf holding keys and payloads.'''
+
+        self.keys = keys if keys is not None else []
+        self.payloads = payloads
+        self.prev = None
+        self.next = None
+
+    def __repr__(self):
+        '''(BLeaf) -> str
+        Return the internal string representation of self.'''
+
+        return "BLeaf: {}".format(self.keys)
+
+
+class BInner:
+    '''An inner node of a BPlusTree. Every key under children[i] is less
+    than keys[i], and every key under children[i + 1] is at least
+    keys[i].'''
+
+    __slots__ = ('keys', 'children')
+
+    leaf = False
+
+    def __init__(self, keys, children):
+        '''(BInner, list, list) -> NoneType
+        A new inner node with separators keys and one more child than
+        keys.'''
+
+        self.keys = keys
+        self.children = children
+
+    def __repr__(self):
+        '''(BInner) -> str
+        Return the internal string representation of self.'''
+
+        return "BInner: {}".format(self.keys)
+
+
+class BPlusTree:
+    '''A B+ tree of order order: every node but the root has between
+    order // 2 and order keys (leaves) or between (order + 1) // 2 and order
+    children (inner nodes).'''
+
+    def __init__(self, order=64, mapping=False):
+        '''(BPlusTree, int, bool) -> NoneType
+        Create a new empty tree of the given order, which must be at least
+        3. If mapping is True, the tree is an ordered dictionary whose
+        leaves also hold a payload per key.'''
+
+        if order < 3:
+            raise ValueError('order must be at least 3')
+        self.order = order
+        self.mapping = mapping
+        self.root = BLeaf(payloads=[] if mapping else None)
+        self.size = 0
+
+    @classmethod
+    def from_sorted(cls, values, order=64, mapping=False):
+        '''(type, iterable) -> BPlusTree
+        Return a new tree holding values, which must be in ascending order,
+        built level by level in O(n) with nodes about three quarters full.
+        Repeated values are kept once. Raise ValueError if values are out
+        of order.'''
+
+        tree = cls(order, mapping)
+        keys = []
+        for v in values:
+            if keys and not keys[-1] < v:
+                if keys[-1] == v:
+                    continue
+                raise ValueError('values are not in ascending order')
+            keys.append(v)
+        if not keys:
+            return tree
+        tree.size = len(keys)
+        fill = order * 3 // 4
+        nodes = [BLeaf(chunk, [None] * len(chunk) if mapping else None)
+                 for chunk in _chunks(keys, fill, order // 2)]
+        for left, right in zip(nodes, nodes[1:]):
+            left.next, right.prev = right, left
+        lows = [leaf.keys[0] for leaf in nodes]
+        while len(nodes) > 1:
+            parents, parent_lows = [], []
+            start = 0
+            for group in _chunks(nodes, fill, (order + 1) // 2):
+                parents.append(BInner(lows[start + 1:start + len(group)],
+                                      group))
+                parent_lows.append(lows[start])
+                start += len(group)
+            nodes, lows = parents, parent_lows
+        tree.root = nodes[0]
+        return tree
+
+    def _leaf(self, v):
+        '''(BPlusTree, object) -> tuple
+        Return the list of (inner node, child index) pairs from the root
+        down to the leaf where v belongs, and that leaf.'''
+
+        path = []
+        node = self.root
+        while not node.leaf:
+            i = bisect_right(node.keys, v)
+            path.append((node, i))
+            node = node.children[i]
+        return path, node
+
+    def _end(self, last):
+        '''(BPlusTree, bool) -> BLeaf
+        Return the first leaf, or the last one if last is True.'''
+
+        node = self.root
+        while not node.leaf:
+            node = node.children[-1 if last else 0]
+        return node
+
+    def print_tree(self):
+        '''(BPlusTree) -> NoneType
+        Print the keys of every node sideways, last child first (used for
+        testing purposes).'''
+
+        stack = [(self.root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            print("    " * depth + str(node.keys))
+            if not node.leaf:
+                stack.extend((child, depth + 1) for child in node.children)
+
+    def __len__(self):
+        '''(BPlusTree) -> int
+        Return the number of values in the tree.'''
+
+        return self.size
+
+    def __contains__(self, v):
+        '''(BPlusTree, object) -> bool
+        Return True iff v is in the tree.'''
+
+        return self.search(v) is not None
+
+    def __iter__(self):
+        '''(BPlusTree) -> generator
+        Yield the values in the tree in ascending order.'''
+
+        leaf = self._end(False)
+        while leaf:
+            yield from leaf.keys
+            leaf = leaf.next
+
+    def __reversed__(self):
+        '''(BPlusTree) -> generator
+        Yield the values in the tree in descending order.'''
+
+        leaf = self._end(True)
+        while leaf:
+            yield from reversed(leaf.keys)
+            leaf = leaf.prev
+
+    def height(self):
+        '''(BPlusTree) -> int
+        Return the number of levels of the tree, counting the leaves.'''
+
+        height, node = 1, self.root
+        while not node.leaf:
+            height += 1
+            node = node.children[0]
+        return height
+
+    def search(self, v):
+        '''(BPlusTree, object) -> BLeaf
+        Return the leaf holding v, or None if v is not in the tree.'''
+
+        node = self.root
+        while not node.leaf:
+            node = node.children[bisect_right(node.keys, v)]
+        keys = node.keys
+        i = bisect_left(keys, v)
+        return node if i < len(keys) and keys[i] == v else None
+
+    def range(self, v_start, v_end):
+        '''(BPlusTree, object, object) -> list
+        Return a list of every value between v_start and v_end
+        inclusive.'''
+
+        return list(self.iter_range(v_start, v_end))
+
+    def iter_range(self, lo=None, hi=None, inclusive=(True, True)):
+        '''(BPlusTree, object, object, tuple) -> generator
+        Yield in ascending order the values between lo and hi, as
+        BSTree.iter_range yields their nodes. A bound of None is
+        unbounded.'''
+
+        if lo is None:
+            leaf, i = self._end(False), 0
+        else:
+            leaf = self._leaf(lo)[1]
+            i = (bisect_left if inclusive[0] else bisect_right)(leaf.keys, lo)
+        while leaf:
+            keys = leaf.keys
+            if hi is None:
+                stop = len(keys)
+            else:
+                stop = (bisect_right if inclusive[1] else bisect_left)(keys,
+                                                                         hi)
+            yield from keys[i:stop]
+            if stop < len(keys):
+                return
+            leaf, i = leaf.next, 0
+
+    def insert(self, v):
+        '''(BPlusTree, object) -> BLeaf
+        Insert v into self. Do not duplicate values. Return the leaf
+        holding v.'''
+
+        return self._insert(v, None, False)
+
+    def _insert(self, v, payload, replace):
+        '''(BPlusTree, object, object, bool) -> BLeaf
+        Insert v with payload, splitting full nodes on the way back up.
+        If v is already in the tree, replace its payload only if replace
+        is True. Return the leaf holding v.'''
+
+        path, leaf = self._leaf(v)
+        keys = leaf.keys
+        i = bisect_left(keys, v)
+        if i < len(keys) and keys[i] == v:
+            if replace:
+                leaf.payloads[i] = payload
+            return leaf
+        keys.insert(i, v)
+        if self.mapping:
+            leaf.payloads.insert(i, payload)
+        self.size += 1
+        if len(keys) <= self.order:
+            return leaf
+        # split the leaf in two and push a separator up the path
+        mid = len(keys) // 2
+        new = BLeaf(keys[mid:],
+                    leaf.payloads[mid:] if self.mapping else None)
+        del keys[mid:]
+        if self.mapping:
+            del leaf.payloads[mid:]
+        new.next, new.prev = leaf.next, leaf
+        if leaf.next:
+            leaf.next.prev = new
+        leaf.next = new
+        found = leaf if i < mid else new
+        separator, node = new.keys[0], new
+        while path:
+            parent, i = path.pop()
+            parent.keys.insert(i, separator)
+            parent.children.insert(i + 1, node)
+            if len(parent.children) <= self.order:
+                return found
+            mid = len(parent.keys) // 2
+            separator = parent.keys[mid]
+            node = BInner(parent.keys[mid + 1:], parent.children[mid + 1:])
+            del parent.keys[mid:]
+            del parent.children[mid + 1:]
+        self.root = BInner([separator], [self.root, node])
+        return found
+
+    def delete(self, v):
+        '''(BPlusTree, object) -> NoneType
+        Delete v from self, borrowing from or merging with a sibling when
+        a node falls below half full. Do nothing if v doesn't exist in
+        self.'''
+
+        path, leaf = self._leaf(v)
+        keys = leaf.keys
+        i = bisect_left(keys, v)
+        if i == len(keys) or keys[i] != v:
+            return
+        del keys[i]
+        if self.mapping:
+            del leaf.payloads[i]
+        self.size -= 1
+        if path and len(keys) < self.order // 2:
+            self._fix_leaf(path, leaf)
+
+    def _fix_leaf(self, path, leaf):
+        '''(BPlusTree, list, BLeaf) -> NoneType
+        Refill leaf, which has too few keys, from a sibling, or merge it
+        with one and fix its parent in turn.'''
+
+        parent, i = path.pop()
+        siblings = parent.children
+        left = siblings[i - 1] if i > 0 else None
+        right = siblings[i + 1] if i + 1 < len(siblings) else None
+        mapping = self.mapping
+        if left and len(left.keys) > self.order // 2:
+            leaf.keys.insert(0, left.keys.pop())
+            if mapping:
+                leaf.payloads.insert(0, left.payloads.pop())
+            parent.keys[i - 1] = leaf.keys[0]
+            return
+        if right and len(right.keys) > self.order // 2:
+            leaf.keys.append(right.keys.pop(0))
+            if mapping:
+                leaf.payloads.append(right.payloads.pop(0))
+            parent.keys[i] = right.keys[0]
+            return
+        if left:
+            # merge leaf into left
+            leaf, right, i = left, leaf, i - 1
+        leaf.keys += right.keys
+        if mapping:
+            leaf.payloads += right.payloads
+        leaf.next = right.next
+        if right.next:
+            right.next.prev = leaf
+        del parent.keys[i]
+        del siblings[i + 1]
+        self._fix_inner(path, parent)
+
+    def _fix_inner(self, path, node):
+        '''(BPlusTree, list, BInner) -> NoneType
+        Refill node, which may have too few children, from a sibling, or
+        merge it with one and fix its parent in turn. Drop a root left
+        with a single child.'''
+
+        while True:
+            if not path:
+                if len(node.children) == 1:
+                    self.root = node.children[0]
+                return
+            if len(node.children) >= (self.order + 1) // 2:
+                return
+            parent, i = path.pop()
+            siblings = parent.children
+            left = siblings[i - 1] if i > 0 else None
+            right = siblings[i + 1] if i + 1 < len(siblings) else None
+            if left and len(left.children) > (self.order + 1) // 2:
+                node.keys.insert(0, parent.keys[i - 1])
+                parent.keys[i - 1] = left.keys.pop()
+                node.children.insert(0, left.children.pop())
+                return
+            if right and len(right.children) > (self.order + 1) // 2:
+                node.keys.append(parent.keys[i])
+                parent.keys[i] = right.keys.pop(0)
+                node.children.append(right.children.pop(0))
+                return
+            if left:
+                node, right, i = left, node, i - 1
+            node.keys.append(parent.keys[i])
+            node.keys += right.keys
+            node.children += right.children
+            del parent.keys[i]
+            del siblings[i + 1]
+            node = parent
+
+    def __getitem__(self, key):
+        '''(BPlusTree, object) -> object
+        Return the payload stored under key in mapping mode. Raise KeyError
+        if key is not in the tree.'''
+
+        if not self.mapping:
+            raise TypeError('tree is not in mapping mode')
+        leaf = self.search(key)
+        if leaf is None:
+            raise KeyError(key)
+        return leaf.payloads[bisect_left(leaf.keys, key)]
+
+    def __setitem__(self, key, payload):
+        '''(BPlusTree, object, object) -> NoneType
+        Store payload under key in mapping mode, replacing any payload
+        already there.'''
+
+        if not self.mapping:
+            raise TypeError('tree is not in mapping mode')
+        self._insert(key, payload, True)
+
+    def __delitem__(self, key):
+        '''(BPlusTree, object) -> NoneType
+        Delete key and its payload in mapping mode. Raise KeyError if key
+        is not in the tree.'''
+
+        if key not in self:
+            raise KeyError(key)
+        self.delete(key)
+
+    def get(self, key, default=None):
+        '''(BPlusTree, object, object) -> object
+        Return the payload stored under key in mapping mode, or default if
+        key is not in the tree.'''
+
+        if not self.mapping:
+            raise TypeError('tree is not in mapping mode')
+        leaf = self.search(key)
+        if leaf is None:
+            return default
+        return leaf.payloads[bisect_left(leaf.keys, key)]
+
+    def items(self):
+        '''(BPlusTree) -> generator
+        Yield the (key, payload) pairs of a tree in mapping mode in key
+        order.'''
+
+        leaf = self._end(False)
+        while leaf:
+            yield from zip(leaf.keys, leaf.payloads)
+            leaf = leaf.next
+
+
+def _chunks(items, size, least):
+    '''(list, int, int) -> list of list
+    Split items into runs of about the same length: the fewest runs of at
+    most size items, unless that would make runs shorter than least.'''
+
+    count = min(-(-len(items) // size), max(len(items) // least, 1))
+    step, extra = divmod(len(items), count)
+    runs, start = [], 0
+    for i in range(count):
+        end = start + step + (i < extra)
+        runs.append(items[start:end])
+        start = end
+    return runs
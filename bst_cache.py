@@ -0,0 +1,302 @@
+'''
+    Cached Binary Search Tree
+
+    The CachedBSTree class wraps a BSTree (an AVLTree by default) and keeps
+    the answers to recent search, floor and ceiling queries in bounded LRU
+    caches, so repeated lookups of the same keys skip the walk down the
+    tree. Every change goes through the wrapper, which forgets exactly the
+    answers the change can affect:
+
+    - insert(v) forgets the search for v, the floor queries at or above v
+      answered by the value just below v, and the ceiling queries at or
+      below v answered by the value just above v;
+    - delete(v) forgets every answer that is v. If the node holding v has
+      two children, the tree moves the value of a neighbour into that
+      node, so answers that are its two neighbours are forgotten too.
+
+    A PersistentBSTree copies the nodes on the path it changes, so an
+    answer may be a node of an earlier version; it holds the same value.
+
+    Each cache counts its hits and misses; cache_info reports them for
+    sizing. Queries must be hashable. A cache changes on every lookup, so
+    a CachedBSTree must not be shared between threads without a lock of
+    its own. It sets mutating_reads, so a ConcurrentBSTree around it takes
+    its write lock for every read.
+
+    bst_cache.py
+'''
+
+
+from collections import OrderedDict
+from bst import AVLTree
+
+# returned by LRUCache.get for a query it does not hold
+MISSING = object()
+
+
+class LRUCache:
+    '''A bounded map from queries to the nodes that answer them. When it is
+    full, the least recently used query is forgotten first.'''
+
+    def __init__(self, maxsize, indexed=False):
+        '''(LRUCache, int, bool) -> NoneType
+        Create an empty cache of at most maxsize queries. If indexed is
+        True, the cache can also forget every query answered by a given
+        value.'''
+
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # value of the answer (None for no node) -> set of queries
+        self.by_answer = {} if indexed else None
+
+    def __len__(self):
+        '''(LRUCache) -> int
+        Return the number of queries held.'''
+
+        return len(self.entries)
+
+    def get(self, query):
+        '''(LRUCache, object) -> BTNode
+        Return the answer held for query, which may be None, or MISSING if
+        there is none.'''
+
+        answer = self.entries.get(query, MISSING)
+        if answer is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(query)
+        return answer
+
+    def put(self, query, answer):
+        '''(LRUCache, object, BTNode) -> NoneType
+        Hold answer for query, forgetting the least recently used query if
+        the cache is full.'''
+
+        if self.maxsize <= 0:
+            return
+        self.discard(query)
+        self.entries[query] = answer
+        if self.by_answer is not None:
+            self.by_answer.setdefault(_value(answer), set()).add(query)
+        if len(self.entries) > self.maxsize:
+            self.discard(next(iter(self.entries)))
+
+    def discard(self, query):
+        '''(LRUCache, object) -> NoneType
+        Forget query, if it is held.'''
+
+        answer = self.entries.pop(query, MISSING)
+        if answer is not MISSING and self.by_answer is not None:
+            value = _value(answer)
+            queries = self.by_answer[value]
+            queries.discard(query)
+            if not queries:
+                del self.by_answer[value]
+
+    def discard_answer(self, value, keep=None):
+        '''(LRUCache, object, function) -> NoneType
+        Forget every query answered by the node holding value, or by no
+        node if value is None, except those for which keep(query) is
+        True.'''
+
+        for query in list(self.by_answer.get(value, ())):
+            if keep is None or not keep(query):
+                self.discard(query)
+
+    def clear(self, reset=True):
+        '''(LRUCache, bool) -> NoneType
+        Forget every query, and reset the counters if reset is True.'''
+
+        self.entries.clear()
+        if self.by_answer is not None:
+            self.by_answer.clear()
+        if reset:
+            self.hits = self.misses = 0
+
+    def info(self):
+        '''(LRUCache) -> dict
+        Return the hits, misses, size and maxsize of the cache.'''
+
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self.entries), 'maxsize': self.maxsize}
+
+
+class CachedBSTree:
+    '''A BSTree with LRU caches in front of search, floor and ceiling.
+    Changes must go through its methods, not through tree.'''
+
+    # every lookup reorders or fills a cache; see ConcurrentBSTree
+    mutating_reads = True
+
+    def __init__(self, tree=None, maxsize=1024):
+        '''(CachedBSTree, BSTree, int) -> NoneType
+        Cache up to maxsize answers of each kind of query on tree, or on a
+        new empty AVLTree if tree is None.'''
+
+        self.tree = AVLTree() if tree is None else tree
+        self.searches = LRUCache(maxsize)
+        self.floors = LRUCache(maxsize, True)
+        self.ceilings = LRUCache(maxsize, True)
+
+    def __len__(self):
+        '''(CachedBSTree) -> int
+        Return the number of values in the tree.'''
+
+        return len(self.tree)
+
+    def __iter__(self):
+        '''(CachedBSTree) -> iterator
+        Iterate over the values in the tree in ascending order.'''
+
+        return iter(self.tree)
+
+    def __contains__(self, v):
+        '''(CachedBSTree, object) -> bool
+        Return True iff v is in the tree.'''
+
+        return self.search(v) is not None
+
+    def search(self, v):
+        '''(CachedBSTree, object) -> BTNode
+        Return the node with value v, or None, from the cache if it can.'''
+
+        node = self.searches.get(v)
+        if node is MISSING:
+            node = self.tree.search(v)
+            self.searches.put(v, node)
+        return node
+
+    def floor(self, v):
+        '''(CachedBSTree, object) -> BTNode
+        Return the node with the greatest value not greater than v, or
+        None, from the cache if it can.'''
+
+        node = self.floors.get(v)
+        if node is MISSING:
+            node = self.tree.floor(v)
+            self.floors.put(v, node)
+        return node
+
+    def ceiling(self, v):
+        '''(CachedBSTree, object) -> BTNode
+        Return the node with the least value not less than v, or None,
+        from the cache if it can.'''
+
+        node = self.ceilings.get(v)
+        if node is MISSING:
+            node = self.tree.ceiling(v)
+            self.ceilings.put(v, node)
+        return node
+
+    def __getitem__(self, key):
+        '''(CachedBSTree, object) -> object
+        Return the payload stored under key in mapping mode. Raise KeyError
+        if key is not in the tree.'''
+
+        if not self.tree.mapping:
+            raise TypeError('tree is not in mapping mode')
+        node = self.search(key)
+        if node is None:
+            raise KeyError(key)
+        return node.payload
+
+    def get(self, key, default=None):
+        '''(CachedBSTree, object, object) -> object
+        Return the payload stored under key in mapping mode, or default if
+        key is not in the tree.'''
+
+        if not self.tree.mapping:
+            raise TypeError('tree is not in mapping mode')
+        node = self.search(key)
+        return default if node is None else node.payload
+
+    def insert(self, v):
+        '''(CachedBSTree, object) -> BTNode
+        Insert v into the tree, forgetting the answers it changes. Return
+        the node holding v.'''
+
+        if self.floors.entries:
+            below = self.tree.floor(v)
+            if below is None or below.value != v:
+                self.floors.discard_answer(_value(below),
+                                           lambda query: query < v)
+        if self.ceilings.entries:
+            above = self.tree.ceiling(v)
+            if above is None or above.value != v:
+                self.ceilings.discard_answer(_value(above),
+                                             lambda query: v < query)
+        self.searches.discard(v)
+        return self.tree.insert(v)
+
+    def __setitem__(self, key, payload):
+        '''(CachedBSTree, object, object) -> NoneType
+        Store payload under key in mapping mode.'''
+
+        if not self.tree.mapping:
+            raise TypeError('tree is not in mapping mode')
+        self.insert(key).payload = payload
+
+    def delete(self, v):
+        '''(CachedBSTree, object) -> NoneType
+        Delete v from the tree, forgetting the answers it changes.'''
+
+        node = self.tree.search(v)
+        if node is None:
+            return
+        values = [v]
+        if node.left and node.right:
+            below, above = node.left, node.right
+            while below.right:
+                below = below.right
+            while above.left:
+                above = above.left
+            values += [below.value, above.value]
+        for value in values:
+            self.searches.discard(value)
+            self.floors.discard_answer(value)
+            self.ceilings.discard_answer(value)
+        self.tree.delete(v)
+
+    def __delitem__(self, key):
+        '''(CachedBSTree, object) -> NoneType
+        Delete key and its payload. Raise KeyError if key is not in the
+        tree.'''
+
+        if key not in self:
+            raise KeyError(key)
+        self.delete(key)
+
+    def delete_range(self, lo=None, hi=None, inclusive=(True, True),
+                     detach=False):
+        '''(CachedBSTree, object, object, tuple, bool) -> BSTree
+        Delete every value between lo and hi, as BSTree.delete_range does,
+        and forget every cached answer.'''
+
+        for cache in (self.searches, self.floors, self.ceilings):
+            cache.clear(False)
+        return self.tree.delete_range(lo, hi, inclusive, detach)
+
+    def cache_info(self):
+        '''(CachedBSTree) -> dict
+        Return the hits, misses, size and maxsize of the search, floor and
+        ceiling caches.'''
+
+        return {'search': self.searches.info(), 'floor': self.floors.info(),
+                'ceiling': self.ceilings.info()}
+
+    def cache_clear(self):
+        '''(CachedBSTree) -> NoneType
+        Forget every cached answer and reset the counters.'''
+
+        for cache in (self.searches, self.floors, self.ceilings):
+            cache.clear()
+
+
+def _value(node):
+    '''(BTNode) -> object
+    Return the value of node, or None if node is None.'''
+
+    return None if node is None else node.value
@@ -0,0 +1,231 @@
+'''
+    Thread-safe Binary Search Tree
+
+    The ConcurrentBSTree class wraps a BSTree (an AVLTree by default) so that
+    it can be shared between threads. Any number of threads may read the tree
+    at once; a thread that changes it waits for the readers to leave and
+    keeps new readers out until it is done. Waiting writers go first, so a
+    steady stream of lookups cannot starve them.
+
+    Per-node hand-over-hand locking does not pay in CPython: the interpreter
+    lock already serializes the descent, and taking a lock per level costs
+    more than the whole walk. One readers-writer lock per tree keeps the
+    critical sections as short as the operations themselves.
+
+    Nodes handed out by search and select belong to the shared tree and may
+    be changed by later writes, so read what is needed from them at once.
+    For long reads of a changing tree, a PersistentBSTree snapshot needs no
+    lock at all.
+
+    bst_concurrent.py
+'''
+
+
+import threading
+from bst import AVLTree
+
+
+class RWLock:
+    '''A readers-writer lock that prefers writers.'''
+
+    def __init__(self):
+        '''(RWLock) -> NoneType
+        Create a new unlocked lock.'''
+
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+
+    def acquire_read(self):
+        '''(RWLock) -> NoneType
+        Block until no writer holds or waits for the lock, then hold it
+        for reading.'''
+
+        with self._cond:
+            while self._writing or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        '''(RWLock) -> NoneType
+        Stop holding the lock for reading.'''
+
+        with self._cond:
+            self._readers -= 1
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        '''(RWLock) -> NoneType
+        Block until nobody holds the lock, then hold it for writing.'''
+
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writing = True
+
+    def release_write(self):
+        '''(RWLock) -> NoneType
+        Stop holding the lock for writing.'''
+
+        with self._cond:
+            self._writing = False
+            self._cond.notify_all()
+
+
+class ConcurrentBSTree:
+    '''A BSTree guarded by a RWLock. It has the query and update methods of
+    BSTree; iterating methods return lists, built while the lock is held.'''
+
+    def __init__(self, tree=None):
+        '''(ConcurrentBSTree, BSTree) -> NoneType
+        Guard tree, or a new empty AVLTree if tree is None. tree must not
+        be used directly afterwards. tree need not be a BSTree; any tree
+        with the methods called on the wrapper will do.'''
+
+        self.tree = AVLTree() if tree is None else tree
+        self.lock = RWLock()
+
+    def _read(self, method, *args):
+        '''(ConcurrentBSTree, function, ...) -> object
+        Return method(*args), called while holding the lock for reading,
+        or for writing if reads change the shape of the tree.'''
+
+        if getattr(self.tree, 'mutating_reads', False):
+            return self._write(method, *args)
+        self.lock.acquire_read()
+        try:
+            return method(*args)
+        finally:
+            self.lock.release_read()
+
+    def _write(self, method, *args):
+        '''(ConcurrentBSTree, function, ...) -> object
+        Return method(*args), called while holding the lock for writing.'''
+
+        self.lock.acquire_write()
+        try:
+            return method(*args)
+        finally:
+            self.lock.release_write()
+
+    def __len__(self):
+        '''(ConcurrentBSTree) -> int
+        Return the number of values in the tree.'''
+
+        return self._read(self.tree.__len__)
+
+    def __contains__(self, v):
+        '''(ConcurrentBSTree, object) -> bool
+        Return True iff v is in the tree.'''
+
+        return self._read(self.tree.__contains__, v)
+
+    def __getitem__(self, key):
+        '''(ConcurrentBSTree, object) -> object
+        Return the payload stored under key, as BSTree does.'''
+
+        return self._read(self.tree.__getitem__, key)
+
+    def get(self, key, default=None):
+        '''(ConcurrentBSTree, object, object) -> object
+        Return the payload stored under key, or default.'''
+
+        return self._read(self.tree.get, key, default)
+
+    def height(self):
+        '''(ConcurrentBSTree) -> int
+        Return the height of the tree.'''
+
+        return self._read(self.tree.height)
+
+    def search(self, v):
+        '''(ConcurrentBSTree, object) -> BTNode
+        Return the node with value v, or None.'''
+
+        return self._read(self.tree.search, v)
+
+    def rank(self, v):
+        '''(ConcurrentBSTree, object) -> int
+        Return the number of values less than v.'''
+
+        return self._read(self.tree.rank, v)
+
+    def select(self, i):
+        '''(ConcurrentBSTree, int) -> BTNode
+        Return the node with the i-th smallest value.'''
+
+        return self._read(self.tree.select, i)
+
+    def range(self, v_start, v_end):
+        '''(ConcurrentBSTree, object, object) -> list
+        Return the values between v_start and v_end, as BSTree.range
+        does.'''
+
+        return self._read(self.tree.range, v_start, v_end)
+
+    def iter_range(self, lo=None, hi=None, inclusive=(True, True)):
+        '''(ConcurrentBSTree, object, object, tuple) -> list
+        Return a list of the nodes that BSTree.iter_range would yield.'''
+
+        return self._read(lambda: list(self.tree.iter_range(lo, hi,
+                                                             inclusive)))
+
+    def count_range(self, lo=None, hi=None, inclusive=(True, True)):
+        '''(ConcurrentBSTree, object, object, tuple) -> int
+        Return the number of values between lo and hi.'''
+
+        return self._read(self.tree.count_range, lo, hi, inclusive)
+
+    def aggregate_range(self, lo=None, hi=None, inclusive=(True, True)):
+        '''(ConcurrentBSTree, object, object, tuple) -> object
+        Return the aggregate of the values between lo and hi.'''
+
+        return self._read(self.tree.aggregate_range, lo, hi, inclusive)
+
+    def items(self):
+        '''(ConcurrentBSTree) -> list
+        Return the (key, payload) pairs of the tree in key order.'''
+
+        return self._read(lambda: list(self.tree.items()))
+
+    def values(self):
+        '''(ConcurrentBSTree) -> list
+        Return the values in the tree in ascending order.'''
+
+        return self._read(lambda: list(self.tree))
+
+    def insert(self, v):
+        '''(ConcurrentBSTree, object) -> BTNode
+        Insert v into the tree and return the node holding it.'''
+
+        return self._write(self.tree.insert, v)
+
+    def __setitem__(self, key, payload):
+        '''(ConcurrentBSTree, object, object) -> NoneType
+        Store payload under key.'''
+
+        self._write(self.tree.__setitem__, key, payload)
+
+    def delete(self, v):
+        '''(ConcurrentBSTree, object) -> NoneType
+        Delete v from the tree.'''
+
+        self._write(self.tree.delete, v)
+
+    def __delitem__(self, key):
+        '''(ConcurrentBSTree, object) -> NoneType
+        Delete key and its payload.'''
+
+        self._write(self.tree.__delitem__, key)
+
+    def delete_range(self, lo=None, hi=None, inclusive=(True, True),
+                     detach=False):
+        '''(ConcurrentBSTree, object, object, tuple, bool) -> BSTree
+        Delete every value between lo and hi, as BSTree.delete_range
+        does.'''
+
+        return self._write(self.tree.delete_range, lo, hi, inclusive, detach)
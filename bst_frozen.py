@@ -0,0 +1,373 @@
+'''
+    Frozen Binary Search Tree
+
+    The FrozenBSTree class is an immutable snapshot of a BSTree, made by
+    BSTree.freeze. It keeps the values as one sorted array, plus a parallel
+    list of payloads for a tree in mapping mode, and answers lookups by
+    binary search over that array. There is no node object per value and no
+    pointer to chase, so a lookup costs a few cache misses instead of one
+    per level.
+
+    search_many and range_many answer a whole batch of queries at once. When
+    numpy is installed and the keys are numbers, the keys are kept in a
+    numpy array and a batch is a single call to numpy.searchsorted;
+    otherwise each query is a call to bisect, which is still done in C.
+
+    dump_tree writes a tree to a file that load_tree can map straight back
+    into memory. The file is a 16-byte header followed by the keys. Keys
+    that are all ints that fit in 64 bits, or all floats, are stored as a
+    fixed-width array that a MappedBSTree reads in place, without parsing
+    or copying. Other keys, and the payloads of a tree in mapping mode, are
+    pickled, so only load files you trust.
+
+    bst_frozen.py
+'''
+
+
+import os
+import pickle
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from mmap import ACCESS_READ, mmap as MemoryMap
+from bst import AVLTree
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# magic, key type code, byte order, has payloads, number of keys
+_HEADER = struct.Struct('<4sccBxQ')
+_MAGIC = b'BST1'
+_ORDER = b'<' if sys.byteorder == 'little' else b'>'
+# key type code for keys that are pickled rather than stored as an array
+_PICKLED = b'p'
+
+
+class FrozenBSTree:
+    '''A read-only BST kept as a sorted array of unique keys. Methods that
+    would return a node return a value or a position in sorted order
+    instead.'''
+
+    def __init__(self, keys, payloads=None):
+        '''(FrozenBSTree, list, list) -> NoneType
+        Create a frozen tree of keys, which must be sorted and unique. If
+        payloads is given, the tree is in mapping mode and payloads[i] is
+        stored under keys[i].'''
+
+        self.keys = _as_array(keys)
+        self.payloads = payloads
+        self.mapping = payloads is not None
+        # True iff self.keys is a numpy array
+        self.vectorized = numpy is not None and \
+            isinstance(self.keys, numpy.ndarray)
+
+    def __len__(self):
+        '''(FrozenBSTree) -> int
+        Return the number of values in the tree.'''
+
+        return len(self.keys)
+
+    def __contains__(self, v):
+        '''(FrozenBSTree, object) -> bool
+        Return True iff v is in the tree.'''
+
+        return self.search(v) != -1
+
+    def __iter__(self):
+        '''(FrozenBSTree) -> iterator
+        Iterate over the values in the tree in ascending order.'''
+
+        return iter(self._values())
+
+    def __reversed__(self):
+        '''(FrozenBSTree) -> iterator
+        Iterate over the values in the tree in descending order.'''
+
+        return reversed(self._values())
+
+    def _values(self):
+        '''(FrozenBSTree) -> list
+        Return the values as a list of Python objects.'''
+
+        keys = self.keys
+        return keys if isinstance(keys, list) else keys.tolist()
+
+    def _bisect(self, v, right=False):
+        '''(FrozenBSTree, object, bool) -> int
+        Return the number of keys less than v, or not greater than v if
+        right is True.'''
+
+        if self.vectorized:
+            return int(numpy.searchsorted(self.keys, v,
+                                          'right' if right else 'left'))
+        return (bisect_right if right else bisect_left)(self.keys, v)
+
+    def search(self, v):
+        '''(FrozenBSTree, object) -> int
+        Return the position of v in sorted order, or -1 if v is not in the
+        tree.'''
+
+        i = self._bisect(v)
+        return i if i < len(self.keys) and self.keys[i] == v else -1
+
+    def rank(self, v):
+        '''(FrozenBSTree, object) -> int
+        Return the number of values in the tree that are less than v.'''
+
+        return self._bisect(v)
+
+    def select(self, i):
+        '''(FrozenBSTree, int) -> object
+        Return the i-th smallest value, counting from 0. Negative i counts
+        from the end. Raise IndexError if there is no such value.'''
+
+        return self.keys[i].item() if self.vectorized else self.keys[i]
+
+    def range(self, v_start, v_end):
+        '''(FrozenBSTree, object, object) -> list
+        Return a list of every value between v_start and v_end
+        inclusive.'''
+
+        values = self.keys[self._bisect(v_start):self._bisect(v_end, True)]
+        return values if isinstance(values, list) else values.tolist()
+
+    def count_range(self, lo, hi):
+        '''(FrozenBSTree, object, object) -> int
+        Return the number of values between lo and hi inclusive.'''
+
+        return max(self._bisect(hi, True) - self._bisect(lo), 0)
+
+    def search_many(self, keys):
+        '''(FrozenBSTree, iterable) -> sequence of int
+        Return the position in sorted order of each of keys, or -1 for the
+        ones not in the tree. The result is a numpy array if the tree is
+        vectorized and a list otherwise.'''
+
+        if self.vectorized:
+            queries = numpy.asarray(keys)
+            found = numpy.searchsorted(self.keys, queries)
+            last = numpy.minimum(found, len(self.keys) - 1)
+            return numpy.where(self.keys[last] == queries, found, -1)
+        search = self.search
+        return [search(key) for key in keys]
+
+    def range_many(self, intervals):
+        '''(FrozenBSTree, iterable) -> list
+        Return, for each (lo, hi) in intervals, the sorted values between
+        lo and hi inclusive. Unless self.keys is a list, these are views of
+        self.keys rather than lists.'''
+
+        keys = self.keys
+        if self.vectorized:
+            bounds = numpy.asarray(intervals).reshape(-1, 2)
+            starts = numpy.searchsorted(keys, bounds[:, 0], 'left')
+            stops = numpy.searchsorted(keys, bounds[:, 1], 'right')
+        else:
+            intervals = list(intervals)
+            starts = [bisect_left(keys, lo) for lo, hi in intervals]
+            stops = [bisect_right(keys, hi) for lo, hi in intervals]
+        return [keys[start:stop] for start, stop in zip(starts, stops)]
+
+    def __getitem__(self, key):
+        '''(FrozenBSTree, object) -> object
+        Return the payload stored under key in mapping mode. Raise KeyError
+        if key is not in the tree.'''
+
+        if not self.mapping:
+            raise TypeError('tree is not in mapping mode')
+        i = self.search(key)
+        if i == -1:
+            raise KeyError(key)
+        return self.payloads[i]
+
+    def get(self, key, default=None):
+        '''(FrozenBSTree, object, object) -> object
+        Return the payload stored under key in mapping mode, or default if
+        key is not in the tree.'''
+
+        if not self.mapping:
+            raise TypeError('tree is not in mapping mode')
+        i = self.search(key)
+        return default if i == -1 else self.payloads[i]
+
+    def items(self):
+        '''(FrozenBSTree) -> iterator
+        Iterate over the (key, payload) pairs of a tree in mapping mode in
+        key order.'''
+
+        return zip(self._values(), self.payloads)
+
+    def insert(self, *args):
+        '''(FrozenBSTree, ...) -> NoneType
+        Raise TypeError: a frozen tree cannot change. Use thaw.'''
+
+        raise TypeError('FrozenBSTree is read-only')
+
+    delete = __setitem__ = __delitem__ = insert
+
+    def thaw(self, cls=AVLTree):
+        '''(FrozenBSTree, type) -> BSTree
+        Return a new tree of type cls holding the values and payloads of
+        self, in O(n).'''
+
+        if not self.mapping:
+            return cls.from_sorted(self._values())
+        tree = cls.from_sorted(self._values(), mapping=True)
+        for node, payload in zip(tree.iter_range(), self.payloads):
+            node.payload = payload
+        return tree
+
+    def dump(self, path):
+        '''(FrozenBSTree, str) -> NoneType
+        Write this tree to path; see dump_tree.'''
+
+        dump_tree(self, path)
+
+
+class MappedBSTree(FrozenBSTree):
+    '''A FrozenBSTree returned by load_tree, whose keys usually still live
+    in the file they were loaded from. The first call that changes it turns
+    it, in place, into a mutable tree of type tree_class holding the same
+    values.'''
+
+    def __init__(self, keys, payloads=None, tree_class=AVLTree):
+        '''(MappedBSTree, sequence, list, type) -> NoneType
+        Create a frozen tree of keys and payloads that becomes a tree_class
+        when it is changed.'''
+
+        FrozenBSTree.__init__(self, keys, payloads)
+        self.tree_class = tree_class
+
+    def _promote(self):
+        '''(MappedBSTree) -> NoneType
+        Turn self into a mutable tree of type self.tree_class, copying the
+        keys out of the file.'''
+
+        tree = self.thaw(self.tree_class)
+        self.__class__ = type(tree)
+        self.__dict__ = tree.__dict__
+
+    def insert(self, v):
+        '''(MappedBSTree, object) -> BTNode
+        Become mutable and insert v.'''
+
+        self._promote()
+        return self.insert(v)
+
+    def delete(self, v):
+        '''(MappedBSTree, object) -> NoneType
+        Become mutable and delete v.'''
+
+        self._promote()
+        self.delete(v)
+
+    def __setitem__(self, key, payload):
+        '''(MappedBSTree, object, object) -> NoneType
+        Become mutable and store payload under key.'''
+
+        self._promote()
+        self[key] = payload
+
+    def __delitem__(self, key):
+        '''(MappedBSTree, object) -> NoneType
+        Become mutable and delete key.'''
+
+        self._promote()
+        del self[key]
+
+
+def dump_tree(tree, path):
+    '''(BSTree, str) -> NoneType
+    Write the values of tree, and its payloads if it is in mapping mode, to
+    the file path. tree may be any tree that iterates over its values in
+    order, including a FrozenBSTree. An existing file at path is replaced
+    as a whole.'''
+
+    keys = list(tree)
+    payloads = [payload for key, payload in tree.items()] \
+        if tree.mapping else None
+    code = _type_code(keys)
+    # write a new file and rename it over path, so that trees still mapped
+    # from the old file keep their contents
+    part = path + '.part'
+    with open(part, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, code, _ORDER, payloads is not None,
+                             len(keys)))
+        if code == _PICKLED:
+            pickle.dump((keys, payloads), f, pickle.HIGHEST_PROTOCOL)
+        else:
+            array(code.decode(), keys).tofile(f)
+            if payloads is not None:
+                pickle.dump(payloads, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(part, path)
+
+
+def load_tree(path, mmap=True, tree_class=AVLTree):
+    '''(str, bool, type) -> MappedBSTree
+    Return a read-only tree holding what dump_tree wrote to path. If mmap
+    is True, fixed-width keys are read in place from a memory map of the
+    file instead of being read into memory; payloads are always unpickled.
+    The tree becomes a tree_class the first time it is changed. Raise
+    ValueError if path was not written by dump_tree.'''
+
+    with open(path, 'rb') as f:
+        if mmap:
+            buffer = MemoryMap(f.fileno(), 0, access=ACCESS_READ)
+        else:
+            buffer = f.read()
+    if len(buffer) < _HEADER.size:
+        raise ValueError('{} is not a tree file'.format(path))
+    magic, code, order, mapping, n = _HEADER.unpack_from(buffer)
+    if magic != _MAGIC:
+        raise ValueError('{} is not a tree file'.format(path))
+    start = _HEADER.size
+    if code == _PICKLED:
+        keys, payloads = pickle.loads(buffer[start:])
+    else:
+        end = start + n * 8
+        keys = memoryview(buffer)[start:end].cast(code.decode())
+        if order != _ORDER:
+            # written on a machine of the other byte order
+            keys = array(code.decode(), keys)
+            keys.byteswap()
+        payloads = pickle.loads(buffer[end:]) if mapping else None
+    return MappedBSTree(keys, payloads, tree_class)
+
+
+def _type_code(keys):
+    '''(list) -> bytes
+    Return the array type code to store the sorted keys with: b'q' if they
+    are all ints that fit in 64 bits, b'd' if they are all floats, and
+    _PICKLED otherwise.'''
+
+    if all(type(key) is int for key in keys) and \
+       (not keys or -2 ** 63 <= keys[0] and keys[-1] < 2 ** 63):
+        return b'q'
+    if keys and all(type(key) is float for key in keys):
+        return b'd'
+    return _PICKLED
+
+
+def _as_array(keys):
+    '''(sequence) -> sequence
+    Return keys as a numpy array if numpy is installed and keys are a
+    memoryview or array of the fixed-width keys load_tree reads, or a list
+    that _type_code would store as one. Otherwise return a memoryview or
+    array unchanged, so that it is not copied, and anything else as a
+    list.'''
+
+    if numpy is not None and len(keys):
+        if isinstance(keys, (memoryview, array)):
+            return numpy.asarray(keys)
+        # ints mixed with floats, or too big for 64 bits, would be rounded
+        # to floats by numpy
+        code = _type_code(keys)
+        if code != _PICKLED:
+            return numpy.asarray(keys, code.decode())
+    if isinstance(keys, (memoryview, array)):
+        return keys
+    return list(keys)
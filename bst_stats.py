@@ -0,0 +1,333 @@
+'''
+    Binary Search Tree Instrumentation
+
+    BSTree.instrument turns a tree into an instance of an instrumented
+    subclass of its own class, which counts for each kind of operation:
+
+    - comparisons: the key comparisons made;
+    - visits: the nodes whose value a key was compared with;
+    - allocations: the nodes created, which is one per new value, or every
+      node copied on the path for a PersistentBSTree;
+    - restructures: AVL and splay rotations, scapegoat rebuilds and treap
+      splits and merges.
+
+    Comparisons and visits are counted by handing the tree each key
+    wrapped in a _Probe, which counts every comparison made with it, so the
+    search loops of bst.py are the same whether or not a tree is
+    instrumented. Nodes are still built with the key itself, so no probe
+    reaches a node's value or aggregate. Restructurings are counted where
+    they happen, at the cost of one test of tree.counters per rotation,
+    rebuild, split or merge when the tree is not instrumented. Keys must be
+    of a type whose comparison operators return NotImplemented for other
+    types, as the built-in types do.
+
+    An instrumented tree counts into one place at a time, so it must be
+    used by one thread at a time. Operations run from inside another, such
+    as the search in __delitem__, are counted as part of it.
+
+    bst_stats.py
+'''
+
+
+from bst import PersistentBSTree, _search
+
+
+class OpStats:
+    '''The counts for one kind of operation on an instrumented tree.'''
+
+    __slots__ = ('calls', 'comparisons', 'visits', 'allocations',
+                 'restructures', 'last')
+
+    def __init__(self):
+        '''(OpStats) -> NoneType
+        Create counts of zero.'''
+
+        self.calls = 0
+        self.comparisons = 0
+        self.visits = 0
+        self.allocations = 0
+        self.restructures = 0
+        # the value a key was last compared with, to count each node once
+        self.last = None
+
+    def as_dict(self):
+        '''(OpStats) -> dict
+        Return the counts as a dict.'''
+
+        return {'calls': self.calls, 'comparisons': self.comparisons,
+                'visits': self.visits, 'allocations': self.allocations,
+                'restructures': self.restructures}
+
+
+# counts made by probes after their operation has finished, which are thrown
+# away
+_DISCARDED = OpStats()
+
+
+class _Probe:
+    '''A key that counts the comparisons made with it into an OpStats.'''
+
+    __slots__ = ('key', 'stats')
+
+    def __init__(self, key, stats):
+        '''(_Probe, object, OpStats) -> NoneType
+        Wrap key, counting into stats.'''
+
+        self.key = key
+        self.stats = stats
+
+    def __repr__(self):
+        '''(_Probe) -> str
+        Return the representation of key, so errors raised with a probe
+        read as if raised with the key.'''
+
+        return repr(self.key)
+
+    def _count(self, other):
+        '''(_Probe, object) -> object
+        Count a comparison with other and return the value to compare
+        with.'''
+
+        stats = self.stats
+        stats.comparisons += 1
+        if other is not stats.last:
+            stats.visits += 1
+            stats.last = other
+        return other.key if isinstance(other, _Probe) else other
+
+    def __lt__(self, other):
+        '''(_Probe, object) -> bool
+        Count and return key < other.'''
+
+        return self.key < self._count(other)
+
+    def __le__(self, other):
+        '''(_Probe, object) -> bool
+        Count and return key <= other.'''
+
+        return self.key <= self._count(other)
+
+    def __gt__(self, other):
+        '''(_Probe, object) -> bool
+        Count and return key > other.'''
+
+        return self.key > self._count(other)
+
+    def __ge__(self, other):
+        '''(_Probe, object) -> bool
+        Count and return key >= other.'''
+
+        return self.key >= self._count(other)
+
+    def __eq__(self, other):
+        '''(_Probe, object) -> bool
+        Count and return key == other.'''
+
+        return self.key == self._count(other)
+
+    def __ne__(self, other):
+        '''(_Probe, object) -> bool
+        Count and return key != other.'''
+
+        return self.key != self._count(other)
+
+    __hash__ = None
+
+
+def _unwrapping(node_class):
+    '''(type) -> function
+    Return a function that makes node_class nodes as node_class does, but
+    with the key of a probe in place of the probe.'''
+
+    def make(v, p=None):
+        return node_class(v.key if isinstance(v, _Probe) else v, p)
+    return make
+
+
+class Instrumented:
+    '''Mixed into a subclass of a BSTree class by derived_class. Its
+    methods run those of the tree class with probes for keys and count
+    into self.op_stats.'''
+
+    # mixins of a higher layer run outside those of a lower one
+    layer = 0
+
+    def _run(self, op, method, *keys):
+        '''(Instrumented, str, function, ...) -> object
+        Return method(*keys), with each key other than None replaced by a
+        probe, counting the call as one operation op.'''
+
+        if self.counters is not None:
+            # part of an operation that is already being counted
+            return method(*keys)
+        stats = self.op_stats.get(op)
+        if stats is None:
+            stats = self.op_stats[op] = OpStats()
+        stats.calls += 1
+        probes = [key if key is None else _Probe(key, stats) for key in keys]
+        root, n = self.root, len(self)
+        # new nodes are built with the key instead of its probe, so no
+        # probe reaches a value or an aggregate
+        node_class = self.__dict__.get('node_class')
+        self.node_class = _unwrapping(self.node_class)
+        self.counters = stats
+        try:
+            return method(*probes)
+        finally:
+            self.counters = None
+            if node_class is None:
+                del self.node_class
+            else:
+                self.node_class = node_class
+            stats.last = None
+            for probe in probes:
+                if probe is not None:
+                    probe.stats = _DISCARDED
+            if isinstance(self, PersistentBSTree):
+                # path copies are built by the path-copying functions
+                new = _new_nodes(root, self.root)
+                stats.allocations += len(new)
+                for node in new:
+                    if isinstance(node.value, _Probe):
+                        node.value = node.value.key
+            elif len(self) > n:
+                stats.allocations += len(self) - n
+
+    def insert(self, v):
+        '''(Instrumented, object) -> BTNode
+        Count and run insert.'''
+
+        return self._run('insert', super().insert, v)
+
+    def __setitem__(self, key, payload):
+        '''(Instrumented, object, object) -> NoneType
+        Count and run __setitem__ as an insert.'''
+
+        setitem = super().__setitem__
+        self._run('insert', lambda key: setitem(key, payload), key)
+
+    def search(self, v):
+        '''(Instrumented, object) -> BTNode
+        Count and run search.'''
+
+        return self._run('search', super().search, v)
+
+    def __contains__(self, v):
+        '''(Instrumented, object) -> bool
+        Count and run __contains__ as a search.'''
+
+        return self._run('search', super().__contains__, v)
+
+    def __getitem__(self, key):
+        '''(Instrumented, object) -> object
+        Count and run __getitem__ as a search.'''
+
+        return self._run('search', super().__getitem__, key)
+
+    def get(self, key, default=None):
+        '''(Instrumented, object, object) -> object
+        Count and run get as a search.'''
+
+        get = super().get
+        return self._run('search', lambda key: get(key, default), key)
+
+    def floor(self, v):
+        '''(Instrumented, object) -> BTNode
+        Count and run floor.'''
+
+        return self._run('floor', super().floor, v)
+
+    def ceiling(self, v):
+        '''(Instrumented, object) -> BTNode
+        Count and run ceiling.'''
+
+        return self._run('ceiling', super().ceiling, v)
+
+    def rank(self, v):
+        '''(Instrumented, object) -> int
+        Count and run rank.'''
+
+        return self._run('rank', super().rank, v)
+
+    def range(self, v_start, v_end):
+        '''(Instrumented, object, object) -> list
+        Count and run range.'''
+
+        return self._run('range', super().range, v_start, v_end)
+
+    def count_range(self, lo=None, hi=None, inclusive=(True, True)):
+        '''(Instrumented, object, object, tuple) -> int
+        Count and run count_range.'''
+
+        count_range = super().count_range
+        return self._run('count_range',
+                         lambda lo, hi: count_range(lo, hi, inclusive), lo, hi)
+
+    def delete(self, v):
+        '''(Instrumented, object) -> NoneType
+        Count and run delete.'''
+
+        return self._run('delete', super().delete, v)
+
+    def __delitem__(self, key):
+        '''(Instrumented, object) -> NoneType
+        Count and run __delitem__ as a delete.'''
+
+        return self._run('delete', super().__delitem__, key)
+
+
+# (tree class, mixins) -> the subclass of the tree class with the mixins
+_classes = {}
+
+
+def derived_class(cls, mixin, enabled):
+    '''(type, type, bool) -> type
+    Return the class whose instances are trees of the plain tree class
+    under cls, with the mixins of cls plus mixin if enabled is True, or
+    minus mixin otherwise. Mixins are applied in order of layer, so the
+    result does not depend on the order they were added in.'''
+
+    plain = cls.__dict__.get('plain_class', cls)
+    mixins = set(cls.__dict__.get('mixins', ()))
+    if enabled:
+        mixins.add(mixin)
+    else:
+        mixins.discard(mixin)
+    if not mixins:
+        return plain
+    mixins = tuple(sorted(mixins, key=lambda mixin: -mixin.layer))
+    if (plain, mixins) not in _classes:
+        name = ''.join(mixin.__name__ for mixin in mixins) + plain.__name__
+        _classes[plain, mixins] = type(
+            name, mixins + (plain,), {'plain_class': plain, 'mixins': mixins})
+    return _classes[plain, mixins]
+
+
+def instrument(tree, enabled=True):
+    '''(BSTree, bool) -> NoneType
+    Make tree an instance of a subclass of its class that counts if enabled
+    is True, and stop counting otherwise.'''
+
+    if enabled and tree.op_stats is None:
+        tree.op_stats = {}
+    tree.__class__ = derived_class(type(tree), Instrumented, enabled)
+
+
+def _new_nodes(old, new):
+    '''(PNode, PNode) -> list of PNode
+    Return the nodes of the persistent tree rooted at new that are not in
+    the one rooted at old. A node is shared iff the search for its value in
+    old ends at it, and then so is its whole subtree.'''
+
+    nodes = []
+    stack = [new] if new else []
+    while stack:
+        node = stack.pop()
+        value = node.value
+        if isinstance(value, _Probe):
+            value = value.key
+        if _search(old, value) is node:
+            continue
+        nodes.append(node)
+        stack.extend(child for child in (node.left, node.right) if child)
+    return nodes
@@ -11,6 +11,7 @@
 '''
 
 
+import random
 import unittest
 from bst import *
 
@@ -40,6 +41,12 @@ class EmptyTreeTestCase(unittest.TestCase):
 
         self.assertEqual(self.tree.height(), 0)
 
+    def testLen(self):
+        '''Verify the empty tree has no values.'''
+
+        self.assertEqual(len(self.tree), 0)
+        self.assertEqual(self.tree.rank(5), 0)
+
     def testSearch(self):
         '''Verify if value v exists in the tree.'''
 
@@ -137,7 +144,18 @@ class SampleTestCase(unittest.TestCase):
         self.assertEqual(self.tree.range(5, 9), [5, 7, 8, 9])
 
     def testDelete(self):
-        pass
+        '''Verify that deleted values are gone and the rest remain.'''
+
+        self.tree.delete(20)
+        self.assertEqual(self.tree.range(2, 9), [2, 3, 5, 7, 8, 9])
+        self.tree.delete(9)
+        self.assertEqual(self.tree.root.right.right.value, 8)
+        self.assertEqual(self.tree.root.right.right.parent.value, 7)
+        self.tree.delete(5)
+        self.assertEqual(self.tree.root.value, 7)
+        self.assertEqual(self.tree.range(2, 8), [2, 3, 7, 8])
+        self.tree.delete(2)
+        self.assertEqual(self.tree.root.left.is_leaf(), True)
 
     def testInorderPredecessor(self):
         '''Verify the appropriate inorder predecessor of the given node.'''
@@ -232,7 +250,26 @@ class RightTreeTestCase(unittest.TestCase):
         self.assertEqual(self.tree.range(5, 9), [5, 7, 8, 9])
 
     def testDelete(self):
-        pass
+        '''Verify that deleting the root promotes its only child.'''
+
+        self.tree.delete(5)
+        self.assertEqual(self.tree.root.value, 7)
+        self.assertEqual(self.tree.root.parent, None)
+        self.tree.delete(9)
+        self.assertEqual(self.tree.root.right.value, 8)
+
+    def testDeepTree(self):
+        '''Verify that a right tree deeper than the recursion limit works.'''
+
+        tree = BSTree()
+        for val in range(2000):
+            tree.insert(val)
+        self.assertEqual(tree.height(), 2000)
+        self.assertEqual(tree.search(1999).depth(), 2000)
+        self.assertEqual(tree.range(0, 1999), list(range(2000)))
+        tree.delete(1999)
+        self.assertEqual(tree.search(1999), None)
+        self.assertEqual(tree.height(), 1999)
 
     def testInorderPredecessor(self):
         '''Verify the appropriate inorder predecessor of the given node.'''
@@ -413,6 +450,11 @@ class OneNodeTreeTestCase(unittest.TestCase):
         self.assertEqual(self.tree.search(20), None)
         self.assertEqual(self.tree.search(7), self.tree.root)
 
+    def testSlots(self):
+        '''Verify that nodes do not carry a per-instance dictionary.'''
+
+        self.assertFalse(hasattr(self.tree.root, '__dict__'))
+
     def testRange(self):
         '''Verify the appropriate list of Node objects between two nodes.'''
 
@@ -537,7 +579,122 @@ class HugeTreeTestCase(unittest.TestCase):
                          [8, 10, 11, 12, 14, 20, 21, 22])
 
     def testDelete(self):
-        pass
+        '''Verify that deleting a node with two children keeps the order.'''
+
+        self.tree.delete(8)
+        self.assertEqual(self.tree.root.left.value, 10)
+        self.assertEqual(self.tree.root.left.right.left.value, 11)
+        self.assertEqual(self.tree.root.left.right.left.parent.value, 12)
+        self.tree.delete(20)
+        self.assertEqual(self.tree.root.value, 21)
+        self.assertEqual(self.tree.root.right.left, None)
+        self.assertEqual(self.tree.range(1, 77), \
+                         [1, 2, 4, 5, 10, 11, 12, 14, 21, 22, 49, 50, 70, 77])
+
+    def testIterRange(self):
+        '''Verify the nodes between two bounds, in order.'''
+
+        values = lambda nodes: [node.value for node in nodes]
+        self.assertEqual(values(self.tree.iter_range(2, 14)),
+                         [2, 4, 5, 8, 10, 11, 12, 14])
+        self.assertEqual(values(self.tree.iter_range(2, 14, (False, False))),
+                         [4, 5, 8, 10, 11, 12])
+        self.assertEqual(values(self.tree.iter_range(13, 21.5)),
+                         [14, 20, 21])
+        self.assertEqual(values(self.tree.iter_range(hi=4)), [1, 2, 4])
+        self.assertEqual(values(self.tree.iter_range(70)), [70, 77])
+        self.assertEqual(len(list(self.tree.iter_range())), 16)
+        self.assertEqual(list(self.tree.iter_range(78)), [])
+        self.assertEqual(list(self.tree.iter_range(30, 40)), [])
+        self.assertEqual(list(BSTree().iter_range(1, 2)), [])
+        nodes = self.tree.iter_range(12)
+        self.assertEqual(next(nodes), self.tree.search(12))
+        self.assertEqual(next(nodes), self.tree.search(14))
+
+    def testFloorCeiling(self):
+        '''Verify the nearest values below and above v.'''
+
+        self.assertEqual(self.tree.floor(13).value, 12)
+        self.assertEqual(self.tree.floor(14).value, 14)
+        self.assertEqual(self.tree.floor(100).value, 77)
+        self.assertEqual(self.tree.floor(0), None)
+        self.assertEqual(self.tree.ceiling(13).value, 14)
+        self.assertEqual(self.tree.ceiling(15).value, 20)
+        self.assertEqual(self.tree.ceiling(0).value, 1)
+        self.assertEqual(self.tree.ceiling(78), None)
+        self.assertEqual(BSTree().floor(1), None)
+
+    def testIterRangeStrings(self):
+        '''Verify that iter_range works for values other than ints.'''
+
+        tree = BSTree()
+        for val in ['pear', 'apple', 'fig', 'kiwi', 'plum', 'date']:
+            tree.insert(val)
+        self.assertEqual([node.value for node in tree.iter_range('b', 'l')],
+                         ['date', 'fig', 'kiwi'])
+
+    def testIter(self):
+        '''Verify iterating over the values in order and in reverse.'''
+
+        values = [1, 2, 4, 5, 8, 10, 11, 12, 14, 20, 21, 22, 49, 50, 70, 77]
+        self.assertEqual(list(self.tree), values)
+        self.assertEqual(list(reversed(self.tree)), values[::-1])
+        self.assertTrue(49 in self.tree)
+        self.assertFalse(48 in self.tree)
+        self.assertEqual(list(BSTree()), [])
+
+    def testTraversals(self):
+        '''Verify the pre-order, post-order and level-order traversals.'''
+
+        values = lambda nodes: [node.value for node in nodes]
+        self.assertEqual(values(self.tree.pre_order()),
+                         [20, 8, 4, 1, 2, 5, 12, 10, 11, 14, 22, 21, 50, 49,
+                          70, 77])
+        self.assertEqual(values(self.tree.post_order()),
+                         [2, 1, 5, 4, 11, 10, 14, 12, 8, 21, 49, 77, 70, 50,
+                          22, 20])
+        self.assertEqual(values(self.tree.level_order()),
+                         [20, 8, 22, 4, 12, 21, 50, 1, 5, 10, 14, 49, 70, 2,
+                          11, 77])
+        for order in (BSTree.pre_order, BSTree.post_order,
+                      BSTree.level_order):
+            self.assertEqual(list(order(BSTree())), [])
+            self.assertEqual(values(order(BSTree(BTNode(3)))), [3])
+
+    def testLen(self):
+        '''Verify the number of values in the tree and in some subtrees.'''
+
+        self.assertEqual(len(self.tree), 16)
+        self.assertEqual(self.tree.root.left.size, 9)
+        self.tree.insert(20)
+        self.tree.insert(13)
+        self.tree.delete(8)
+        self.tree.delete(100)
+        self.assertEqual(len(self.tree), 16)
+        self.assertEqual(self.tree.root.left.size, 9)
+        self.assertEqual(self.tree.root.left.right.size, 4)
+
+    def testRank(self):
+        '''Verify the number of values less than v.'''
+
+        self.assertEqual(self.tree.rank(1), 0)
+        self.assertEqual(self.tree.rank(0), 0)
+        self.assertEqual(self.tree.rank(20), 9)
+        self.assertEqual(self.tree.rank(13), 8)
+        self.assertEqual(self.tree.rank(77), 15)
+        self.assertEqual(self.tree.rank(100), 16)
+
+    def testSelect(self):
+        '''Verify the i-th smallest value in the tree.'''
+
+        values = [1, 2, 4, 5, 8, 10, 11, 12, 14, 20, 21, 22, 49, 50, 70, 77]
+        for i, val in enumerate(values):
+            self.assertEqual(self.tree.select(i).value, val)
+            self.assertEqual(self.tree.rank(val), i)
+        self.assertEqual(self.tree.select(-1).value, 77)
+        self.assertRaises(IndexError, self.tree.select, 16)
+        self.assertRaises(IndexError, self.tree.select, -17)
+        self.assertRaises(IndexError, BSTree().select, 0)
 
     def testInorderPredecessor(self):
         '''Verify the appropriate inorder predecessor of the given node.'''
@@ -568,6 +725,1028 @@ class HugeTreeTestCase(unittest.TestCase):
                                             right.right), None)
 
 
+class AVLTreeTestCase(unittest.TestCase):
+    '''Test the self-balancing AVL tree.'''
+
+    def setUp(self):
+        '''Insert 1 to 15 in ascending order, which would be a right tree
+        without rebalancing.
+                    15
+                14
+                    13
+            12
+                    11
+                10
+                    9
+        8
+                    7
+                6
+                    5
+            4
+                    3
+                2
+                    1
+        '''
+
+        self.tree = AVLTree()
+        for val in range(1, 16):
+            self.tree.insert(val)
+
+    def tearDown(self):
+        '''Perform cleanup actions.'''
+
+        pass
+
+    def assertBalanced(self, node):
+        '''Verify parent links, cached heights and the AVL balance condition
+        of every node in the subtree rooted at node. Return its height.'''
+
+        if not node:
+            return 0
+        for child in (node.left, node.right):
+            if child:
+                self.assertIs(child.parent, node)
+        left = self.assertBalanced(node.left)
+        right = self.assertBalanced(node.right)
+        self.assertEqual(node.ht, 1 + max(left, right))
+        self.assertEqual(node.size, 1 + (node.left.size if node.left else 0)
+                         + (node.right.size if node.right else 0))
+        self.assertLessEqual(abs(left - right), 1)
+        return node.ht
+
+    def testTreeRoot(self):
+        '''Verify that 8 is the root of the tree.'''
+
+        self.assertEqual(self.tree.root.value, 8)
+        self.assertEqual(self.tree.root.parent, None)
+
+    def testHeight(self):
+        '''Verify the height of the tree is 4.'''
+
+        self.assertEqual(self.tree.height(), 4)
+        self.assertEqual(self.tree.root.height(), 4)
+
+    def testBalanced(self):
+        '''Verify that the tree is balanced after descending inserts.'''
+
+        tree = AVLTree()
+        for val in range(100, 0, -1):
+            tree.insert(val)
+        self.assertBalanced(tree.root)
+        self.assertEqual(tree.height(), 7)
+
+    def testSearch(self):
+        '''Verify if value v exists in the tree.'''
+
+        self.assertEqual(self.tree.search(20), None)
+        self.assertEqual(self.tree.search(8), self.tree.root)
+        self.assertEqual(self.tree.search(13), self.tree.root.right.right.left)
+
+    def testDelete(self):
+        '''Verify that the tree stays balanced while deleting.'''
+
+        self.tree.delete(20)
+        self.assertEqual(self.tree.search(8), self.tree.root)
+        self.tree.delete(8)
+        self.assertEqual(self.tree.search(8), None)
+        self.assertEqual(self.tree.root.value, 9)
+        for val in [1, 2, 3, 4, 5, 6, 7]:
+            self.tree.delete(val)
+            self.assertEqual(self.tree.search(val), None)
+            self.assertBalanced(self.tree.root)
+        self.assertEqual(self.tree.height(), 3)
+        for val in range(9, 16):
+            self.tree.delete(val)
+        self.assertEqual(self.tree.root, None)
+        self.assertEqual(self.tree.height(), 0)
+
+    def testInorderSuccessor(self):
+        '''Verify the in-order neighbours still work after rotations.'''
+
+        node = self.tree.search(1)
+        for val in range(2, 16):
+            node = in_order_successor(node)
+            self.assertEqual(node.value, val)
+        self.assertEqual(in_order_successor(node), None)
+
+
+class SplayTreeTestCase(unittest.TestCase):
+    '''Test the splay tree.'''
+
+    def setUp(self):
+        '''Insert 1 to 15 in ascending order. Each new node is splayed to
+        the root, which leaves a left tree.
+        15
+            14
+                13
+                    ...
+        '''
+
+        self.tree = SplayTree()
+        for val in range(1, 16):
+            self.tree.insert(val)
+
+    def tearDown(self):
+        '''Perform cleanup actions.'''
+
+        pass
+
+    def assertLinked(self, node):
+        '''Verify parent links and cached heights and sizes of every node
+        in the subtree rooted at node. Return its height.'''
+
+        if not node:
+            return 0
+        for child in (node.left, node.right):
+            if child:
+                self.assertIs(child.parent, node)
+        left = self.assertLinked(node.left)
+        right = self.assertLinked(node.right)
+        self.assertEqual(node.ht, 1 + max(left, right))
+        self.assertEqual(node.size, 1 + (node.left.size if node.left else 0)
+                         + (node.right.size if node.right else 0))
+        return node.ht
+
+    def testInsert(self):
+        '''Verify that inserted nodes are splayed to the root.'''
+
+        self.assertEqual(self.tree.root.value, 15)
+        self.assertEqual(self.tree.height(), 15)
+        self.assertEqual(self.tree.insert(7).value, 7)
+        self.assertEqual(self.tree.root.value, 7)
+        self.assertEqual(self.tree.root.parent, None)
+        self.assertLinked(self.tree.root)
+        self.assertEqual(list(self.tree), list(range(1, 16)))
+
+    def testSearch(self):
+        '''Verify that a search splays the node found and roughly halves
+        the depth of the path to it.'''
+
+        self.assertEqual(self.tree.search(1).value, 1)
+        self.assertEqual(self.tree.root.value, 1)
+        self.assertEqual(self.tree.height(), 9)
+        self.assertLinked(self.tree.root)
+        self.assertEqual(self.tree.search(100), None)
+        self.assertEqual(self.tree.root.value, 15)
+        self.assertEqual(self.tree.search(8).value, 8)
+        self.assertLinked(self.tree.root)
+        self.assertEqual(list(self.tree), list(range(1, 16)))
+        self.assertEqual(SplayTree().search(1), None)
+
+    def testDelete(self):
+        '''Verify that delete still works on a splayed tree.'''
+
+        for val in (3, 12, 6, 9):
+            self.tree.search(val)
+        for val in range(1, 16, 2):
+            self.tree.delete(val)
+        self.assertLinked(self.tree.root)
+        self.assertEqual(list(self.tree), list(range(2, 16, 2)))
+
+    def testDeleteSplays(self):
+        '''Verify that delete splays the node it deletes, so deleting the
+        deepest node does not leave the rest of the path behind.'''
+
+        self.tree.delete(1)
+        self.assertEqual(self.tree.height(), 8)
+        self.assertLinked(self.tree.root)
+        self.tree.delete(100)
+        self.assertEqual(self.tree.root.value, 15)
+        self.assertEqual(list(self.tree), list(range(2, 16)))
+        tree = SplayTree()
+        for val in range(2000):
+            tree.insert(val)
+        for val in range(2000):
+            tree.delete(val)
+        self.assertEqual(tree.root, None)
+
+    def testAggregate(self):
+        '''Verify that aggregates survive splaying.'''
+
+        tree = SplayTree(monoid=SUM)
+        for val in (5, 1, 9, 3, 7):
+            tree.insert(val)
+        tree.search(3)
+        tree.search(8)
+        self.assertEqual(tree.aggregate_range(2, 8), 15)
+        self.assertEqual(tree.root.agg, 25)
+        self.assertEqual(tree.rank(7), 3)
+
+
+class ScapegoatTreeTestCase(unittest.TestCase):
+    '''Test the scapegoat tree.'''
+
+    def setUp(self):
+        '''Insert 1 to 1000 in ascending order, which would be a right tree
+        of height 1000 without rebuilding.'''
+
+        self.tree = ScapegoatTree()
+        self.nodes = [self.tree.insert(val) for val in range(1, 1001)]
+
+    def tearDown(self):
+        '''Perform cleanup actions.'''
+
+        pass
+
+    def assertLinked(self, node):
+        '''Verify parent links and the order of every node in the subtree
+        rooted at node, and that none caches a height or size. Return its
+        size.'''
+
+        if not node:
+            return 0
+        for child in (node.left, node.right):
+            if child:
+                self.assertIs(child.parent, node)
+        if node.left:
+            self.assertLess(node.left.value, node.value)
+        if node.right:
+            self.assertLess(node.value, node.right.value)
+        self.assertFalse(hasattr(node, 'ht') or hasattr(node, 'size'))
+        return 1 + self.assertLinked(node.left) + self.assertLinked(node.right)
+
+    def testInsert(self):
+        '''Verify that sorted input stays within the scapegoat height
+        bound, made of the same lean nodes.'''
+
+        self.assertEqual(self.assertLinked(self.tree.root), 1000)
+        self.assertEqual(len(self.tree), 1000)
+        self.assertEqual(self.tree.root.parent, None)
+        self.assertLessEqual(self.tree.height(), 18)
+        self.assertEqual(self.tree.root.height(), self.tree.height())
+        self.assertEqual(list(self.tree), list(range(1, 1001)))
+        self.assertIs(type(self.tree.root), ScapegoatNode)
+        self.assertEqual(ScapegoatNode.__slots__,
+                         ('value', 'left', 'right', 'parent'))
+        self.assertEqual([node.value for node in self.nodes],
+                         list(range(1, 1001)))
+        self.assertIs(self.tree.insert(500), self.nodes[499])
+        self.assertEqual(self.tree.max_size, 1000)
+
+    def testDelete(self):
+        '''Verify that deleting most of the tree rebuilds it.'''
+
+        for val in range(1, 901):
+            self.tree.delete(val)
+        self.assertEqual(self.assertLinked(self.tree.root), 100)
+        self.assertEqual(len(self.tree), 100)
+        self.assertEqual(list(self.tree), list(range(901, 1001)))
+        self.assertLessEqual(self.tree.max_size, 150)
+        self.assertLessEqual(self.tree.height(), 12)
+        for val in range(901, 1001):
+            self.tree.delete(val)
+        self.assertEqual(self.tree.root, None)
+        self.assertEqual(self.tree.max_size, 0)
+
+    def testMapping(self):
+        '''Verify that payloads and aggregates survive rebuilds.'''
+
+        tree = ScapegoatTree(mapping=True)
+        for val in range(100):
+            tree[val] = -val
+        self.assertEqual(tree[37], -37)
+        tree = ScapegoatTree.from_sorted(range(100), monoid=SUM)
+        self.assertEqual(tree.max_size, 100)
+        for val in range(100, 200):
+            tree.insert(val)
+        self.assertEqual(tree.aggregate_range(), sum(range(200)))
+        self.assertLessEqual(tree.height(), 14)
+
+    def testOrderQueries(self):
+        '''Verify rank, select and count_range, which walk the tree.'''
+
+        self.assertEqual(self.tree.rank(500), 499)
+        self.assertEqual(self.tree.rank(0), 0)
+        self.assertEqual(self.tree.select(0).value, 1)
+        self.assertEqual(self.tree.select(899).value, 900)
+        self.assertEqual(self.tree.select(-1).value, 1000)
+        self.assertRaises(IndexError, self.tree.select, 1000)
+        self.assertEqual(self.tree.count_range(10, 20, (False, True)), 10)
+        self.assertEqual(self.tree.count_range(), 1000)
+
+    def testSetOperations(self):
+        '''Verify that split, join, delete_range and the set operations
+        rebuild lean trees and keep their sizes.'''
+
+        removed = self.tree.delete_range(101, 900, detach=True)
+        self.assertEqual(len(removed), 800)
+        self.assertEqual(self.assertLinked(removed.root), 800)
+        self.assertEqual(len(self.tree), 200)
+        self.assertEqual(self.tree.max_size, 200)
+        self.tree.truncate_above(950)
+        less, found, more = split(self.tree, 50)
+        self.assertEqual(found.value, 50)
+        self.assertEqual((len(less), len(more)), (49, 100))
+        tree = join(less, 50, more)
+        self.assertEqual(len(less), 0)
+        self.assertEqual(list(tree), list(range(1, 101)) +
+                         list(range(901, 951)))
+        tree = union(tree, removed)
+        self.assertEqual(len(tree), 950)
+        self.assertEqual(self.assertLinked(tree.root), 950)
+        tree = difference(tree, ScapegoatTree.from_sorted(range(0, 1000, 2)))
+        self.assertEqual(list(tree), list(range(1, 951, 2)))
+        self.assertEqual(len(intersection(tree, ScapegoatTree())), 0)
+        self.assertRaises(TypeError, union, tree, BSTree())
+
+
+class TreapTreeTestCase(unittest.TestCase):
+    '''Test the randomized treap.'''
+
+    def setUp(self):
+        '''Insert 1 to 100 in ascending order, which would be a right tree
+        of height 100 without the random priorities.'''
+
+        random.seed(15)
+        self.tree = TreapTree()
+        for val in range(1, 101):
+            self.tree.insert(val)
+
+    def tearDown(self):
+        '''Perform cleanup actions.'''
+
+        pass
+
+    def assertTreap(self, node):
+        '''Verify parent links, cached heights and sizes and the heap
+        property of every node in the subtree rooted at node. Return its
+        height.'''
+
+        if not node:
+            return 0
+        for child in (node.left, node.right):
+            if child:
+                self.assertIs(child.parent, node)
+                self.assertGreaterEqual(node.priority, child.priority)
+        left = self.assertTreap(node.left)
+        right = self.assertTreap(node.right)
+        self.assertEqual(node.ht, 1 + max(left, right))
+        self.assertEqual(node.size, 1 + (node.left.size if node.left else 0)
+                         + (node.right.size if node.right else 0))
+        return node.ht
+
+    def testInsert(self):
+        '''Verify that sorted input gives a valid, shallow treap.'''
+
+        self.assertEqual(self.tree.root.parent, None)
+        self.assertTreap(self.tree.root)
+        self.assertLess(self.tree.height(), 25)
+        self.assertEqual(list(self.tree), list(range(1, 101)))
+        node = self.tree.search(50)
+        self.assertIs(self.tree.insert(50), node)
+        self.assertEqual(len(self.tree), 100)
+
+    def testDelete(self):
+        '''Verify that delete keeps a valid treap.'''
+
+        for val in list(range(1, 101, 3)) + [0, 1000]:
+            self.tree.delete(val)
+            self.assertTreap(self.tree.root)
+        self.assertEqual(list(self.tree),
+                         [val for val in range(1, 101) if val % 3 != 1])
+        for val in range(1, 101):
+            self.tree.delete(val)
+        self.assertEqual(self.tree.root, None)
+
+    def testFromSorted(self):
+        '''Verify that a treap built in bulk keeps the heap property.'''
+
+        tree = TreapTree.from_sorted(range(1000))
+        self.assertTreap(tree.root)
+        self.assertEqual(tree.height(), 10)
+        tree.insert(1000)
+        tree.delete(500)
+        self.assertTreap(tree.root)
+
+    def testMapping(self):
+        '''Verify mapping mode and aggregates on a treap.'''
+
+        tree = TreapTree(mapping=True)
+        for val in range(10):
+            tree[val] = str(val)
+        del tree[4]
+        self.assertTrue(isinstance(tree.root, TreapMapNode))
+        self.assertEqual(tree[5], '5')
+        self.assertEqual(list(tree.items())[3:5], [(3, '3'), (5, '5')])
+        tree = TreapTree(monoid=SUM)
+        for val in range(10):
+            tree.insert(val)
+        tree.delete(4)
+        self.assertEqual(tree.aggregate_range(2, 6), 16)
+        self.assertEqual(tree.root.agg, 41)
+
+    def testDeleteRange(self):
+        '''Verify that delete_range and truncate keep valid treaps.'''
+
+        removed = self.tree.delete_range(10, 20, (False, True), True)
+        self.assertEqual(list(removed), list(range(11, 21)))
+        self.assertTrue(isinstance(removed, TreapTree))
+        self.tree.truncate_below(5)
+        self.tree.truncate_above(90, True)
+        self.assertEqual(list(self.tree),
+                         list(range(5, 11)) + list(range(21, 91)))
+        self.assertTreap(self.tree.root)
+        self.assertTreap(removed.root)
+
+    def testSetOperations(self):
+        '''Verify that split, join and the set operations keep valid
+        treaps.'''
+
+        other = TreapTree()
+        for val in range(50, 200, 2):
+            other.insert(val)
+        less, found, more = split(self.tree, 50)
+        self.assertEqual(found.value, 50)
+        self.assertEqual((len(less), len(more)), (49, 50))
+        self.assertTreap(less.root)
+        self.assertTreap(more.root)
+        tree = join(less, 50, more)
+        self.assertEqual(list(tree), list(range(1, 101)))
+        self.assertTreap(tree.root)
+        for operation, expected in (
+                (union, list(range(1, 101)) + list(range(102, 200, 2))),
+                (intersection, list(range(50, 101, 2))),
+                (difference, [val for val in range(1, 101)
+                              if val < 50 or val % 2])):
+            tree = operation(TreapTree.from_sorted(range(1, 101)),
+                             TreapTree.from_sorted(range(50, 200, 2)))
+            self.assertEqual(list(tree), expected)
+            self.assertTreap(tree.root)
+        self.assertRaises(TypeError, union, other, AVLTree())
+        self.assertEqual(len(other), 75)
+
+
+class BulkTreeTestCase(unittest.TestCase):
+    '''Test building balanced trees from many values at once.'''
+
+    def setUp(self):
+        '''Build a tree from 1 to 15.
+                    15
+                14
+                    13
+            12
+                    11
+                10
+                    9
+        8
+                    7
+                6
+                    5
+            4
+                    3
+                2
+                    1
+        '''
+
+        self.tree = BSTree.from_sorted(range(1, 16))
+
+    def tearDown(self):
+        '''Perform cleanup actions.'''
+
+        pass
+
+    def testTreeRoot(self):
+        '''Verify that 8 is the root of the tree.'''
+
+        self.assertEqual(self.tree.root.value, 8)
+        self.assertEqual(self.tree.root.parent, None)
+        self.assertEqual(self.tree.root.left.value, 4)
+        self.assertEqual(self.tree.root.right.value, 12)
+
+    def testTreeParent(self):
+        '''Verify the parent links of the tree.'''
+
+        self.assertEqual(self.tree.search(13).parent.value, 14)
+        self.assertEqual(self.tree.search(1).parent.value, 2)
+        self.assertEqual(in_order_successor(self.tree.search(7)).value, 8)
+
+    def testHeight(self):
+        '''Verify the cached height and size of the tree.'''
+
+        self.assertEqual(self.tree.height(), 4)
+        self.assertEqual(len(self.tree), 15)
+        self.assertEqual(self.tree.search(4).height(), 3)
+        self.assertEqual(self.tree.search(4).size, 7)
+
+    def testSorted(self):
+        '''Verify that repeated values are dropped and unsorted values are
+        rejected.'''
+
+        tree = BSTree.from_sorted([1, 1, 2, 3, 3])
+        self.assertEqual(len(tree), 3)
+        self.assertEqual(tree.range(1, 3), [1, 2, 3])
+        self.assertEqual(BSTree.from_sorted([]).root, None)
+        self.assertRaises(ValueError, BSTree.from_sorted, [1, 3, 2])
+
+    def testIterable(self):
+        '''Verify building a tree from values in any order.'''
+
+        tree = AVLTree.from_iterable([9, 3, 5, 1, 7, 3])
+        self.assertTrue(isinstance(tree, AVLTree))
+        self.assertEqual(tree.root.value, 5)
+        self.assertEqual(tree.range(1, 9), [1, 3, 5, 7, 9])
+        for val in [10, 11, 12]:
+            tree.insert(val)
+        self.assertEqual(tree.height(), 4)
+        self.assertEqual(tree.search(11).left.value, 10)
+        self.assertEqual(len(tree), 8)
+
+
+class AggregateTreeTestCase(unittest.TestCase):
+    '''Test counting and aggregating the values in a range.'''
+
+    def setUp(self):
+        '''Build an AVL tree of the even numbers below 100 that keeps sums,
+        and then delete the multiples of 3.'''
+
+        self.values = [val for val in range(0, 100, 2) if val % 3]
+        self.tree = AVLTree(monoid=SUM)
+        for val in range(0, 100, 2):
+            self.tree.insert(val)
+        for val in range(0, 100, 6):
+            self.tree.delete(val)
+
+    def tearDown(self):
+        '''Perform cleanup actions.'''
+
+        pass
+
+    def testCountRange(self):
+        '''Verify the number of values between two bounds.'''
+
+        for lo in range(-1, 101, 7):
+            for hi in range(lo, 101, 5):
+                expected = [val for val in self.values if lo <= val <= hi]
+                self.assertEqual(self.tree.count_range(lo, hi), len(expected))
+        self.assertEqual(self.tree.count_range(), len(self.values))
+        self.assertEqual(self.tree.count_range(4, 8), 2)
+        self.assertEqual(self.tree.count_range(4, 8, (False, True)), 1)
+        self.assertEqual(self.tree.count_range(4, 8, (False, False)), 0)
+        self.assertEqual(self.tree.count_range(hi=10), 4)
+        self.assertEqual(self.tree.count_range(50, 10), 0)
+
+    def testSum(self):
+        '''Verify the sum of the values between two bounds.'''
+
+        for lo in range(-1, 101, 7):
+            for hi in range(lo, 101, 5):
+                expected = [val for val in self.values if lo <= val <= hi]
+                self.assertEqual(self.tree.aggregate_range(lo, hi),
+                                 sum(expected))
+        self.assertEqual(self.tree.aggregate_range(), sum(self.values))
+        self.assertEqual(self.tree.aggregate_range(4, 8, (False, True)), 8)
+        self.assertEqual(self.tree.root.agg, sum(self.values))
+
+    def testMinMax(self):
+        '''Verify the smallest and largest values between two bounds.'''
+
+        low = BSTree.from_iterable(self.values, monoid=MIN)
+        high = BSTree.from_iterable(self.values, monoid=MAX)
+        self.assertEqual(low.aggregate_range(5, 50), 8)
+        self.assertEqual(high.aggregate_range(5, 50), 50)
+        self.assertEqual(high.aggregate_range(5, 50, (True, False)), 46)
+        self.assertEqual(low.aggregate_range(37, 37), float('inf'))
+
+    def testCustom(self):
+        '''Verify that a monoid that is not commutative sees values in
+        order.'''
+
+        tree = BSTree(monoid=Monoid(lambda a, b: a + b, '',
+                                    lambda node: node.value[0]))
+        for val in ['pear', 'apple', 'fig', 'kiwi', 'plum', 'date']:
+            tree.insert(val)
+        self.assertEqual(tree.aggregate_range(), 'adfkpp')
+        self.assertEqual(tree.aggregate_range('b', 'p'), 'dfk')
+        tree.delete('apple')
+        tree.delete('pear')
+        self.assertEqual(tree.aggregate_range(), 'dfkp')
+
+    def testNoMonoid(self):
+        '''Verify that a tree without a monoid cannot aggregate.'''
+
+        self.assertRaises(ValueError, BSTree().aggregate_range, 1, 2)
+
+
+class MappingTreeTestCase(unittest.TestCase):
+    '''Test trees in mapping mode.'''
+
+    def setUp(self):
+        '''Map the first letters of the alphabet to their positions.'''
+
+        self.tree = AVLTree(mapping=True)
+        for i, key in enumerate('hdlbfjnacegikmo'):
+            self.tree[key] = ord(key) - ord('a')
+
+    def tearDown(self):
+        '''Perform cleanup actions.'''
+
+        pass
+
+    def testGetItem(self):
+        '''Verify looking up the payload of a key.'''
+
+        self.assertEqual(self.tree['h'], 7)
+        self.assertEqual(self.tree['a'], 0)
+        self.assertEqual(self.tree.get('o'), 14)
+        self.assertEqual(self.tree.get('z'), None)
+        self.assertEqual(self.tree.get('z', -1), -1)
+        self.assertRaises(KeyError, self.tree.__getitem__, 'z')
+        self.assertEqual(self.tree.search('c').payload, 2)
+
+    def testSetItem(self):
+        '''Verify replacing a payload keeps a single node.'''
+
+        self.tree['h'] = 'eight'
+        self.assertEqual(self.tree['h'], 'eight')
+        self.assertEqual(len(self.tree), 15)
+        self.tree['z'] = 25
+        self.assertEqual(len(self.tree), 16)
+        self.assertEqual(self.tree.height(), 5)
+
+    def testDelItem(self):
+        '''Verify that deleting a key with two children moves the payload
+        of its successor.'''
+
+        del self.tree['h']
+        self.assertEqual(self.tree.root.value, 'i')
+        self.assertEqual(self.tree['i'], 8)
+        self.assertRaises(KeyError, self.tree.__delitem__, 'h')
+        for key in 'bdfjln':
+            del self.tree[key]
+        self.assertEqual(list(self.tree.items()),
+                         [('a', 0), ('c', 2), ('e', 4), ('g', 6), ('i', 8),
+                          ('k', 10), ('m', 12), ('o', 14)])
+
+    def testItems(self):
+        '''Verify the pairs come out in key order.'''
+
+        self.assertEqual([key for key, payload in self.tree.items()],
+                         list('abcdefghijklmno'))
+        self.assertEqual(list(self.tree), list('abcdefghijklmno'))
+
+    def testPlainTree(self):
+        '''Verify that a tree not in mapping mode has no payloads.'''
+
+        tree = BSTree()
+        tree.insert(1)
+        self.assertRaises(TypeError, tree.__setitem__, 1, 'one')
+        self.assertRaises(TypeError, tree.__getitem__, 1)
+        self.assertRaises(TypeError, tree.__delitem__, 1)
+        self.assertRaises(TypeError, tree.items)
+        self.assertEqual(list(tree), [1])
+
+    def testMonoid(self):
+        '''Verify that a mapping can also aggregate its keys.'''
+
+        tree = BSTree(monoid=MAX, mapping=True)
+        for key in [5, 3, 8, 1]:
+            tree[key] = str(key)
+        self.assertEqual(tree.aggregate_range(2, 6), 5)
+        del tree[5]
+        self.assertEqual(tree[8], '8')
+        self.assertEqual(tree.aggregate_range(2, 6), 3)
+
+    def testPayloadMonoid(self):
+        '''Verify that aggregates of payloads follow replaced payloads.'''
+
+        payloads = Monoid(lambda a, b: a + b, 0,
+                          lambda node: node.payload or 0)
+        for cls in (BSTree, AVLTree, SplayTree, TreapTree, ScapegoatTree):
+            tree = cls(monoid=payloads, mapping=True)
+            for key in range(32):
+                tree[key] = 1
+            tree[5] = 100
+            self.assertEqual(tree.aggregate_range(0, 31), 131)
+            self.assertEqual(tree.aggregate_range(6, 31), 26)
+            tree[40] = 9
+            self.assertEqual(tree.aggregate_range(), 140)
+
+
+class SetOperationsTestCase(unittest.TestCase):
+    '''Test split, join and the set operations built on them.'''
+
+    def setUp(self):
+        '''Build AVL trees of the multiples of 2 and of 3 below 200.'''
+
+        self.twos = AVLTree.from_sorted(range(0, 200, 2))
+        self.threes = AVLTree()
+        for val in range(0, 200, 3):
+            self.threes.insert(val)
+
+    def tearDown(self):
+        '''Perform cleanup actions.'''
+
+        pass
+
+    def assertBalanced(self, tree):
+        '''Verify parent links, cached heights and sizes and the AVL
+        balance condition of every node in tree.'''
+
+        for node in tree.post_order():
+            left, right = node.left, node.right
+            for child in (left, right):
+                if child:
+                    self.assertIs(child.parent, node)
+            heights = [child.ht if child else 0 for child in (left, right)]
+            self.assertEqual(node.ht, 1 + max(heights))
+            self.assertLessEqual(abs(heights[0] - heights[1]), 1)
+            self.assertEqual(node.size, 1 + (left.size if left else 0)
+                             + (right.size if right else 0))
+        if tree.root:
+            self.assertEqual(tree.root.parent, None)
+
+    def testSplit(self):
+        '''Verify splitting at a value in the tree and at one that is not.'''
+
+        node = self.twos.search(100)
+        less, found, more = split(self.twos, 100)
+        self.assertIs(found, node)
+        self.assertEqual(list(less), list(range(0, 100, 2)))
+        self.assertEqual(list(more), list(range(102, 200, 2)))
+        self.assertBalanced(less)
+        self.assertBalanced(more)
+        self.assertEqual(self.twos.root, None)
+        self.assertTrue(isinstance(less, AVLTree))
+        less, found, more = split(self.threes, 100)
+        self.assertEqual(found, None)
+        self.assertEqual(len(less), 34)
+        self.assertEqual(len(more), 33)
+
+    def testJoin(self):
+        '''Verify joining trees of very different heights.'''
+
+        small = AVLTree.from_sorted([1, 2])
+        large = AVLTree.from_sorted(range(10, 1000))
+        tree = join(small, 5, large)
+        self.assertEqual(list(tree), [1, 2, 5] + list(range(10, 1000)))
+        self.assertBalanced(tree)
+        tree = join(AVLTree.from_sorted(range(-1000, 0)), 0, AVLTree())
+        self.assertEqual(list(tree), list(range(-1000, 1)))
+        self.assertBalanced(tree)
+
+    def testUnion(self):
+        '''Verify the union of two trees reuses their nodes.'''
+
+        node = self.threes.search(9)
+        tree = union(self.threes, self.twos)
+        self.assertEqual(list(tree), [val for val in range(200)
+                                      if val % 2 == 0 or val % 3 == 0])
+        self.assertIs(tree.search(9), node)
+        self.assertBalanced(tree)
+        self.assertEqual(self.twos.root, None)
+
+    def testIntersection(self):
+        '''Verify the intersection of two trees.'''
+
+        tree = intersection(self.twos, self.threes)
+        self.assertEqual(list(tree), list(range(0, 200, 6)))
+        self.assertBalanced(tree)
+        self.assertEqual(list(intersection(tree, AVLTree())), [])
+
+    def testDifference(self):
+        '''Verify the difference of two trees.'''
+
+        tree = difference(self.twos, self.threes)
+        self.assertEqual(list(tree), [val for val in range(0, 200, 2)
+                                      if val % 3])
+        self.assertBalanced(tree)
+        self.assertEqual(list(difference(AVLTree(), tree)), [])
+
+    def testUnbalanced(self):
+        '''Verify the set operations on plain trees far too high to recurse
+        on, and that their nodes are reused.'''
+
+        for operation, expected in ((union, range(3000)),
+                                    (intersection, []),
+                                    (difference, range(0, 3000, 2))):
+            a, b = BSTree(), BSTree()
+            for val in range(0, 3000, 2):
+                a.insert(val)
+                b.insert(val + 1)
+            node = a.search(2998)
+            tree = operation(a, b)
+            self.assertEqual(list(tree), list(expected))
+            self.assertBalanced(tree)
+            self.assertTrue(isinstance(tree, BSTree))
+            self.assertEqual(a.root, None)
+            self.assertEqual(b.root, None)
+            if expected:
+                self.assertIs(tree.search(2998), node)
+
+    def testUnbalancedFailure(self):
+        '''Verify that a set operation on values that cannot be compared
+        leaves both trees as they were.'''
+
+        a, b = BSTree(), BSTree()
+        for val in range(1500):
+            a.insert(val)
+            b.insert(str(val))
+        self.assertRaises(TypeError, union, a, b)
+        self.assertEqual(list(a), list(range(1500)))
+        self.assertEqual(len(b), 1500)
+
+    def testDeleteRange(self):
+        '''Verify deleting every value between two bounds.'''
+
+        self.twos.delete_range(10, 20)
+        self.assertEqual(list(self.twos.iter_range(hi=30)),
+                         [self.twos.search(val) for val in
+                          [0, 2, 4, 6, 8, 22, 24, 26, 28, 30]])
+        self.assertEqual(len(self.twos), 94)
+        removed = self.twos.delete_range(100, 150, (False, False), True)
+        self.assertEqual(list(removed), list(range(102, 150, 2)))
+        self.assertTrue(isinstance(removed, AVLTree))
+        self.assertEqual(self.twos.count_range(100, 150), 2)
+        self.assertBalanced(self.twos)
+        self.assertBalanced(removed)
+        self.assertEqual(self.twos.delete_range(300, 400, detach=True).root,
+                         None)
+        self.twos.delete_range()
+        self.assertEqual(self.twos.root, None)
+
+    def testEmptyRange(self):
+        '''Verify that deleting an empty range deletes nothing.'''
+
+        for cls in (BSTree, AVLTree, SplayTree):
+            tree = cls.from_sorted(range(10))
+            self.assertEqual(list(tree.delete_range(3, 3, (True, False),
+                                                    True)), [])
+            self.assertEqual(list(tree.delete_range(5, 3, detach=True)), [])
+            self.assertEqual(list(tree), list(range(10)))
+
+    def testTruncate(self):
+        '''Verify cutting off the values below and above a bound.'''
+
+        removed = self.threes.truncate_below(99, True)
+        self.assertEqual(list(removed), list(range(0, 99, 3)))
+        self.assertEqual(self.threes.select(0).value, 99)
+        self.threes.truncate_above(150)
+        self.assertEqual(list(self.threes), list(range(99, 151, 3)))
+        self.assertBalanced(self.threes)
+        self.assertBalanced(removed)
+
+    def testMapping(self):
+        '''Verify that payloads and aggregates survive a union.'''
+
+        a = AVLTree(monoid=SUM, mapping=True)
+        b = AVLTree(monoid=SUM, mapping=True)
+        for key in range(10):
+            a[key] = 'a'
+            b[key + 5] = 'b'
+        tree = union(a, b)
+        self.assertEqual(tree[4], 'a')
+        self.assertEqual(tree[5], 'a')
+        self.assertEqual(tree[14], 'b')
+        self.assertEqual(tree.aggregate_range(), sum(range(15)))
+
+
+class PersistentTreeTestCase(unittest.TestCase):
+    '''Test the path-copying persistent tree and its snapshots.'''
+
+    def setUp(self):
+        '''Insert 1 to 15 in ascending order.'''
+
+        self.tree = PersistentBSTree()
+        for val in range(1, 16):
+            self.tree.insert(val)
+
+    def tearDown(self):
+        '''Perform cleanup actions.'''
+
+        pass
+
+    def assertBalanced(self, node):
+        '''Verify cached heights and sizes and the AVL balance condition of
+        every node in the subtree rooted at node. Return its height.'''
+
+        if not node:
+            return 0
+        left = self.assertBalanced(node.left)
+        right = self.assertBalanced(node.right)
+        self.assertEqual(node.ht, 1 + max(left, right))
+        self.assertLessEqual(abs(left - right), 1)
+        self.assertEqual(node.size, 1 + (node.left.size if node.left else 0)
+                         + (node.right.size if node.right else 0))
+        return node.ht
+
+    def testTreeRoot(self):
+        '''Verify that the tree is balanced and has no parent links.'''
+
+        self.assertEqual(self.tree.root.value, 8)
+        self.assertEqual(self.tree.height(), 4)
+        self.assertEqual(len(self.tree), 15)
+        self.assertFalse(hasattr(self.tree.root, 'parent'))
+        self.assertBalanced(self.tree.root)
+
+    def testSnapshot(self):
+        '''Verify that a snapshot does not see later changes.'''
+
+        snapshot = self.tree.snapshot()
+        for val in range(16, 100):
+            self.tree.insert(val)
+        for val in range(1, 50, 2):
+            self.tree.delete(val)
+        self.assertEqual(list(snapshot), list(range(1, 16)))
+        self.assertEqual(snapshot.height(), 4)
+        self.assertEqual(list(self.tree), list(range(2, 50, 2)) +
+                         list(range(50, 100)))
+        self.assertBalanced(self.tree.root)
+        snapshot.delete(8)
+        self.assertTrue(8 in self.tree)
+        self.assertFalse(8 in snapshot)
+
+    def testSharing(self):
+        '''Verify that an insert copies only the path it changes.'''
+
+        old = self.tree.root
+        node = self.tree.search(1)
+        self.tree.insert(16)
+        self.assertIsNot(self.tree.root, old)
+        self.assertIs(self.tree.root.left, old.left)
+        self.assertIs(self.tree.search(1), node)
+        before = self.tree.root
+        self.tree.insert(16)
+        self.tree.delete(100)
+        self.assertIs(self.tree.root, before)
+
+    def testQueries(self):
+        '''Verify the read-only queries shared with BSTree.'''
+
+        self.assertEqual(self.tree.search(13).value, 13)
+        self.assertEqual(self.tree.search(20), None)
+        self.assertEqual(self.tree.rank(10), 9)
+        self.assertEqual(self.tree.select(3).value, 4)
+        self.assertEqual(self.tree.count_range(3, 7), 5)
+        self.assertEqual([node.value for node in self.tree.iter_range(6, 9)],
+                         [6, 7, 8, 9])
+        self.assertEqual(list(reversed(self.tree)), list(range(15, 0, -1)))
+        self.assertEqual([node.value for node in self.tree.pre_order()][:5],
+                         [8, 4, 2, 1, 3])
+        self.assertEqual([node.value for node in self.tree.post_order()],
+                         [1, 3, 2, 5, 7, 6, 4, 9, 11, 10, 13, 15, 14, 12, 8])
+        self.assertEqual(list(PersistentBSTree().post_order()), [])
+
+    def testDeleteRange(self):
+        '''Verify that delete_range and truncate copy paths and leave
+        snapshots unchanged.'''
+
+        snapshot = self.tree.snapshot()
+        removed = self.tree.delete_range(4, 9, (False, True), True)
+        self.assertEqual(list(removed), [5, 6, 7, 8, 9])
+        self.assertTrue(isinstance(removed, PersistentBSTree))
+        self.assertEqual(list(self.tree), [1, 2, 3, 4] + list(range(10, 16)))
+        self.tree.truncate_above(12)
+        self.tree.truncate_below(2)
+        self.assertEqual(list(self.tree), [2, 3, 4, 10, 11, 12])
+        self.assertBalanced(self.tree.root)
+        self.assertBalanced(removed.root)
+        self.assertEqual(list(snapshot), list(range(1, 16)))
+
+    def testSetOperations(self):
+        '''Verify split, join and the set operations on persistent trees,
+        which are left unchanged.'''
+
+        other = PersistentBSTree.from_iterable(range(10, 40, 3))
+        less, found, more = split(self.tree, 8)
+        self.assertEqual(list(less), list(range(1, 8)))
+        self.assertEqual(found.value, 8)
+        self.assertEqual(list(more), list(range(9, 16)))
+        self.assertEqual(list(join(less, 8, more)), list(range(1, 16)))
+        self.assertEqual(list(union(self.tree, other)),
+                         list(range(1, 16)) + list(range(16, 40, 3)))
+        self.assertEqual(list(intersection(self.tree, other)), [10, 13])
+        self.assertEqual(list(difference(other, self.tree)),
+                         list(range(16, 40, 3)))
+        for tree in (union(self.tree, other), split(other, 20)[0]):
+            self.assertTrue(isinstance(tree, PersistentBSTree))
+            self.assertBalanced(tree.root)
+        self.assertEqual(list(self.tree), list(range(1, 16)))
+        self.assertEqual(len(other), 10)
+
+    def testMixedTrees(self):
+        '''Verify that combining a persistent tree with a relinked one
+        raises TypeError and changes neither.'''
+
+        avl = AVLTree.from_sorted(range(20, 30))
+        self.assertRaises(TypeError, union, self.tree, avl)
+        self.assertRaises(TypeError, difference, avl, self.tree)
+        self.assertRaises(TypeError, join, avl, 50, self.tree)
+        self.assertEqual(len(avl), 10)
+        self.assertEqual(len(self.tree), 15)
+        self.assertRaises(TypeError, union, avl, [1, 2])
+        self.assertRaises(TypeError, split, [1, 2], 1)
+
+    def testDelete(self):
+        '''Verify deleting everything in several orders.'''
+
+        tree = PersistentBSTree.from_iterable(range(100))
+        self.assertBalanced(tree.root)
+        for val in list(range(0, 100, 3)) + list(range(99, -1, -1)):
+            tree.delete(val)
+            self.assertBalanced(tree.root)
+        self.assertEqual(tree.root, None)
+
+
 def empty_tree_suite():
     """Return the sample test suite."""
 
@@ -603,6 +1782,60 @@ def huge_suite():
 
     return unittest.TestLoader().loadTestsFromTestCase(HugeTreeTestCase)
 
+
+def avl_suite():
+    '''Return the AVL tree test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(AVLTreeTestCase)
+
+
+def splay_suite():
+    '''Return the splay tree test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(SplayTreeTestCase)
+
+
+def scapegoat_suite():
+    '''Return the scapegoat tree test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(ScapegoatTreeTestCase)
+
+
+def treap_suite():
+    '''Return the treap test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(TreapTreeTestCase)
+
+
+def aggregate_suite():
+    '''Return the range aggregate test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(AggregateTreeTestCase)
+
+
+def mapping_suite():
+    '''Return the mapping mode test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(MappingTreeTestCase)
+
+
+def set_operations_suite():
+    '''Return the split, join and set operations test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(SetOperationsTestCase)
+
+
+def persistent_suite():
+    '''Return the persistent tree test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(PersistentTreeTestCase)
+
+
+def bulk_suite():
+    '''Return the bulk construction test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(BulkTreeTestCase)
+
 if __name__ == '__main__':
     # go!
     runner = unittest.TextTestRunner()
@@ -612,3 +1845,12 @@ if __name__ == '__main__':
     runner.run(left_tree_suite())
     runner.run(one_node_suite())
     runner.run(huge_suite())
+    runner.run(avl_suite())
+    runner.run(splay_suite())
+    runner.run(scapegoat_suite())
+    runner.run(treap_suite())
+    runner.run(bulk_suite())
+    runner.run(aggregate_suite())
+    runner.run(mapping_suite())
+    runner.run(set_operations_suite())
+    runner.run(persistent_suite())
@@ -0,0 +1,135 @@
+'''
+    Array-backed Binary Search Tree TestCase
+
+    Verify that ArrayBSTree behaves like BSTree
+
+    test_bst_array.py
+'''
+
+
+import unittest
+from bst import *
+from bst_array import *
+
+
+class ArrayTreeTestCase(unittest.TestCase):
+    '''Test the array-backed tree on the huge tree from test_bst.py.'''
+
+    def setUp(self):
+        '''Generate a tree to test.
+                          77
+                      70
+                  50
+                      49
+              22
+                  21
+          20
+                      14
+                  12
+                          11
+                      10
+              8
+                      5
+                  4
+                          2
+                      1
+        '''
+
+        self.values = [20, 8, 22, 4, 12, 21, 50, 10, 14, 11, 49, 1, 70, 2,
+                       5, 77]
+        self.tree = ArrayBSTree()
+        self.reference = BSTree()
+        for val in self.values:
+            self.tree.insert(val)
+            self.reference.insert(val)
+
+    def tearDown(self):
+        '''Perform cleanup actions.'''
+
+        pass
+
+    def testTreeRoot(self):
+        '''Verify that 20 is the root of the tree.'''
+
+        self.assertEqual(self.tree.root.value, 20)
+        self.assertEqual(self.tree.root.parent, None)
+        self.assertEqual(ArrayBSTree().root, None)
+
+    def testTreeShape(self):
+        '''Verify the children and parents of some nodes.'''
+
+        self.assertEqual(self.tree.root.left.value, 8)
+        self.assertEqual(self.tree.root.left.is_left_child(), True)
+        self.assertEqual(self.tree.root.right.is_right_child(), True)
+        self.assertEqual(self.tree.root.left.left.right.parent.value, 4)
+        self.assertEqual(self.tree.root.right.left.is_leaf(), True)
+
+    def testHeight(self):
+        '''Verify the height of the tree and the depth of a node.'''
+
+        self.assertEqual(self.tree.height(), 5)
+        self.assertEqual(ArrayBSTree().height(), 0)
+        self.assertEqual(self.tree.search(77).depth(), 5)
+
+    def testSearch(self):
+        '''Verify if value v exists in the tree.'''
+
+        self.assertEqual(self.tree.search(100), None)
+        self.assertEqual(self.tree.search(20), self.tree.root)
+        self.assertEqual(self.tree.search(50), self.tree.root.right.right)
+
+    def testRange(self):
+        '''Verify that range gives the same values as BSTree.range.'''
+
+        for v_start, v_end in [(11, 49), (20, 77), (2, 14), (8, 22)]:
+            self.assertEqual(self.tree.range(v_start, v_end),
+                             self.reference.range(v_start, v_end))
+
+    def testDelete(self):
+        '''Verify that deleted slots are reused.'''
+
+        self.tree.delete(8)
+        self.tree.delete(20)
+        self.tree.delete(100)
+        self.assertEqual(self.tree.search(8), None)
+        self.assertEqual(self.tree.range(1, 77),
+                         [1, 2, 4, 5, 10, 11, 12, 14, 21, 22, 49, 50, 70, 77])
+        self.tree.insert(8)
+        self.tree.insert(20)
+        self.assertEqual(len(self.tree.keys), len(self.values))
+        self.assertEqual(self.tree.range(1, 77), sorted(self.values))
+        for val in self.values:
+            self.tree.delete(val)
+        self.assertEqual(self.tree.root, None)
+
+    def testInsert(self):
+        '''Verify that insert returns a handle on the node holding the
+        value, whether it is new or already in the tree.'''
+
+        node = self.tree.insert(13)
+        self.assertEqual(node.value, 13)
+        self.assertEqual(node.parent.value, 14)
+        self.assertEqual(node, self.tree.search(13))
+        self.assertEqual(self.tree.insert(13), node)
+        self.assertEqual(self.tree.insert(20), self.tree.root)
+        self.assertEqual(ArrayBSTree().insert(1).value, 1)
+
+    def testNeighbours(self):
+        '''Verify that handles work with the neighbour functions.'''
+
+        self.assertEqual(in_order_successor(self.tree.root).value, 21)
+        self.assertEqual(in_order_predecessor(self.tree.root).value, 14)
+        self.assertEqual(in_order_predecessor(self.tree.search(1)), None)
+        self.assertEqual(in_order_successor(self.tree.search(77)), None)
+        self.assertEqual(in_order_successor(self.tree.search(14)).value, 20)
+
+
+def array_tree_suite():
+    '''Return the array-backed tree test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(ArrayTreeTestCase)
+
+if __name__ == '__main__':
+    # go!
+    runner = unittest.TextTestRunner()
+    runner.run(array_tree_suite())
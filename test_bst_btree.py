@@ -0,0 +1,167 @@
+'''
+    B+ Tree TestCase
+
+    Verify that BPlusTree behaves like BSTree and keeps the B+ tree shape
+
+    test_bst_btree.py
+'''
+
+
+import random
+import unittest
+from bst import *
+from bst_btree import *
+
+
+class BPlusTreeTestCase(unittest.TestCase):
+    '''Test a B+ tree of order 4, small enough to split and merge often.'''
+
+    def setUp(self):
+        '''Insert 0 to 199 in a shuffled order.'''
+
+        random.seed(21)
+        self.values = list(range(200))
+        random.shuffle(self.values)
+        self.tree = BPlusTree(order=4)
+        for val in self.values:
+            self.tree.insert(val)
+
+    def tearDown(self):
+        '''Perform cleanup actions.'''
+
+        pass
+
+    def assertShape(self, tree):
+        '''Verify node fill, separators, equal leaf depth and leaf links of
+        tree.'''
+
+        leaves = []
+
+        def check(node, lo, hi, depth, root):
+            keys = node.keys
+            self.assertEqual(keys, sorted(keys))
+            for key in keys:
+                self.assertTrue(lo is None or lo <= key)
+                self.assertTrue(hi is None or key < hi)
+            if node.leaf:
+                self.assertLessEqual(len(keys), tree.order)
+                if not root:
+                    self.assertGreaterEqual(len(keys), tree.order // 2)
+                leaves.append((node, depth))
+                return
+            self.assertEqual(len(node.children), len(keys) + 1)
+            self.assertLessEqual(len(node.children), tree.order)
+            self.assertGreaterEqual(len(node.children),
+                                    2 if root else (tree.order + 1) // 2)
+            bounds = [lo] + keys + [hi]
+            for i, child in enumerate(node.children):
+                check(child, bounds[i], bounds[i + 1], depth + 1, False)
+
+        check(tree.root, None, None, 1, True)
+        self.assertEqual(len(set(depth for leaf, depth in leaves)), 1)
+        self.assertEqual(leaves[0][1], tree.height())
+        for (left, d), (right, e) in zip(leaves, leaves[1:]):
+            self.assertIs(left.next, right)
+            self.assertIs(right.prev, left)
+        self.assertEqual(sum(len(leaf.keys) for leaf, d in leaves),
+                         len(tree))
+
+    def testInsert(self):
+        '''Verify the shape and the values after shuffled inserts.'''
+
+        self.assertShape(self.tree)
+        self.assertEqual(list(self.tree), list(range(200)))
+        self.assertEqual(list(reversed(self.tree)), list(range(199, -1, -1)))
+        self.assertEqual(len(self.tree), 200)
+        self.tree.insert(50)
+        self.assertEqual(len(self.tree), 200)
+        self.assertRaises(ValueError, BPlusTree, 2)
+
+    def testSearch(self):
+        '''Verify search and in.'''
+
+        self.assertTrue(50 in self.tree.search(50).keys)
+        self.assertEqual(self.tree.search(200), None)
+        self.assertEqual(self.tree.search(-1), None)
+        self.assertTrue(199 in self.tree)
+        self.assertFalse(1.5 in self.tree)
+        self.assertEqual(BPlusTree().search(1), None)
+
+    def testRange(self):
+        '''Verify range and iter_range against AVLTree.'''
+
+        reference = AVLTree.from_sorted(range(200))
+        for lo, hi in [(10, 20), (-5, 3), (195, 300), (7, 7), (8, 2)]:
+            self.assertEqual(self.tree.range(lo, hi),
+                             list(range(max(lo, 0), min(hi, 199) + 1)))
+            for inclusive in [(False, False), (True, False), (False, True)]:
+                self.assertEqual(
+                    list(self.tree.iter_range(lo, hi, inclusive)),
+                    [n.value for n in reference.iter_range(lo, hi,
+                                                           inclusive)])
+        self.assertEqual(list(self.tree.iter_range(hi=3)), [0, 1, 2, 3])
+        self.assertEqual(list(self.tree.iter_range(197)), [197, 198, 199])
+
+    def testDelete(self):
+        '''Verify the shape after deleting in a shuffled order.'''
+
+        random.shuffle(self.values)
+        for i, val in enumerate(self.values):
+            self.tree.delete(val)
+            self.tree.delete(val)
+            if i % 10 == 0:
+                self.assertShape(self.tree)
+                self.assertEqual(list(self.tree),
+                                 sorted(self.values[i + 1:]))
+        self.assertEqual(len(self.tree), 0)
+        self.assertEqual(list(self.tree), [])
+        self.assertEqual(self.tree.height(), 1)
+
+    def testFromSorted(self):
+        '''Verify bulk loading for several sizes and orders.'''
+
+        for order in (3, 4, 5, 64):
+            for n in (0, 1, 2, 3, 5, 17, 100, 1000):
+                tree = BPlusTree.from_sorted(range(n), order)
+                self.assertShape(tree)
+                self.assertEqual(list(tree), list(range(n)))
+                tree.insert(n)
+                tree.delete(0)
+                self.assertShape(tree)
+        self.assertRaises(ValueError, BPlusTree.from_sorted, [2, 1])
+        self.assertEqual(list(BPlusTree.from_sorted([1, 1, 2])), [1, 2])
+
+    def testMapping(self):
+        '''Verify the dictionary methods.'''
+
+        tree = BPlusTree(order=4, mapping=True)
+        for val in self.values:
+            tree[val] = -val
+        for val in range(0, 200, 2):
+            del tree[val]
+        tree[1] = 'one'
+        tree.insert(3)
+        self.assertShape(tree)
+        self.assertEqual(tree[1], 'one')
+        self.assertEqual(tree[3], -3)
+        self.assertEqual(tree.get(2, 'none'), 'none')
+        self.assertRaises(KeyError, tree.__getitem__, 2)
+        self.assertRaises(KeyError, tree.__delitem__, 2)
+        self.assertEqual(list(tree.items())[:3], [(1, 'one'), (3, -3),
+                                                  (5, -5)])
+        self.assertRaises(TypeError, self.tree.get, 1)
+        tree = BPlusTree.from_sorted(range(10), mapping=True)
+        tree[4] = 'four'
+        self.assertEqual(tree.get(4), 'four')
+        self.assertEqual(tree.get(5), None)
+
+
+def btree_suite():
+    '''Return the B+ tree test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(BPlusTreeTestCase)
+
+if __name__ == '__main__':
+    # go!
+    runner = unittest.TextTestRunner()
+    runner.run(btree_suite())
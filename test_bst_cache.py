@@ -0,0 +1,137 @@
+'''
+    Cached Binary Search Tree TestCase
+
+    Verify that CachedBSTree answers like the tree it caches, however it is
+    changed
+
+    test_bst_cache.py
+'''
+
+
+import random
+import unittest
+from bst import *
+from bst_cache import *
+from bst_cache import _value
+
+
+class CachedTreeTestCase(unittest.TestCase):
+    '''Test the cached tree against the tree it wraps.'''
+
+    def setUp(self):
+        '''Cache a tree of the even numbers below 100.'''
+
+        self.tree = CachedBSTree(BSTree.from_sorted(range(0, 100, 2)), 64)
+
+    def tearDown(self):
+        '''Perform cleanup actions.'''
+
+        pass
+
+    def assertAnswers(self, cached, queries):
+        '''Verify that cached gives the same search, floor and ceiling
+        answers as its tree for each of queries.'''
+
+        tree = cached.tree
+        for query in queries:
+            for method in ('search', 'floor', 'ceiling'):
+                self.assertEqual(_value(getattr(cached, method)(query)),
+                                 _value(getattr(tree, method)(query)))
+
+    def testHits(self):
+        '''Verify that repeated queries are answered from the cache.'''
+
+        for i in range(3):
+            self.assertEqual(self.tree.search(10).value, 10)
+            self.assertEqual(self.tree.search(11), None)
+            self.assertEqual(self.tree.floor(11).value, 10)
+            self.assertEqual(self.tree.ceiling(11).value, 12)
+        info = self.tree.cache_info()
+        self.assertEqual(info['search'],
+                         {'hits': 4, 'misses': 2, 'size': 2, 'maxsize': 64})
+        self.assertEqual(info['floor']['hits'], 2)
+        self.assertEqual(info['ceiling']['misses'], 1)
+        self.assertTrue(10 in self.tree)
+        self.tree.cache_clear()
+        self.assertEqual(self.tree.cache_info()['search']['hits'], 0)
+
+    def testInvalidation(self):
+        '''Verify that insert and delete forget only what they change.'''
+
+        queries = list(range(-1, 60))
+        self.assertAnswers(self.tree, queries)
+        self.tree.insert(11)
+        self.assertEqual(self.tree.search(11).value, 11)
+        self.assertEqual(self.tree.floor(11).value, 11)
+        self.assertEqual(self.tree.floor(13).value, 12)
+        self.assertEqual(self.tree.ceiling(9).value, 10)
+        self.assertEqual(self.tree.ceiling(11).value, 11)
+        # floor(10) and ceiling(12) were not affected
+        hits = self.tree.cache_info()['floor']['hits']
+        self.tree.floor(10)
+        self.assertEqual(self.tree.cache_info()['floor']['hits'], hits + 1)
+        self.tree.delete(50)
+        self.assertEqual(self.tree.search(50), None)
+        self.assertEqual(self.tree.floor(51).value, 48)
+        self.assertEqual(self.tree.ceiling(49).value, 52)
+        self.assertAnswers(self.tree, queries)
+
+    def testRandomOperations(self):
+        '''Verify the answers after random changes to every kind of
+        tree.'''
+
+        random.seed(22)
+        for cls in (BSTree, AVLTree, SplayTree, TreapTree, ScapegoatTree,
+                    PersistentBSTree):
+            cached = CachedBSTree(cls(), 16)
+            for i in range(600):
+                query = random.randrange(60)
+                action = random.random()
+                if action < 0.3:
+                    cached.insert(query)
+                elif action < 0.5:
+                    cached.delete(query)
+                else:
+                    self.assertAnswers(cached, [query])
+            self.assertAnswers(cached, range(-1, 61))
+            self.assertLessEqual(len(cached.floors), 16)
+
+    def testMapping(self):
+        '''Verify the dictionary methods and delete_range.'''
+
+        tree = CachedBSTree(BSTree(mapping=True))
+        tree['a'] = 1
+        tree['b'] = 2
+        self.assertEqual(tree['a'], 1)
+        tree['a'] = 3
+        self.assertEqual(tree['a'], 3)
+        del tree['a']
+        self.assertRaises(KeyError, tree.__getitem__, 'a')
+        self.assertEqual(tree.get('a', 0), 0)
+        self.assertEqual(tree.get('b'), 2)
+        self.assertRaises(TypeError, self.tree.get, 2)
+        self.tree.search(20)
+        self.tree.delete_range(10, 30)
+        self.assertEqual(self.tree.search(20), None)
+        self.assertEqual(len(self.tree), 39)
+        self.assertEqual(self.tree.cache_info()['search']['misses'], 2)
+
+    def testDisabled(self):
+        '''Verify that a cache of size 0 holds nothing.'''
+
+        tree = CachedBSTree(BSTree.from_sorted(range(10)), 0)
+        tree.search(1)
+        tree.search(1)
+        self.assertEqual(tree.cache_info()['search']['size'], 0)
+        self.assertEqual(tree.cache_info()['search']['misses'], 2)
+
+
+def cache_suite():
+    '''Return the cached tree test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(CachedTreeTestCase)
+
+if __name__ == '__main__':
+    # go!
+    runner = unittest.TextTestRunner()
+    runner.run(cache_suite())
@@ -0,0 +1,179 @@
+'''
+    Thread-safe Binary Search Tree TestCase
+
+    Verify that ConcurrentBSTree stays consistent under concurrent use
+
+    test_bst_concurrent.py
+'''
+
+
+import sys
+import threading
+import unittest
+from bst import *
+from bst_array import *
+from bst_btree import *
+from bst_cache import *
+from bst_concurrent import *
+
+
+class ConcurrentTreeTestCase(unittest.TestCase):
+    '''Test the locked tree with several threads.'''
+
+    def setUp(self):
+        '''Generate a tree of the even numbers below 1000.'''
+
+        self.tree = ConcurrentBSTree(AVLTree.from_sorted(range(0, 1000, 2)))
+
+    def tearDown(self):
+        '''Perform cleanup actions.'''
+
+        pass
+
+    def testQueries(self):
+        '''Verify that queries are passed on to the tree.'''
+
+        self.assertEqual(len(self.tree), 500)
+        self.assertTrue(10 in self.tree)
+        self.assertEqual(self.tree.search(10).value, 10)
+        self.assertEqual(self.tree.rank(10), 5)
+        self.assertEqual(self.tree.select(5).value, 10)
+        self.assertEqual(self.tree.count_range(10, 20), 6)
+        self.assertEqual([node.value for node in self.tree.iter_range(10, 14)],
+                         [10, 12, 14])
+        self.assertEqual(self.tree.height(), 9)
+        self.assertEqual(self.tree.values(), list(range(0, 1000, 2)))
+        self.assertTrue(isinstance(ConcurrentBSTree().tree, AVLTree))
+
+    def testUpdates(self):
+        '''Verify that updates are passed on to the tree.'''
+
+        self.tree.insert(11)
+        self.tree.delete(10)
+        self.tree.delete_range(500, 1000)
+        self.assertEqual(self.tree.values()[4:7], [8, 11, 12])
+        self.assertEqual(len(self.tree), 250)
+
+    def testMapping(self):
+        '''Verify the dictionary methods.'''
+
+        tree = ConcurrentBSTree(BSTree(mapping=True))
+        tree['a'] = 1
+        tree['b'] = 2
+        del tree['a']
+        self.assertEqual(tree['b'], 2)
+        self.assertEqual(tree.get('a'), None)
+        self.assertEqual(tree.items(), [('b', 2)])
+
+    def testOtherTrees(self):
+        '''Verify wrapping trees that are not BSTrees.'''
+
+        for backend in (ArrayBSTree(), BPlusTree(order=4)):
+            tree = ConcurrentBSTree(backend)
+            for val in (5, 2, 8, 1):
+                tree.insert(val)
+            tree.delete(2)
+            self.assertTrue(tree.search(8) is not None)
+            self.assertEqual(tree.search(2), None)
+            self.assertEqual(tree.range(1, 8), [1, 5, 8])
+
+    def testCachedReaders(self):
+        '''Verify that searches of a CachedBSTree, which change its caches,
+        do not run at once and corrupt them.'''
+
+        cached = CachedBSTree(AVLTree.from_sorted(range(500)), maxsize=16)
+        tree = ConcurrentBSTree(cached)
+        interval = sys.getswitchinterval()
+        missing = []
+
+        def read(start):
+            for val in range(start, 500, 7):
+                if tree.search(val) is None or val not in tree:
+                    missing.append(val)
+
+        threads = [threading.Thread(target=read, args=(start,), daemon=True)
+                   for start in range(7)]
+        sys.setswitchinterval(1e-6)
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(10)
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+        self.assertEqual(missing, [])
+        info = cached.cache_info()['search']
+        self.assertEqual(info['hits'] + info['misses'], 1000)
+        self.assertTrue(info['size'] <= 16)
+
+    def testThreads(self):
+        '''Verify that readers never see a broken tree while writers
+        insert and delete.'''
+
+        errors = []
+
+        def write(start):
+            for val in range(start, 1000, 4):
+                self.tree.insert(val)
+                self.tree.delete(val - 1)
+
+        def read():
+            for i in range(300):
+                values = self.tree.values()
+                # each writer is at most one insert ahead of its deletes
+                if values != sorted(values) or \
+                   len(set(values)) != len(values) or \
+                   not 500 <= len(values) <= 502:
+                    errors.append(values)
+
+        threads = [threading.Thread(target=write, args=(start,))
+                   for start in (1, 3)]
+        threads += [threading.Thread(target=read) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.tree.values(), list(range(1, 1000, 2)))
+
+    def testSplayReaders(self):
+        '''Verify that searches, which splay a SplayTree, do not run at
+        once and lose values.'''
+
+        tree = ConcurrentBSTree(SplayTree.from_sorted(range(500)))
+        interval = sys.getswitchinterval()
+        missing = []
+
+        def read(start):
+            for val in range(start, 500, 7):
+                if tree.search(val) is None or val not in tree:
+                    missing.append(val)
+
+        # daemons, so that searches caught in a broken tree fail the test
+        # instead of hanging it
+        threads = [threading.Thread(target=read, args=(start,), daemon=True)
+                   for start in range(7)]
+        sys.setswitchinterval(1e-6)
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(10)
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+        self.assertEqual(missing, [])
+        self.assertEqual(tree.values(), list(range(500)))
+        self.assertEqual(len(tree), 500)
+
+
+def concurrent_suite():
+    '''Return the thread-safe tree test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(ConcurrentTreeTestCase)
+
+if __name__ == '__main__':
+    # go!
+    runner = unittest.TextTestRunner()
+    runner.run(concurrent_suite())
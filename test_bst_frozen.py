@@ -0,0 +1,310 @@
+'''
+    Frozen Binary Search Tree TestCase
+
+    Verify that FrozenBSTree answers queries like the tree it was frozen from
+
+    test_bst_frozen.py
+'''
+
+
+import os
+import tempfile
+import unittest
+from array import array
+from bst import *
+from bst_frozen import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class FrozenTreeTestCase(unittest.TestCase):
+    '''Test frozen copies of the huge tree from test_bst.py.'''
+
+    def setUp(self):
+        '''Generate a tree and freeze it.'''
+
+        self.values = [20, 8, 22, 4, 12, 21, 50, 10, 14, 11, 49, 1, 70, 2,
+                       5, 77]
+        self.tree = BSTree()
+        for val in self.values:
+            self.tree.insert(val)
+        self.frozen = self.tree.freeze()
+        self.words = BSTree.from_iterable(['pear', 'fig', 'kiwi']).freeze()
+
+    def tearDown(self):
+        '''Perform cleanup actions.'''
+
+        pass
+
+    def testValues(self):
+        '''Verify len, in and iteration.'''
+
+        self.assertEqual(len(self.frozen), 16)
+        self.assertEqual(list(self.frozen), sorted(self.values))
+        self.assertEqual(list(reversed(self.words)), ['pear', 'kiwi', 'fig'])
+        self.assertTrue(49 in self.frozen)
+        self.assertFalse(48 in self.frozen)
+        self.assertEqual(len(BSTree().freeze()), 0)
+        self.assertFalse(1 in BSTree().freeze())
+
+    def testSearch(self):
+        '''Verify search, rank and select.'''
+
+        self.assertEqual(self.frozen.search(20), 9)
+        self.assertEqual(self.frozen.search(100), -1)
+        self.assertEqual(self.frozen.search(0), -1)
+        self.assertEqual(self.words.search('kiwi'), 1)
+        for val in self.values:
+            self.assertEqual(self.frozen.rank(val), self.tree.rank(val))
+        self.assertEqual(self.frozen.select(0), 1)
+        self.assertEqual(self.frozen.select(-1), 77)
+        self.assertRaises(IndexError, self.frozen.select, 16)
+
+    def testRange(self):
+        '''Verify range and count_range.'''
+
+        self.assertEqual(self.frozen.range(11, 49),
+                         [11, 12, 14, 20, 21, 22, 49])
+        self.assertEqual(self.frozen.range(78, 100), [])
+        self.assertEqual(self.frozen.count_range(3, 13), 6)
+        self.assertEqual(self.frozen.count_range(13, 3), 0)
+        self.assertEqual(self.words.range('b', 'l'), ['fig', 'kiwi'])
+
+    def testSearchMany(self):
+        '''Verify that a batch search agrees with search.'''
+
+        queries = [20, 0, 77, 78, 13, 1, 50]
+        self.assertEqual(list(self.frozen.search_many(queries)),
+                         [self.frozen.search(key) for key in queries])
+        self.assertEqual(list(self.words.search_many(['fig', 'plum'])),
+                         [0, -1])
+
+    def testRangeMany(self):
+        '''Verify that a batch of ranges agrees with range.'''
+
+        intervals = [(11, 49), (0, 3), (78, 100), (50, 50), (6, 7)]
+        self.assertEqual([list(r) for r in self.frozen.range_many(intervals)],
+                         [self.frozen.range(lo, hi) for lo, hi in intervals])
+        self.assertEqual(self.frozen.range_many([]), [])
+
+    def testMixedNumbers(self):
+        '''Verify that ints mixed with floats, and ints too big for 64
+        bits, are kept exactly.'''
+
+        frozen = AVLTree.from_iterable([1, 0.5, 2 ** 60, 2 ** 60 + 1]).freeze()
+        self.assertFalse(frozen.vectorized)
+        self.assertEqual(frozen.search(2 ** 60 + 1), 3)
+        self.assertEqual(frozen.select(2), 2 ** 60)
+        self.assertEqual(frozen.range(1, 2 ** 61), [1, 2 ** 60, 2 ** 60 + 1])
+        self.assertEqual(list(frozen.search_many([2 ** 60, 2 ** 60 + 2])),
+                         [2, -1])
+        huge = BSTree.from_sorted([0, 2 ** 64]).freeze()
+        self.assertFalse(huge.vectorized)
+        self.assertEqual(huge.search(2 ** 64), 1)
+
+    def testMapping(self):
+        '''Verify that payloads are frozen with their keys.'''
+
+        tree = BSTree(mapping=True)
+        for i, word in enumerate(['pear', 'fig', 'kiwi']):
+            tree[word] = i
+        frozen = tree.freeze()
+        self.assertEqual(frozen['fig'], 1)
+        self.assertEqual(frozen.get('plum', -1), -1)
+        self.assertRaises(KeyError, frozen.__getitem__, 'plum')
+        self.assertEqual(list(frozen.items()),
+                         [('fig', 1), ('kiwi', 2), ('pear', 0)])
+        self.assertRaises(TypeError, self.frozen.get, 1)
+
+    def testReadOnly(self):
+        '''Verify that a frozen tree cannot change and that thaw gives back
+        a tree that can.'''
+
+        self.assertRaises(TypeError, self.frozen.insert, 3)
+        self.assertRaises(TypeError, self.frozen.delete, 20)
+        thawed = self.frozen.thaw()
+        self.assertTrue(isinstance(thawed, AVLTree))
+        thawed.insert(3)
+        self.assertEqual(len(thawed), 17)
+        self.assertEqual(len(self.frozen), 16)
+        tree = BSTree(mapping=True)
+        tree['fig'] = 1
+        self.assertEqual(tree.freeze().thaw(BSTree)['fig'], 1)
+
+
+class DumpTreeTestCase(unittest.TestCase):
+    '''Test writing trees to files and loading them back.'''
+
+    def setUp(self):
+        '''Make a directory to write files in.'''
+
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'tree.bst')
+
+    def tearDown(self):
+        '''Remove the directory.'''
+
+        self.dir.cleanup()
+
+    def testInts(self):
+        '''Verify that int keys load back, mapped or read.'''
+
+        AVLTree.from_sorted(range(-5, 1000, 3)).dump(self.path)
+        for mmap in (True, False):
+            tree = BSTree.load(self.path, mmap)
+            self.assertTrue(isinstance(tree, MappedBSTree))
+            self.assertEqual(list(tree), list(range(-5, 1000, 3)))
+            self.assertEqual(tree.search(7), 4)
+            self.assertEqual(tree.range(0, 10), [1, 4, 7, 10])
+            self.assertEqual(list(tree.search_many([1, 2, 997])),
+                             [2, -1, 334])
+            self.assertEqual(os.path.getsize(self.path), 16 + 8 * 335)
+
+    def testOtherKeys(self):
+        '''Verify float, string and empty trees.'''
+
+        for values in ([0.5, 1.5, 2.25], ['fig', 'kiwi'], [2 ** 70, 2 ** 71],
+                       [1, 2.5], []):
+            BSTree.from_sorted(values).dump(self.path)
+            self.assertEqual(list(BSTree.load(self.path)), values)
+
+    def testMapping(self):
+        '''Verify that payloads are written with their keys.'''
+
+        tree = BSTree(mapping=True)
+        tree[3] = 'three'
+        tree[1] = ['one']
+        tree.dump(self.path)
+        loaded = BSTree.load(self.path)
+        self.assertEqual(list(loaded.items()), [(1, ['one']), (3, 'three')])
+        # rewriting the file must not disturb the tree mapped from it
+        loaded.dump(self.path)
+        self.assertEqual(BSTree.load(self.path)[3], 'three')
+        self.assertEqual(loaded[1], ['one'])
+
+    def testPromote(self):
+        '''Verify that a loaded tree becomes mutable when it is changed.'''
+
+        BSTree.from_sorted(range(10)).dump(self.path)
+        tree = AVLTree.load(self.path)
+        self.assertEqual(tree.insert(10).value, 10)
+        self.assertTrue(isinstance(tree, AVLTree))
+        self.assertEqual(len(tree), 11)
+        tree = BSTree.load(self.path)
+        tree.delete(5)
+        self.assertEqual(type(tree), BSTree)
+        self.assertEqual(list(tree), [0, 1, 2, 3, 4, 6, 7, 8, 9])
+        tree = BSTree(mapping=True)
+        tree['a'] = 1
+        tree.dump(self.path)
+        tree = BSTree.load(self.path)
+        tree['b'] = 2
+        del tree['a']
+        self.assertEqual(list(tree.items()), [('b', 2)])
+
+    def testByteOrder(self):
+        '''Verify that a file written with the other byte order loads.'''
+
+        BSTree.from_sorted([1, 256]).dump(self.path)
+        with open(self.path, 'rb') as f:
+            data = bytearray(f.read())
+        keys = array('q', data[16:])
+        keys.byteswap()
+        data[5:6] = b'>' if data[5:6] == b'<' else b'<'
+        data[16:] = keys.tobytes()
+        with open(self.path, 'wb') as f:
+            f.write(data)
+        self.assertEqual(list(BSTree.load(self.path)), [1, 256])
+
+    def testBadFile(self):
+        '''Verify that a file not written by dump is refused.'''
+
+        with open(self.path, 'wb') as f:
+            f.write(b'not a tree file at all')
+        self.assertRaises(ValueError, BSTree.load, self.path)
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class VectorizedTreeTestCase(unittest.TestCase):
+    '''Test the batch queries of frozen trees whose keys are kept in a
+    numpy array.'''
+
+    def setUp(self):
+        '''Freeze trees of ints and of floats.'''
+
+        self.ints = AVLTree.from_sorted(range(0, 2 ** 62, 2 ** 55)).freeze()
+        self.floats = AVLTree.from_sorted([0.5, 1.5, 2.5, 3.5]).freeze()
+
+    def tearDown(self):
+        '''Perform cleanup actions.'''
+
+        pass
+
+    def testVectorized(self):
+        '''Verify which keys are kept in a numpy array.'''
+
+        self.assertTrue(self.ints.vectorized)
+        self.assertEqual(self.ints.keys.dtype, numpy.int64)
+        self.assertTrue(self.floats.vectorized)
+        self.assertEqual(self.floats.keys.dtype, numpy.float64)
+        self.assertEqual(self.ints.select(1), 2 ** 55)
+        self.assertEqual(type(self.ints.select(1)), int)
+
+    def testSearchMany(self):
+        '''Verify that a vectorized batch search agrees with search.'''
+
+        queries = [2 ** 55, 0, 2 ** 55 + 1, 2 ** 62, -1, 127 * 2 ** 55]
+        found = self.ints.search_many(queries)
+        self.assertTrue(isinstance(found, numpy.ndarray))
+        self.assertEqual(found.tolist(),
+                         [self.ints.search(key) for key in queries])
+        self.assertEqual(self.floats.search_many([1.5, 2, 3.5]).tolist(),
+                         [1, -1, 3])
+
+    def testRangeMany(self):
+        '''Verify that a vectorized batch of ranges agrees with range.'''
+
+        intervals = [(0, 2 ** 56), (2 ** 62, 2 ** 63 - 1), (5, 2 ** 55)]
+        self.assertEqual([r.tolist() for r in self.ints.range_many(intervals)],
+                         [self.ints.range(lo, hi) for lo, hi in intervals])
+        self.assertEqual(
+            [r.tolist() for r in self.floats.range_many([(1, 3), (4, 5)])],
+            [[1.5, 2.5], []])
+
+    def testLoaded(self):
+        '''Verify that keys read in place from a file are vectorized.'''
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tree.bst')
+            self.ints.thaw().dump(path)
+            tree = BSTree.load(path)
+            self.assertTrue(tree.vectorized)
+            self.assertEqual(tree.search_many([2 ** 56, 3]).tolist(), [2, -1])
+
+
+def frozen_suite():
+    '''Return the frozen tree test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(FrozenTreeTestCase)
+
+
+def dump_suite():
+    '''Return the dump and load test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(DumpTreeTestCase)
+
+
+def vectorized_suite():
+    '''Return the vectorized frozen tree test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(VectorizedTreeTestCase)
+
+if __name__ == '__main__':
+    # go!
+    runner = unittest.TextTestRunner()
+    runner.run(frozen_suite())
+    runner.run(dump_suite())
+    runner.run(vectorized_suite())
@@ -0,0 +1,215 @@
+'''
+    Binary Search Tree Instrumentation TestCase
+
+    Verify the counts kept by instrumented trees
+
+    test_bst_stats.py
+'''
+
+
+import random
+import unittest
+from bst import *
+from bst_stats import *
+
+
+class InstrumentTestCase(unittest.TestCase):
+    '''Test the counts kept by instrumented trees of every kind.'''
+
+    def setUp(self):
+        '''Generate a perfectly balanced tree of 15 values and instrument
+        it.'''
+
+        self.tree = BSTree.from_sorted(range(15))
+        self.tree.instrument()
+
+    def tearDown(self):
+        '''Perform cleanup actions.'''
+
+        pass
+
+    def assertPlain(self, tree):
+        '''Verify that no probe was left in tree.'''
+
+        for node in tree.pre_order():
+            self.assertEqual(type(node.value), int)
+
+    def testSearch(self):
+        '''Verify comparisons and visits of search and range.'''
+
+        self.tree.search(0)
+        self.tree.search(7)
+        self.assertEqual(self.tree.stats(),
+                         {'search': {'calls': 2, 'comparisons': 8,
+                                     'visits': 5, 'allocations': 0,
+                                     'restructures': 0}})
+        self.assertEqual(self.tree.range(3, 9),
+                         BSTree.from_sorted(range(15)).range(3, 9))
+        self.assertEqual(self.tree.count_range(None, 5), 6)
+        self.assertEqual(self.tree.stats()['count_range']['visits'], 4)
+        self.assertTrue(isinstance(self.tree, BSTree))
+
+    def testToggle(self):
+        '''Verify that counting stops and starts again and that stats can
+        be reset.'''
+
+        self.assertEqual(BSTree().stats(), {})
+        self.tree.search(3)
+        self.tree.instrument(False)
+        self.assertEqual(type(self.tree), BSTree)
+        self.tree.search(3)
+        self.assertEqual(self.tree.stats(True)['search']['calls'], 1)
+        self.assertEqual(self.tree.stats(), {})
+        self.tree.instrument()
+        self.tree.instrument()
+        self.tree.search(3)
+        self.assertEqual(self.tree.stats()['search']['calls'], 1)
+
+    def testRestructures(self):
+        '''Verify rotations, rebuilds, splits and merges.'''
+
+        tree = AVLTree()
+        tree.instrument()
+        for val in range(1, 8):
+            tree.insert(val)
+        self.assertEqual(tree.stats()['insert'],
+                         {'calls': 7, 'comparisons': 28, 'visits': 14,
+                          'allocations': 7, 'restructures': 4})
+        self.assertPlain(tree)
+        tree = SplayTree.from_sorted(range(15))
+        tree.instrument()
+        tree.search(0)
+        self.assertEqual(tree.stats()['search']['restructures'], 3)
+        tree = ScapegoatTree()
+        tree.instrument()
+        for val in range(20):
+            tree.insert(val)
+        self.assertTrue(tree.stats()['insert']['restructures'] > 0)
+        self.assertPlain(tree)
+        random.seed(23)
+        tree = TreapTree()
+        tree.instrument()
+        for val in range(20):
+            tree.insert(val)
+        while tree.root:
+            # the root has two children until the tree is nearly empty
+            tree.delete(tree.root.value)
+        self.assertEqual(tree.stats()['insert']['allocations'], 20)
+        self.assertTrue(tree.stats()['delete']['restructures'] > 0)
+
+    def testPersistent(self):
+        '''Verify that path copies are counted as allocations.'''
+
+        tree = PersistentBSTree.from_sorted(range(15))
+        tree.instrument()
+        old = tree.snapshot()
+        tree.insert(15)
+        tree.delete(7)
+        stats = tree.stats()
+        self.assertEqual(stats['insert']['allocations'], 5)
+        self.assertEqual(stats['delete']['allocations'], 3)
+        self.assertEqual(list(tree), list(range(7)) + list(range(8, 16)))
+        self.assertEqual(list(old), list(range(15)))
+        self.assertPlain(tree)
+
+    def testMapping(self):
+        '''Verify the dictionary methods and the errors they raise.'''
+
+        tree = BSTree(mapping=True)
+        tree.instrument()
+        tree['a'] = 1
+        tree['b'] = 2
+        self.assertEqual(tree['b'], 2)
+        self.assertEqual(tree.get('c', 3), 3)
+        with self.assertRaises(KeyError) as raised:
+            tree['c']
+        self.assertEqual(raised.exception.args[0], 'c')
+        del tree['a']
+        self.assertRaises(KeyError, tree.__delitem__, 'a')
+        stats = tree.stats()
+        self.assertEqual(stats['insert']['allocations'], 2)
+        self.assertEqual(stats['search']['calls'], 3)
+        # the search in __delitem__ is part of the delete
+        self.assertEqual(stats['delete']['calls'], 2)
+        self.assertEqual(list(tree.items()), [('b', 2)])
+        self.assertEqual(type(tree.root.value), str)
+
+    def testMonoid(self):
+        '''Verify that aggregates are kept without probes.'''
+
+        for cls in (BSTree, AVLTree, SplayTree, TreapTree, ScapegoatTree):
+            for monoid, expected in ((SUM, 45), (MAX, 9), (MIN, 0)):
+                tree = cls(monoid=monoid)
+                tree.instrument()
+                for val in (5, 2, 8, 0, 9, 1, 7, 3, 6, 4):
+                    tree.insert(val)
+                tree.delete(3)
+                tree.insert(3)
+                self.assertEqual(tree.aggregate_range(), expected)
+                self.assertEqual(tree.stats()['insert']['allocations'], 11)
+                self.assertPlain(tree)
+                for node in tree.pre_order():
+                    self.assertEqual(type(node.agg), int)
+        tree = AVLTree(monoid=SUM, mapping=True)
+        tree.instrument()
+        tree[2] = 'b'
+        tree[1] = 'a'
+        self.assertEqual(type(tree.root.agg), int)
+        self.assertEqual(tree.aggregate_range(), 3)
+        self.assertEqual(tree.node_class, SUM.node_class(MapNode))
+
+    def testNewTrees(self):
+        '''Verify that the trees split, the set operations and delete_range
+        return are neither instrumented nor counted into the tree they came
+        from.'''
+
+        for cls in (BSTree, AVLTree, TreapTree, ScapegoatTree,
+                    PersistentBSTree):
+            tree = cls.from_sorted(range(15))
+            tree.instrument()
+            tree.search(3)
+            removed = tree.delete_range(10, 12, detach=True)
+            less, found, more = split(tree, 5)
+            for new in (removed, less, more, union(less, more)):
+                self.assertEqual(type(new), cls)
+                self.assertEqual(new.op_stats, None)
+                new.search(1)
+                new.insert(20)
+                self.assertEqual(new.stats(), {})
+            self.assertEqual(tree.stats()['search']['calls'], 1)
+            self.assertEqual(list(tree.stats()), ['search'])
+
+    def testRandomOperations(self):
+        '''Verify that instrumented trees hold the same values as plain
+        ones.'''
+
+        random.seed(23)
+        for cls in (BSTree, AVLTree, SplayTree, TreapTree, ScapegoatTree,
+                    PersistentBSTree):
+            plain, counted = cls(), cls()
+            counted.instrument()
+            for i in range(300):
+                val = random.randrange(50)
+                if random.random() < 0.6:
+                    plain.insert(val)
+                    counted.insert(val)
+                else:
+                    plain.delete(val)
+                    counted.delete(val)
+            self.assertEqual(list(counted), list(plain))
+            self.assertPlain(counted)
+            stats = counted.stats()
+            self.assertEqual(stats['insert']['allocations'] > 0, True)
+            self.assertTrue(stats['delete']['comparisons'] >=
+                            stats['delete']['visits'])
+
+
+def stats_suite():
+    '''Return the instrumentation test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(InstrumentTestCase)
+
+if __name__ == '__main__':
+    # go!
+    runner = unittest.TextTestRunner()
+    runner.run(stats_suite())
@@ -0,0 +1,182 @@
+'''
+    Binary Search Tree Timing Hooks TestCase
+
+    Verify timing hooks and the latency histograms they record into
+
+    test_bst_timing.py
+'''
+
+
+import unittest
+from bst import *
+from bst_timing import *
+
+
+class TimingHookTestCase(unittest.TestCase):
+    '''Test attaching timing hooks to trees.'''
+
+    def setUp(self):
+        '''Generate a tree and attach a hook that keeps every call.'''
+
+        self.calls = []
+        self.tree = AVLTree.from_sorted(range(15))
+        self.tree.add_timing_hook(self.hook)
+
+    def tearDown(self):
+        '''Perform cleanup actions.'''
+
+        pass
+
+    def hook(self, op, ns):
+        '''Keep a call of the hook.'''
+
+        self.calls.append((op, ns))
+
+    def testOperations(self):
+        '''Verify that each operation is timed once, under its name.'''
+
+        self.tree.insert(15)
+        self.tree.search(3)
+        self.assertTrue(3 in self.tree)
+        self.tree.range(2, 5)
+        self.tree.count_range(2, 5)
+        self.tree.floor(3)
+        self.tree.delete(3)
+        self.assertEqual([op for op, ns in self.calls],
+                         ['insert', 'search', 'search', 'range',
+                          'count_range', 'floor', 'delete'])
+        self.assertTrue(all(type(ns) is int and ns >= 0
+                            for op, ns in self.calls))
+        self.assertTrue(isinstance(self.tree, AVLTree))
+        self.assertEqual(len(self.tree), 15)
+
+    def testMapping(self):
+        '''Verify that the dictionary methods are timed through the
+        operations they make.'''
+
+        tree = BSTree(mapping=True)
+        tree.add_timing_hook(self.hook)
+        tree['a'] = 1
+        self.assertEqual(tree['a'], 1)
+        self.assertEqual(tree.get('b'), None)
+        del tree['a']
+        self.assertRaises(KeyError, tree.__getitem__, 'a')
+        self.assertEqual([op for op, ns in self.calls],
+                         ['insert', 'search', 'search', 'search', 'delete',
+                          'search'])
+
+    def testNewTrees(self):
+        '''Verify that the trees split returns are not timed.'''
+
+        less, found, more = split(self.tree, 7)
+        self.assertEqual(type(less), AVLTree)
+        self.assertFalse(hasattr(more, 'timing_hooks'))
+        less.search(1)
+        more.insert(20)
+        self.assertEqual(self.calls, [])
+
+    def testRemove(self):
+        '''Verify that a tree without hooks is a plain tree again, and that
+        timing and counting can be turned on and off in any order.'''
+
+        self.tree.instrument()
+        other = []
+        self.tree.add_timing_hook(lambda op, ns: other.append(op))
+        self.tree.search(1)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(other, ['search'])
+        self.tree.remove_timing_hook(self.hook)
+        self.assertRaises(ValueError, self.tree.remove_timing_hook,
+                          self.hook)
+        self.tree.remove_timing_hook(self.tree.timing_hooks[0])
+        self.assertEqual(type(self.tree).__name__, 'InstrumentedAVLTree')
+        self.tree.search(1)
+        self.assertEqual(self.tree.stats()['search']['calls'], 2)
+        self.tree.instrument(False)
+        self.assertEqual(type(self.tree), AVLTree)
+        self.assertRaises(ValueError, BSTree().remove_timing_hook, print)
+
+
+class LatencyHistogramTestCase(unittest.TestCase):
+    '''Test the fixed-size latency histogram.'''
+
+    def setUp(self):
+        '''Record the values from 1 to 100000 once each.'''
+
+        self.histogram = LatencyHistogram()
+        for value in range(1, 100001):
+            self.histogram.record(value)
+
+    def tearDown(self):
+        '''Perform cleanup actions.'''
+
+        pass
+
+    def testPercentiles(self):
+        '''Verify that percentiles are within the precision of their
+        buckets.'''
+
+        for q, exact in ((50, 50000), (99, 99000), (99.9, 99900),
+                         (100, 100000)):
+            value, = self.histogram.percentiles(q)
+            self.assertTrue(exact <= value <= exact * (1 + 1 / 64), q)
+        exported = self.histogram.export()
+        self.assertEqual((exported['count'], exported['min'],
+                          exported['max'], exported['mean']),
+                         (100000, 1, 100000, 50000.5))
+        self.assertEqual(sum(exported['buckets'].values()), 100000)
+        small = LatencyHistogram()
+        for value in (3, 3, 5, 127):
+            small.record(value)
+        self.assertEqual(small.percentiles(0, 50, 75, 100), [3, 3, 5, 127])
+        self.assertEqual(small.export()['buckets'], {3: 2, 5: 1, 127: 1})
+
+    def testFixedSize(self):
+        '''Verify that the memory of a histogram does not grow and that
+        values out of range are clamped.'''
+
+        size = len(self.histogram.counts)
+        self.histogram.record(2 ** 50)
+        self.assertEqual(len(self.histogram.counts), size)
+        self.assertEqual(self.histogram.max, 2 ** 40)
+        self.assertEqual(self.histogram.percentiles(100), [2 ** 40])
+
+    def testRecorder(self):
+        '''Verify export and reset of a recorder.'''
+
+        recorder = LatencyRecorder()
+        tree = BSTree.from_sorted(range(100))
+        tree.add_timing_hook(recorder)
+        for val in range(100):
+            tree.search(val)
+        tree.delete(5)
+        exported = recorder.export(reset=True)
+        self.assertEqual(sorted(exported), ['delete', 'search'])
+        self.assertEqual(exported['search']['count'], 100)
+        self.assertTrue(exported['search']['p50'] <=
+                        exported['search']['p99'] <=
+                        exported['search']['max'])
+        self.assertEqual(recorder.export()['search'],
+                         {'count': 0, 'min': None, 'max': None, 'mean': None,
+                          'p50': None, 'p99': None, 'p999': None,
+                          'buckets': {}})
+        self.assertEqual(LatencyHistogram().percentiles(50), [None])
+
+
+def timing_suite():
+    '''Return the timing hook test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(TimingHookTestCase)
+
+
+def histogram_suite():
+    '''Return the latency histogram test suite.'''
+
+    return unittest.TestLoader().loadTestsFromTestCase(
+        LatencyHistogramTestCase)
+
+if __name__ == '__main__':
+    # go!
+    runner = unittest.TextTestRunner()
+    runner.run(timing_suite())
+    runner.run(histogram_suite())